@@ -0,0 +1,44 @@
+import weakref
+
+from django.db.backends.postgresql import base
+
+from .creation import DatabaseCreation
+from .pool import get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Бэкенд PostgreSQL, который берет соединения из пула процесса
+    и возвращает их туда при закрытии вместо разрыва. Если обертку
+    собрал сборщик мусора без закрытия, например вместе с завершившимся
+    потоком, соединение закрывается и освобождает место в пуле
+    """
+
+    creation_class = DatabaseCreation
+    pool = None
+    pool_finalizer = None
+
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(self.alias, conn_params)
+        if self.pool is None:
+            return super().get_new_connection(conn_params)
+        connection = self.pool.checkout(
+            lambda: base.DatabaseWrapper.get_new_connection(
+                self, conn_params
+            )
+        )
+        self.pool_finalizer = weakref.finalize(
+            self, self.pool.release, connection
+        )
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get(
+            'isolation_level', connection.isolation_level
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None or self.pool is None:
+            return super()._close()
+        self.pool_finalizer.detach()
+        with self.wrap_database_errors:
+            self.pool.checkin(self.connection)
@@ -0,0 +1,18 @@
+from django.db.backends.postgresql import creation
+
+from .pool import close_idle
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """
+    Перед удалением и копированием тестовой базы закрывает свободные
+    соединения с ней, которые остались в пуле после connection.close()
+    """
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        close_idle(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+    def _clone_test_db(self, suffix, verbosity, keepdb=False):
+        close_idle(self.connection.settings_dict['NAME'])
+        super()._clone_test_db(suffix, verbosity, keepdb)
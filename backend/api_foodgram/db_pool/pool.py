@@ -0,0 +1,235 @@
+import os
+import threading
+import time
+
+import psycopg2
+from django.conf import settings
+from django.db.backends.base.base import NO_DB_ALIAS
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    pass
+
+
+class ConnectionPool:
+    """
+    Ограниченный пул соединений psycopg2 в памяти процесса.
+    Соединений не больше max_size, остальные запросы ждут
+    освобождения не дольше timeout секунд, поэтому всплеск трафика
+    упирается в workers * max_size соединений, а не в max_connections
+    """
+
+    def __init__(self, alias, database, max_size, timeout, max_age,
+                 check_after):
+        self.alias = alias
+        self.database = database
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_age = max_age
+        self.check_after = check_after
+        self.slots = threading.BoundedSemaphore(max_size)
+        self.lock = threading.Lock()
+        self.idle = []
+        self.created_at = {}
+        self.stats = {
+            'checkouts': 0,
+            'in_use': 0,
+            'created': 0,
+            'waits': 0,
+            'wait_seconds': 0.0,
+            'timeouts': 0,
+            'recycled': 0,
+            'failed_checks': 0,
+        }
+
+    def checkout(self, connect):
+        """
+        Выдает свободное живое соединение или открывает новое через
+        connect, если свободных нет, а пул еще не заполнен
+        """
+        self.acquire()
+        try:
+            connection = self.take_idle()
+            if connection is None:
+                connection = connect()
+                with self.lock:
+                    self.created_at[id(connection)] = time.monotonic()
+                    self.stats['created'] += 1
+        except BaseException:
+            self.slots.release()
+            raise
+        with self.lock:
+            self.stats['checkouts'] += 1
+            self.stats['in_use'] += 1
+        return connection
+
+    def acquire(self):
+        if self.slots.acquire(blocking=False):
+            return
+        started = time.monotonic()
+        acquired = self.slots.acquire(timeout=self.timeout)
+        with self.lock:
+            self.stats['waits'] += 1
+            self.stats['wait_seconds'] += time.monotonic() - started
+            if not acquired:
+                self.stats['timeouts'] += 1
+        if not acquired:
+            raise PoolTimeout(
+                f'Нет свободных соединений с базой {self.database} '
+                f'за {self.timeout} с, в пуле {self.max_size}'
+            )
+
+    def take_idle(self):
+        while True:
+            with self.lock:
+                if not self.idle:
+                    return None
+                connection, returned_at = self.idle.pop()
+            if self.is_healthy(connection, returned_at):
+                return connection
+            self.discard(connection)
+
+    def is_healthy(self, connection, returned_at):
+        """
+        Закрытые и слишком старые соединения не выдаются. Соединение,
+        простоявшее дольше check_after секунд, проверяется запросом,
+        чтобы не отдать в запрос оборванное сервером
+        """
+        if connection.closed or self.is_expired(connection):
+            return False
+        if time.monotonic() - returned_at < self.check_after:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+        except psycopg2.Error:
+            with self.lock:
+                self.stats['failed_checks'] += 1
+            return False
+        return True
+
+    def is_expired(self, connection):
+        created_at = self.created_at.get(id(connection), 0)
+        return time.monotonic() - created_at >= self.max_age
+
+    def checkin(self, connection):
+        """
+        Возвращает соединение в пул. Незавершенная транзакция
+        откатывается, сломанное или устаревшее соединение закрывается
+        """
+        try:
+            reusable = not connection.closed and not self.is_expired(
+                connection
+            )
+            if (
+                reusable
+                and connection.get_transaction_status()
+                != TRANSACTION_STATUS_IDLE
+            ):
+                connection.rollback()
+        except psycopg2.Error:
+            reusable = False
+        with self.lock:
+            self.stats['in_use'] -= 1
+            if reusable:
+                self.idle.append((connection, time.monotonic()))
+        if not reusable:
+            self.discard(connection)
+        self.slots.release()
+
+    def release(self, connection):
+        """
+        Закрывает соединение, которое не вернули в пул, например если
+        поток завершился, не закрыв его, и освобождает место в пуле
+        """
+        self.discard(connection)
+        with self.lock:
+            self.stats['in_use'] -= 1
+        self.slots.release()
+
+    def close_idle(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for connection, _ in idle:
+            self.discard(connection)
+
+    def discard(self, connection):
+        with self.lock:
+            self.created_at.pop(id(connection), None)
+            self.stats['recycled'] += 1
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'alias': self.alias,
+                'database': self.database,
+                'max_size': self.max_size,
+                'idle': len(self.idle),
+                **self.stats,
+                'wait_seconds': round(self.stats['wait_seconds'], 3),
+            }
+
+
+def get_pool(alias, conn_params):
+    """
+    Пул процесса для набора параметров подключения. Ключ учитывает
+    pid, поэтому после fork воркер не берет соединения родителя,
+    и параметры, поэтому тестовая база не получит соединения основной.
+    Служебные подключения без базы (создание и удаление баз) идут мимо пула
+    """
+    if settings.DB_POOL_MAX_SIZE <= 0 or alias == NO_DB_ALIAS:
+        return None
+    key = (
+        os.getpid(),
+        alias,
+        tuple(sorted((name, str(value))
+                     for name, value in conn_params.items())),
+    )
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(
+                alias,
+                conn_params.get('database'),
+                settings.DB_POOL_MAX_SIZE,
+                settings.DB_POOL_TIMEOUT,
+                settings.DB_POOL_MAX_AGE,
+                settings.DB_POOL_CHECK_AFTER,
+            )
+            _pools[key] = pool
+        return pool
+
+
+def close_idle(database):
+    """
+    Закрывает свободные соединения процесса с базой database.
+    Postgres не удаляет и не копирует базу, пока к ней подключены
+    """
+    pid = os.getpid()
+    with _pools_lock:
+        pools = [
+            pool for key, pool in _pools.items()
+            if key[0] == pid and pool.database == database
+        ]
+    for pool in pools:
+        pool.close_idle()
+
+
+def pool_stats():
+    pid = os.getpid()
+    with _pools_lock:
+        pools = [pool for key, pool in _pools.items() if key[0] == pid]
+    return {
+        'pid': pid,
+        'pools': [pool.snapshot() for pool in pools],
+    }
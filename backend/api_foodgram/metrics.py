@@ -0,0 +1,217 @@
+import os
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from prometheus_client import (REGISTRY, CollectorRegistry, Histogram,
+                               generate_latest, multiprocess)
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.permissions import IsAdminUser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .db_pool.pool import pool_stats
+
+MULTIPROCESS_DIR_ENV = 'prometheus_multiproc_dir'
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+LABELS = ['view', 'method']
+
+HISTOGRAMS = [
+    Histogram(
+        'foodgram_request_duration_seconds', 'Время обработки запроса',
+        LABELS, buckets=DURATION_BUCKETS,
+    ),
+    Histogram(
+        'foodgram_db_duration_seconds', 'Время выполнения SQL-запросов',
+        LABELS, buckets=DURATION_BUCKETS,
+    ),
+    Histogram(
+        'foodgram_serializer_duration_seconds',
+        'Время работы сериализаторов', LABELS, buckets=DURATION_BUCKETS,
+    ),
+    Histogram(
+        'foodgram_db_queries', 'Количество SQL-запросов',
+        LABELS, buckets=QUERY_BUCKETS,
+    ),
+]
+
+_local = threading.local()
+
+
+def render_metrics():
+    """
+    С переменной окружения prometheus_multiproc_dir воркеры gunicorn
+    пишут значения в файлы общего каталога, и ответ любого воркера
+    содержит сумму по всем. Без нее отдаются значения текущего процесса
+    """
+    if MULTIPROCESS_DIR_ENV not in os.environ:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+class RequestMetrics:
+    """
+    Счетчики одного запроса. Экземпляр подключается
+    как execute_wrapper ко всем соединениям с базой
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+    @contextmanager
+    def collect(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield
+
+    def stream(self, content, view, method):
+        """
+        Потоковый ответ выполняет запросы при отдаче тела,
+        уже после выхода из middleware, поэтому они считаются здесь,
+        а гистограммы пополняются после отдачи последнего фрагмента
+        """
+        try:
+            with self.collect():
+                yield from content
+        finally:
+            self.observe(view, method)
+
+    def server_timing(self):
+        total = time.perf_counter() - self.started
+        return ', '.join([
+            f'db;desc="{self.queries} queries";'
+            f'dur={self.db_time * 1000:.1f}',
+            f'serializer;dur={self.serializer_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+    def observe(self, view, method):
+        total = time.perf_counter() - self.started
+        for histogram, value in zip(HISTOGRAMS, [
+            total, self.db_time, self.serializer_time, self.queries,
+        ]):
+            histogram.labels(view, method).observe(value)
+
+
+class MetricsMiddleware:
+    """
+    Для доли запросов METRICS_SAMPLE_RATE считает SQL-запросы, время
+    в базе и в сериализаторах, отдает их в заголовке Server-Timing
+    и добавляет в гистограммы. Остальные запросы проходят без затрат.
+    Для потоковых ответов заголовок содержит только запросы до начала
+    отдачи тела, а гистограммы - все
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.METRICS_SAMPLE_RATE
+        if not rate or random.random() >= rate:
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        _local.metrics = metrics
+        try:
+            with metrics.collect():
+                response = self.get_response(request)
+        finally:
+            _local.metrics = None
+        response['Server-Timing'] = metrics.server_timing()
+        match = request.resolver_match
+        view = match.view_name if match is not None else 'unresolved'
+        if response.streaming:
+            response.streaming_content = metrics.stream(
+                response.streaming_content, view, request.method
+            )
+        else:
+            metrics.observe(view, request.method)
+        return response
+
+
+class TimedSerializerMixin:
+    """
+    Учитывает время сериализации ответа. Вложенные сериализаторы
+    не засекаются повторно, поэтому время не считается дважды
+    """
+
+    def to_representation(self, instance):
+        metrics = getattr(_local, 'metrics', None)
+        if metrics is None or metrics.serializing:
+            return super().to_representation(instance)
+        metrics.serializing = True
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializing = False
+            metrics.serializer_time += time.perf_counter() - started
+
+
+class PrometheusRenderer(BaseRenderer):
+    media_type = 'text/plain; version=0.0.4'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, bytes):
+            return data
+        if isinstance(data, dict):
+            data = '\n'.join(
+                f'# {key}: {value}' for key, value in data.items()
+            )
+        return data.encode(self.charset)
+
+
+class PrometheusNegotiation(BaseContentNegotiation):
+    """
+    Метрики отдаются в текстовом формате Prometheus при любом Accept:
+    DRF не сопоставляет */* с типом, у которого есть параметр version
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0] if parsers else None
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class MetricsView(APIView):
+    permission_classes = [IsAdminUser]
+    renderer_classes = [PrometheusRenderer]
+    content_negotiation_class = PrometheusNegotiation
+
+    def get(self, request):
+        return Response(render_metrics())
+
+
+metrics_view = MetricsView.as_view()
+
+
+@api_view(['GET', ])
+@permission_classes([IsAdminUser, ])
+def db_pool_view(request):
+    return Response(pool_stats())
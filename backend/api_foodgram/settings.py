@@ -10,14 +10,15 @@ ALLOWED_HOSTS = ['*']
 
 
 INSTALLED_APPS = [
-    'users',
-    'recipes',
+    'users.apps.UsersConfig',
+    'recipes.apps.RecipesConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'django_filters',
@@ -27,6 +28,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api_foodgram.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -60,12 +62,27 @@ AUTH_USER_MODEL = 'users.User'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'api_foodgram.db_pool',
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('POSTGRES_USER'),
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD'),
         'HOST': os.environ.get('DB_HOST'),
         'PORT': os.environ.get('DB_PORT'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+    }
+}
+
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 0))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+DB_POOL_MAX_AGE = int(os.environ.get('DB_POOL_MAX_AGE', 30 * 60))
+DB_POOL_CHECK_AFTER = int(os.environ.get('DB_POOL_CHECK_AFTER', 30))
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
@@ -103,14 +120,60 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'bcknd_static')
 MEDIA_URL = '/bcknd_media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'bcknd_media')
 
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(
+    os.environ.get('FILE_UPLOAD_MAX_MEMORY_SIZE', 1024 * 1024)
+)
+FILE_UPLOAD_TEMP_DIR = os.environ.get('FILE_UPLOAD_TEMP_DIR')
+
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
-    'DEFAULT_AUTHENTICATION_CLASSES': ['rest_framework.authentication.TokenAuthentication'],
+    'DEFAULT_AUTHENTICATION_CLASSES': ['users.authentication.CachedTokenAuthentication'],
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 6,
 }
 
+SEARCH_CONFIG = 'russian'
+
+SHOPPING_LIST_CHUNK_SIZE = 2000
+SHOPPING_LIST_PDF_FONT = os.environ.get(
+    'SHOPPING_LIST_PDF_FONT',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+)
+
+LOCAL_CACHE_TIMEOUT = int(os.environ.get('LOCAL_CACHE_TIMEOUT', 60))
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 24
+PAGINATION_COUNT_CACHE_TIMEOUT = 30
+PAGINATION_ESTIMATE_THRESHOLD = 10000
+RELATIONS_CACHE_TIMEOUT = 60 * 60
+AUTH_TOKEN_CACHE_SIZE = 10000
+AUTH_TOKEN_CACHE_TTL = 5 * 60
+
+INGREDIENT_SEARCH_LIMIT = int(os.environ.get('INGREDIENT_SEARCH_LIMIT', 50))
+INGREDIENT_INDEX_TTL = int(os.environ.get('INGREDIENT_INDEX_TTL', 300))
+
+FEED_FANOUT_BATCH_SIZE = 1000
+FEED_FANOUT_MAX_FOLLOWERS = int(
+    os.environ.get('FEED_FANOUT_MAX_FOLLOWERS', 1000)
+)
+FEED_MAX_ENTRIES = 500
+FEED_BACKFILL_SIZE = 50
+
+SIMILAR_RECIPES_COUNT = 20
+SIMILARITY_BLOCK_SIZE = 256
+
+PANTRY_INDEX_REFRESH = int(os.environ.get('PANTRY_INDEX_REFRESH', 5))
+PANTRY_INDEX_TTL = int(os.environ.get('PANTRY_INDEX_TTL', 300))
+
+RECIPES_CHANGES_LIMIT = 1000
+RECIPES_CHANGES_TIMEOUT = 2 * PANTRY_INDEX_TTL
+
+METRICS_SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', 0))
+
 
 DJOSER = {
     'SERIALIZERS': {'users': 'users.serializers.UserSerializer'},
@@ -132,4 +195,6 @@ DJOSER = {
     'LOGIN_FIELD': 'email',
     'HIDE_USERS': False,
     'USER_ID_FIELD': 'id',
+    'PASSWORD_RESET_CONFIRM_URL': 'password/reset/confirm/{uid}/{token}',
+    'USERNAME_RESET_CONFIRM_URL': 'email/reset/confirm/{uid}/{token}',
 }
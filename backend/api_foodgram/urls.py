@@ -2,8 +2,12 @@ from django.contrib import admin
 from django.urls import path
 from django.urls.conf import include
 
+from .metrics import db_pool_view, metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/_metrics', metrics_view, name='metrics'),
+    path('api/_db_pool', db_pool_view, name='db_pool'),
     path('api/', include('users.urls')),
     path('api/', include('recipes.urls')),
 ]
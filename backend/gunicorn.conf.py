@@ -0,0 +1,29 @@
+import os
+import shutil
+
+bind = '0.0.0.0:8000'
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+
+# Воркер одновременно обслуживает не больше threads запросов, поэтому
+# пула такого размера хватает всем потокам. Вне gunicorn пул выключен
+os.environ.setdefault('DB_POOL_MAX_SIZE', str(threads))
+
+METRICS_DIR = os.environ.get('prometheus_multiproc_dir')
+
+
+def on_starting(server):
+    """
+    Воркеры пишут метрики в общий каталог. При запуске он очищается,
+    чтобы не суммировать значения воркеров прошлого запуска
+    """
+    if METRICS_DIR:
+        shutil.rmtree(METRICS_DIR, ignore_errors=True)
+        os.makedirs(METRICS_DIR)
+
+
+def child_exit(server, worker):
+    if METRICS_DIR:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
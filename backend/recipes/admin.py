@@ -36,6 +36,7 @@ class RecipeAdmin(admin.ModelAdmin):
         'id',
         'author',
         'name',
+        'favorites_count',
     ]
     list_filter = [
         'author',
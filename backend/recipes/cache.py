@@ -0,0 +1,122 @@
+import time
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+CATALOG_VERSION_KEY = 'catalog:version'
+RECIPES_VERSION_KEY = 'recipes:version'
+RECIPES_CHANGES_KEY = 'recipes:changes'
+RECIPES_CHANGE_KEY = 'recipes:change:{number}'
+
+
+def is_shared():
+    """
+    Кеш общий для всех процессов. У LocMemCache своя копия в каждом
+    воркере и в каждой management-команде, изменения другим не видны,
+    а DummyCache ничего не хранит, и версии в нем не меняются
+    """
+    return not isinstance(
+        caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache)
+    )
+
+
+def local_timeout(timeout):
+    """
+    Срок хранения данных, которые сбрасываются сменой версии.
+    В кеше процесса смена версии в другом процессе не видна,
+    поэтому там данные живут не дольше LOCAL_CACHE_TIMEOUT
+    """
+    if is_shared():
+        return timeout
+    if timeout is None:
+        return settings.LOCAL_CACHE_TIMEOUT
+    return min(timeout, settings.LOCAL_CACHE_TIMEOUT)
+
+
+def get_version(key, timeout=None):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time(), timeout)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key, timeout=None):
+    cache.set(key, time.time(), timeout)
+
+
+def get_catalog_version():
+    """
+    Версия справочников тегов и ингредиентов: время последнего изменения.
+    Входит в ключи кеша, поэтому смена версии сбрасывает весь кеш
+    справочников без перебора ключей
+    """
+    return get_version(CATALOG_VERSION_KEY, local_timeout(None))
+
+
+def bump_catalog_version():
+    bump_version(CATALOG_VERSION_KEY, local_timeout(None))
+
+
+def get_recipes_version():
+    """
+    Версия состава рецептов: меняется при массовой загрузке,
+    после которой индексы рецептов перестраиваются целиком
+    """
+    return get_version(RECIPES_VERSION_KEY)
+
+
+def bump_recipes_version():
+    bump_version(RECIPES_VERSION_KEY)
+
+
+def record_recipes_changed(recipe_ids):
+    """
+    Журнал изменений рецептов: счетчик записей и список рецептов
+    в каждой записи. По нему индексы в памяти процессов обновляют
+    только измененные рецепты
+    """
+    cache.add(RECIPES_CHANGES_KEY, 0, None)
+    number = cache.incr(RECIPES_CHANGES_KEY)
+    cache.set(
+        RECIPES_CHANGE_KEY.format(number=number), list(recipe_ids),
+        settings.RECIPES_CHANGES_TIMEOUT,
+    )
+
+
+def get_recipes_changes(since):
+    """
+    Номер последней записи журнала, номер записи, до которой журнал
+    прочитан без пропусков, и рецепты из записей после since до нее.
+    Запись появляется чуть позже счетчика, поэтому пропуск - обычно
+    еще не записанная запись, и чтение останавливается перед ним.
+    Вместо рецептов возвращает None, если записей слишком много
+    """
+    last = cache.get(RECIPES_CHANGES_KEY, 0)
+    if last == since:
+        return last, since, set()
+    if not 0 < last - since <= settings.RECIPES_CHANGES_LIMIT:
+        return last, since, None
+    numbers = range(since + 1, last + 1)
+    entries = cache.get_many(
+        [RECIPES_CHANGE_KEY.format(number=number) for number in numbers]
+    )
+    applied, changed = since, set()
+    for number in numbers:
+        recipe_ids = entries.get(RECIPES_CHANGE_KEY.format(number=number))
+        if recipe_ids is None:
+            break
+        applied = number
+        changed.update(recipe_ids)
+    return last, applied, changed
+
+
+def get_catalog_data(key, version, default):
+    key = f'catalog:{version}:{key}'
+    data = cache.get(key)
+    if data is None:
+        data = default()
+        cache.set(key, data, local_timeout(settings.CATALOG_CACHE_TIMEOUT))
+    return data
@@ -1,5 +1,256 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+import json
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+
+def estimate_count(queryset):
+    """
+    Оценка числа строк из плана запроса PostgreSQL без его выполнения
+    """
+    if not isinstance(queryset, QuerySet):
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']['Plan Rows']
+
+
+class CountCachingPaginator(Paginator):
+    """
+    Берет общее количество из кеша, а при промахе считает строки
+    с ограничением по порогу. Оценка планировщика нужна только
+    для больших выборок без фильтров: для фильтров через EXISTS
+    она ненадежна, и там считается точный COUNT(*)
+    """
+
+    def __init__(self, object_list, per_page, count_cache_key=None,
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_cache_key = count_cache_key
+        self.count_is_exact = True
+
+    @cached_property
+    def count(self):
+        cached = None
+        if self.count_cache_key is not None:
+            cached = cache.get(self.count_cache_key)
+        if cached is None:
+            cached = self.compute_count()
+            if self.count_cache_key is not None:
+                cache.set(
+                    self.count_cache_key,
+                    cached,
+                    settings.PAGINATION_COUNT_CACHE_TIMEOUT,
+                )
+        count, self.count_is_exact = cached
+        return count
+
+    def compute_count(self):
+        if not isinstance(self.object_list, QuerySet):
+            return super().count, True
+        threshold = settings.PAGINATION_ESTIMATE_THRESHOLD
+        count = self.object_list.order_by().values('pk')[
+            :threshold + 1
+        ].count()
+        if count <= threshold:
+            return count, True
+        if not self.object_list.query.where:
+            estimate = estimate_count(self.object_list)
+            if estimate is not None:
+                return max(estimate, count), False
+        return super().count, True
 
 
 class CustomPageNumberPaginator(PageNumberPagination):
     page_size_query_param = 'limit'
+
+
+class CountCachingPageNumberPaginator(CustomPageNumberPaginator):
+    """
+    Пагинация по номерам страниц с дешевым подсчетом общего количества.
+    Ключ кеша строится из пути и отсортированных параметров фильтрации,
+    для зависящих от пользователя выборок - еще и из id пользователя
+    """
+
+    ignored_query_params = ['page', 'limit', 'cursor']
+    user_query_params = []
+    count_per_user = False
+
+    def django_paginator_class(self, object_list, per_page):
+        return CountCachingPaginator(
+            object_list, per_page, count_cache_key=self.count_cache_key
+        )
+
+    def get_count_cache_key(self, request):
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            if key not in self.ignored_query_params
+            for value in values
+        )
+        user_id = None
+        if self.count_per_user or any(
+            key in self.user_query_params for key, _ in params
+        ):
+            user_id = request.user.id
+        key = f'{request.path}?{urlencode(params)}:{user_id}'
+        return 'count:' + hashlib.md5(key.encode()).hexdigest()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_cache_key = self.get_count_cache_key(request)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.page.paginator.count),
+            ('count_is_exact', self.page.paginator.count_is_exact),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class RecipeCursorPaginator(CursorPagination):
+    """
+    Пагинация по ключу (pub_date, id): каждая страница читается
+    по индексу с того места, где закончилась предыдущая,
+    без COUNT(*) и OFFSET. Позиция в курсоре - пара значений,
+    поэтому рецепты с одинаковой датой не листаются через OFFSET
+    """
+
+    ordering = ['-pub_date', '-id']
+    page_size_query_param = 'limit'
+    offset_cutoff = 0
+
+    def decode_cursor(self, request):
+        if not request.query_params.get(self.cursor_query_param):
+            return None
+        cursor = super().decode_cursor(request)
+        if cursor.position is not None:
+            pub_date, _, pk = cursor.position.rpartition(',')
+            try:
+                position = (parse_datetime(pub_date), int(pk))
+            except ValueError:
+                position = (None, None)
+            if None in position:
+                raise NotFound(self.invalid_cursor_message)
+            cursor = cursor._replace(position=position)
+        return cursor
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        current_position = None
+        if self.cursor is not None and self.cursor.position is not None:
+            current_position = self.encode_position(*self.cursor.position)
+        if reverse:
+            queryset = queryset.order_by('pub_date', 'id')
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if current_position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(reverse))
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = None
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None
+            self.has_previous = following_position is not None
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None
+            self.next_position = following_position
+            self.previous_position = current_position
+        if self.has_previous or self.has_next:
+            self.display_page_controls = True
+        return self.page
+
+    def get_keyset_filter(self, reverse):
+        """
+        Строки строго после позиции курсора в порядке выдачи:
+        (pub_date, id) меньше позиции, а для курсора назад - больше
+        """
+        pub_date, pk = self.cursor.position
+        lookup = 'gt' if reverse else 'lt'
+        return Q(**{f'pub_date__{lookup}': pub_date}) | Q(
+            pub_date=pub_date, **{f'id__{lookup}': pk}
+        )
+
+    def encode_position(self, pub_date, pk):
+        return f'{pub_date.isoformat()},{pk}'
+
+    def _get_position_from_instance(self, instance, ordering):
+        return self.encode_position(instance.pub_date, instance.id)
+
+
+class RecipePaginator(CountCachingPageNumberPaginator):
+    """
+    Постраничная пагинация по номерам, а при наличии параметра
+    cursor (в том числе пустого для первой страницы) - по ключу.
+    Курсор задает свою сортировку, поэтому с поиском, который
+    сортирует по релевантности, он не сочетается
+    """
+
+    cursor_paginator_class = RecipeCursorPaginator
+    cursor_conflicting_params = ['search']
+    user_query_params = ['is_favorited', 'is_in_shopping_cart']
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        cursor_param = RecipeCursorPaginator.cursor_query_param
+        if cursor_param in request.query_params:
+            conflicting = [
+                param for param in self.cursor_conflicting_params
+                if param in request.query_params
+            ]
+            if conflicting:
+                raise ValidationError({cursor_param: [
+                    f'Параметр нельзя использовать вместе с {param}'
+                    for param in conflicting
+                ]})
+            self.cursor_paginator = self.cursor_paginator_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class SubscriptionsPaginator(CountCachingPageNumberPaginator):
+    count_per_user = True
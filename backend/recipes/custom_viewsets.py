@@ -1,4 +1,11 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from rest_framework import mixins, viewsets
+from rest_framework.response import Response
+
+from .cache import get_catalog_data, get_catalog_version
 
 
 class BaseModelViewSet(viewsets.GenericViewSet,
@@ -12,3 +19,32 @@ class RecipeModelViewSet(BaseModelViewSet,
                          mixins.CreateModelMixin,
                          mixins.RetrieveModelMixin):
     pass
+
+
+class CachedCatalogMixin:
+    """
+    Кеширует список справочника до смены версии справочников,
+    отдает ETag и Last-Modified и отвечает 304 на условные запросы
+    """
+
+    def list(self, request, *args, **kwargs):
+        version = get_catalog_version()
+        key = hashlib.md5(
+            f'{self.basename}:{request.get_full_path()}'.encode()
+        ).hexdigest()
+        etag = f'"{key}-{version}"'
+        last_modified = int(version)
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+        response = Response(get_catalog_data(
+            key, version,
+            lambda: super(CachedCatalogMixin, self).list(
+                request, *args, **kwargs
+            ).data,
+        ))
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
@@ -1,6 +1,28 @@
 import django_filters as filters
+from django.conf import settings
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            TrigramSimilarity)
+from django.db.models import Exists, F, OuterRef, Q
 
-from .models import Favorite, Ingredient, Purchase, Recipe
+from .cache import get_catalog_data, get_catalog_version
+from .models import Favorite, Ingredient, Purchase, Recipe, Tag
+
+
+def get_tag_ids():
+    """
+    Соответствие slug -> id тегов из кеша справочников
+    """
+    return get_catalog_data(
+        'tag_ids',
+        get_catalog_version(),
+        lambda: dict(
+            Tag.objects.exclude(slug=None).values_list('slug', 'id')
+        ),
+    )
+
+
+def tag_choices():
+    return [(slug, slug) for slug in get_tag_ids()]
 
 
 class IngredientFilter(filters.FilterSet):
@@ -20,8 +42,9 @@ class IngredientFilter(filters.FilterSet):
 
 class RecipeFilter(filters.FilterSet):
 
-    tags = filters.AllValuesMultipleFilter(
-        field_name='tags__slug'
+    tags = filters.MultipleChoiceFilter(
+        choices=tag_choices,
+        method='get_tags',
     )
     is_favorited = filters.BooleanFilter(
         method='get_favorite'
@@ -29,26 +52,48 @@ class RecipeFilter(filters.FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='get_in_shopping_cart'
     )
+    search = filters.CharFilter(
+        method='get_search'
+    )
 
     def get_favorite(self, queryset, name, value):
-        user_favorite = Favorite.objects.filter(
-            user=self.request.user.id
-        )
-        is_favorited = self.request.query_params.get('is_favorited')
-        if is_favorited == 'true':
-            return queryset.filter(favorite__in=user_favorite)
-        return queryset.exclude(favorite__in=user_favorite)
+        return self.filter_user_relation(queryset, Favorite, value)
 
     def get_in_shopping_cart(self, queryset, name, value):
-        shopping_cart = Purchase.objects.filter(
-            user=self.request.user.id
+        return self.filter_user_relation(queryset, Purchase, value)
+
+    def filter_user_relation(self, queryset, model, value):
+        """
+        Коррелированный EXISTS по уникальной паре (user_id, recipe_id).
+        У анонимного пользователя нет ни избранного, ни корзины
+        """
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset.none() if value else queryset
+        exists = Exists(
+            model.objects.filter(user=user, recipe=OuterRef('pk'))
         )
-        is_in_shopping_cart = self.request.query_params.get(
-            'is_in_shopping_cart'
+        return queryset.filter(exists if value else ~exists)
+
+    def get_tags(self, queryset, name, value):
+        tag_ids = get_tag_ids()
+        return queryset.filter(
+            Exists(
+                Recipe.tags.through.objects.filter(
+                    recipe=OuterRef('pk'),
+                    tag_id__in=[tag_ids[slug] for slug in value],
+                )
+            )
         )
-        if is_in_shopping_cart == 'true':
-            return queryset.filter(recipes_in_cart__in=shopping_cart)
-        return queryset.exclude(recipes_in_cart__in=shopping_cart)
+
+    def get_search(self, queryset, name, value):
+        query = SearchQuery(value, config=settings.SEARCH_CONFIG)
+        return queryset.filter(
+            Q(search_vector=query) | Q(name__trigram_similar=value)
+        ).annotate(
+            rank=SearchRank(F('search_vector'), query),
+            name_similarity=TrigramSimilarity('name', value),
+        ).order_by('-rank', '-name_similarity', '-id')
 
     class Meta:
         model = Recipe
@@ -57,4 +102,5 @@ class RecipeFilter(filters.FilterSet):
             'is_in_shopping_cart',
             'author',
             'tags',
+            'search',
         ]
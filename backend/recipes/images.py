@@ -0,0 +1,97 @@
+import hashlib
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+IMAGE_DIR = 'recipes'
+IMAGE_VARIANTS = {
+    'thumbnail': (320, 320),
+    'card': (640, 640),
+    'full': (1600, 1600),
+}
+IMAGE_FORMATS = {
+    'jpeg': ('JPEG', 'jpg'),
+    'webp': ('WEBP', 'webp'),
+}
+IMAGE_QUALITY = 85
+
+
+def get_variant_name(image_hash, variant, image_format):
+    extension = IMAGE_FORMATS[image_format][1]
+    return f'{IMAGE_DIR}/{image_hash}/{variant}.{extension}'
+
+
+def hash_file(file):
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def save_variants(file, image_hash):
+    with Image.open(file) as image:
+        image.draft('RGB', max(IMAGE_VARIANTS.values()))
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        for variant, size in IMAGE_VARIANTS.items():
+            resized = image.copy()
+            resized.thumbnail(size, Image.LANCZOS)
+            for image_format, (pil_format, _) in IMAGE_FORMATS.items():
+                name = get_variant_name(image_hash, variant, image_format)
+                if default_storage.exists(name):
+                    continue
+                buffer = BytesIO()
+                resized.save(buffer, pil_format, quality=IMAGE_QUALITY)
+                default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def store_image(file):
+    """
+    Сохраняет оригинал под именем из хеша содержимого и создает
+    уменьшенные копии в JPEG и WebP. Повторная загрузка той же
+    картинки ничего не пишет. Возвращает имя оригинала и хеш
+    """
+    image_hash = hash_file(file)
+    extension = os.path.splitext(file.name)[1].lower() or '.jpg'
+    name = f'{IMAGE_DIR}/{image_hash}{extension}'
+    if not default_storage.exists(name):
+        name = default_storage.save(name, file)
+        file.seek(0)
+    if not default_storage.exists(
+        get_variant_name(image_hash, 'full', 'webp')
+    ):
+        save_variants(file, image_hash)
+    return name, image_hash
+
+
+def build_url(name, request=None):
+    url = default_storage.url(name)
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def get_variant_url(recipe, variant, request=None):
+    if not recipe.image_hash:
+        return build_url(recipe.image.name, request) if recipe.image else None
+    return build_url(
+        get_variant_name(recipe.image_hash, variant, 'jpeg'), request
+    )
+
+
+def get_variant_urls(recipe, request=None):
+    if not recipe.image_hash:
+        return {}
+    return {
+        variant: {
+            image_format: build_url(
+                get_variant_name(recipe.image_hash, variant, image_format),
+                request,
+            )
+            for image_format in IMAGE_FORMATS
+        }
+        for variant in IMAGE_VARIANTS
+    }
@@ -0,0 +1,113 @@
+import threading
+import time
+from bisect import bisect_left
+from itertools import islice
+
+from django.conf import settings
+
+from .cache import get_catalog_version
+from .models import Ingredient
+
+_lock = threading.Lock()
+_index = None
+_built_at = 0.0
+_version = None
+
+
+def normalize(value):
+    return value.strip().casefold().replace('ё', 'е')
+
+
+def trigrams(value):
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+class IngredientIndex:
+    """
+    Индекс ингредиентов в памяти процесса для автодополнения:
+    отсортированный массив нормализованных названий для поиска
+    по префиксу и словарь триграмм для поиска по подстроке
+    """
+
+    def __init__(self, ingredients):
+        rows = sorted(
+            (normalize(name), pk, name, measurement_unit)
+            for pk, name, measurement_unit in ingredients
+        )
+        self.keys = [key for key, *_ in rows]
+        self.rows = [
+            {'id': pk, 'name': name, 'measurement_unit': measurement_unit}
+            for _, pk, name, measurement_unit in rows
+        ]
+        self.trigrams = {}
+        for position, key in enumerate(self.keys):
+            for trigram in trigrams(key):
+                self.trigrams.setdefault(trigram, []).append(position)
+
+    def prefix_positions(self, query):
+        start = bisect_left(self.keys, query)
+        end = bisect_left(self.keys, query + '\uffff', start)
+        return range(start, end)
+
+    def substring_positions(self, query, exclude):
+        if len(query) < 3:
+            candidates = range(len(self.keys))
+        else:
+            postings = sorted(
+                (self.trigrams.get(gram, []) for gram in trigrams(query)),
+                key=len,
+            )
+            candidates = set(postings[0]).intersection(*postings[1:])
+            candidates = sorted(candidates)
+        for position in candidates:
+            if position not in exclude and query in self.keys[position]:
+                yield position
+
+    def search(self, query, limit, measurement_unit=None):
+        """
+        Сначала возвращает совпадения по началу названия,
+        затем по подстроке, каждую группу в алфавитном порядке
+        """
+        query = normalize(query)
+        prefix = self.prefix_positions(query)
+        positions = (
+            position for group in (
+                prefix, self.substring_positions(query, prefix)
+            ) for position in group
+        )
+        rows = (self.rows[position] for position in positions)
+        if measurement_unit is not None:
+            rows = (
+                row for row in rows
+                if row['measurement_unit'] == measurement_unit
+            )
+        return list(islice(rows, limit))
+
+
+def get_index():
+    """
+    Индекс перестраивается при смене версии справочников,
+    а для кеша в памяти процесса, где чужие изменения не видны,
+    еще и по истечении INGREDIENT_INDEX_TTL
+    """
+    global _index, _built_at, _version
+    version = get_catalog_version()
+    with _lock:
+        expired = (
+            time.monotonic() - _built_at > settings.INGREDIENT_INDEX_TTL
+        )
+        if _index is None or expired or _version != version:
+            _index = IngredientIndex(
+                Ingredient.objects.values_list(
+                    'id', 'name', 'measurement_unit'
+                )
+            )
+            _built_at = time.monotonic()
+            _version = version
+        return _index
+
+
+def search(query, limit=None, measurement_unit=None):
+    if limit is None:
+        limit = settings.INGREDIENT_SEARCH_LIMIT
+    return get_index().search(query, limit, measurement_unit)
@@ -0,0 +1,181 @@
+import json
+import random
+import re
+import statistics
+import time
+
+import requests
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Ingredient, Recipe, Tag
+
+User = get_user_model()
+
+SERVER_TIMING_QUERIES = re.compile(r'db;desc="(\d+) queries"')
+
+
+def percentile(quantiles, number):
+    return round(quantiles[number - 1] * 1000, 2)
+
+
+class LocalClient:
+    """
+    Запросы через тестовый клиент Django в этом же процессе,
+    количество SQL-запросов считается напрямую
+    """
+
+    def __init__(self, token):
+        self.client = Client(HTTP_AUTHORIZATION=f'Token {token}')
+
+    def get(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+            for _ in getattr(response, 'streaming_content', ()):
+                pass
+        return response.status_code, len(queries)
+
+
+class HttpClient:
+    """
+    Запросы к запущенному серверу. Количество SQL-запросов берется
+    из заголовка Server-Timing, если на сервере включены метрики
+    """
+
+    def __init__(self, token, base_url):
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f'Token {token}'
+        self.base_url = base_url.rstrip('/')
+
+    def get(self, path):
+        response = self.session.get(self.base_url + path)
+        match = SERVER_TIMING_QUERIES.search(
+            response.headers.get('Server-Timing', '')
+        )
+        return response.status_code, int(match[1]) if match else None
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержки основных эндпоинтов и выводит JSON '
+        'с p50/p95/p99, пропускной способностью и числом SQL-запросов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Количество запросов на сценарий')
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--url',
+                            help='Адрес запущенного сервера, например '
+                                 'http://127.0.0.1:8000. По умолчанию '
+                                 'запросы идут через тестовый клиент')
+        parser.add_argument('--user', help='Почта пользователя')
+        parser.add_argument('--output', help='Файл для JSON-отчета')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['requests'] < 2:
+            raise CommandError(
+                'Для расчета перцентилей нужно не меньше двух запросов '
+                'на сценарий (--requests)'
+            )
+        self.random = random.Random(options['seed'])
+        user = self.get_user(options['user'])
+        token, _ = Token.objects.get_or_create(user=user)
+        if options['url']:
+            client = HttpClient(token.key, options['url'])
+        else:
+            client = LocalClient(token.key)
+        report = {
+            'dataset': {
+                'users': User.objects.count(),
+                'recipes': Recipe.objects.count(),
+                'ingredients': Ingredient.objects.count(),
+            },
+            'scenarios': {},
+        }
+        for name, paths in self.scenarios().items():
+            report['scenarios'][name] = self.run(
+                client, paths, options['requests'], options['warmup']
+            )
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output)
+        self.stdout.write(output)
+
+    def get_user(self, email):
+        if email:
+            user = User.objects.filter(email=email).first()
+        else:
+            user = User.objects.annotate(
+                follows=Count('follower')
+            ).order_by('-follows', 'id').first()
+        if user is None:
+            raise CommandError(
+                'Пользователь не найден, заполните базу командой seed_perf'
+            )
+        return user
+
+    def scenarios(self):
+        """
+        Для каждого сценария - функция, возвращающая путь запроса
+        """
+        recipe_ids = list(Recipe.objects.values_list('id', flat=True)[:1000])
+        tags = list(Tag.objects.values_list('slug', flat=True))
+        prefixes = [
+            name[:3] for name in
+            Ingredient.objects.values_list('name', flat=True)[:500]
+        ]
+        if not recipe_ids or not prefixes:
+            raise CommandError('Нет рецептов или ингредиентов')
+        choice = self.random.choice
+        return {
+            'recipes_list': lambda: (
+                f'/api/recipes/?page={self.random.randint(1, 20)}'
+            ),
+            'recipes_list_filtered': lambda: (
+                f'/api/recipes/?tags={choice(tags)}&is_favorited=false'
+            ),
+            'recipes_cursor': lambda: '/api/recipes/?cursor=',
+            'recipe_detail': lambda: f'/api/recipes/{choice(recipe_ids)}/',
+            'subscriptions': lambda: (
+                '/api/users/subscriptions/?recipes_limit=3'
+            ),
+            'shopping_list': lambda: '/api/recipes/download_shopping_cart/',
+            'ingredient_search': lambda: (
+                f'/api/ingredients/?name={choice(prefixes)}'
+            ),
+        }
+
+    def run(self, client, path, count, warmup):
+        for _ in range(warmup):
+            client.get(path())
+        durations, queries, statuses = [], [], {}
+        started = time.perf_counter()
+        for _ in range(count):
+            request_started = time.perf_counter()
+            status, query_count = client.get(path())
+            durations.append(time.perf_counter() - request_started)
+            statuses[status] = statuses.get(status, 0) + 1
+            if query_count is not None:
+                queries.append(query_count)
+        elapsed = time.perf_counter() - started
+        quantiles = statistics.quantiles(durations, n=100)
+        return {
+            'requests': count,
+            'p50_ms': percentile(quantiles, 50),
+            'p95_ms': percentile(quantiles, 95),
+            'p99_ms': percentile(quantiles, 99),
+            'mean_ms': round(statistics.mean(durations) * 1000, 2),
+            'throughput_rps': round(count / elapsed, 1),
+            'queries_per_request': (
+                round(statistics.mean(queries), 2) if queries else None
+            ),
+            'statuses': statuses,
+        }
@@ -0,0 +1,90 @@
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from scipy import sparse
+
+from recipes.similarity import SimilarityMatrix, build
+
+
+def synthetic_matrix(recipes, ingredients=2000, tags=3, seed=0):
+    """
+    Случайные рецепты с 3-15 ингредиентами, популярность которых
+    распределена по Ципфу, и одним тегом
+    """
+    random = np.random.default_rng(seed)
+    counts = random.integers(3, 16, size=recipes)
+    popularity = 1 / np.arange(1, ingredients + 1)
+    popularity /= popularity.sum()
+    rows = np.concatenate([
+        np.repeat(np.arange(recipes), counts), np.arange(recipes),
+    ])
+    columns = np.concatenate([
+        random.choice(ingredients, size=counts.sum(), p=popularity),
+        ingredients + random.integers(0, tags, size=recipes),
+    ])
+    features = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+        shape=(recipes, ingredients + tags),
+    )
+    features.data[:] = 1
+    return SimilarityMatrix(np.arange(1, recipes + 1), features)
+
+
+class Command(BaseCommand):
+    help = (
+        'Считает похожие рецепты по общим ингредиентам и тегам. '
+        'По умолчанию пересчитывает только рецепты, измененные '
+        'после прошлого запуска, и рецепты, чьи списки от них зависят'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать все рецепты, в том числе убрать из списков '
+                 'удаленные рецепты',
+        )
+        parser.add_argument(
+            '--count', type=int, default=settings.SIMILAR_RECIPES_COUNT,
+            help='Количество похожих рецептов',
+        )
+        parser.add_argument(
+            '--block-size', type=int, default=settings.SIMILARITY_BLOCK_SIZE,
+            help='Количество строк матрицы, обрабатываемых за раз',
+        )
+        parser.add_argument(
+            '--benchmark', type=int, metavar='RECIPES',
+            help='Замерить расчет на синтетических данных без записи в базу',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['benchmark']:
+            total = self.benchmark(
+                options['benchmark'], options['count'], options['block_size']
+            )
+        else:
+            total = build(
+                full=options['full'],
+                count=options['count'],
+                block_size=options['block_size'],
+            )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Рассчитано рецептов: {total} за {elapsed:.1f} с '
+            f'({total / elapsed if elapsed else total:.0f} рецептов/с)'
+        ))
+
+    def benchmark(self, recipes, count, block_size):
+        matrix = synthetic_matrix(recipes)
+        rows = np.arange(recipes)
+        block_bytes = min(block_size, recipes) * recipes * 4
+        self.stdout.write(
+            f'Матрица {recipes} x {matrix.features.shape[1]}, '
+            f'{matrix.features.nnz} признаков, '
+            f'блок сходства {block_bytes / 2 ** 20:.0f} МБ'
+        )
+        for block, scores in matrix.blocks(rows, block_size):
+            SimilarityMatrix.top(scores, count)
+        return recipes
@@ -0,0 +1,127 @@
+import csv
+import json
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.cache import bump_catalog_version
+from recipes.models import Ingredient, Tag
+
+INGREDIENT_FIELDS = ['name', 'measurement_unit']
+TAG_FIELDS = ['name', 'color', 'slug']
+
+
+def read_rows(path, fields):
+    """
+    Построчно читает .csv (с заголовком или без) либо .json
+    со списком объектов и отдает словари с нужными полями
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.json':
+        with open(path, encoding='utf-8') as file:
+            rows = json.load(file)
+        for row in rows:
+            yield {field: row.get(field) for field in fields}
+    elif extension == '.csv':
+        with open(path, encoding='utf-8', newline='') as file:
+            reader = csv.reader(file)
+            first = next(reader, None)
+            if first is not None and first != fields:
+                yield dict(zip(fields, first))
+            for row in reader:
+                yield dict(zip(fields, row))
+    else:
+        raise CommandError(f'Неподдерживаемый формат файла: {path}')
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает справочники ингредиентов и тегов из .json или .csv. '
+        'Повторная загрузка не создает дубликатов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ingredients', help='Файл с ингредиентами',
+        )
+        parser.add_argument(
+            '--tags', help='Файл с тегами',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество строк в одном INSERT',
+        )
+
+    def handle(self, *args, **options):
+        if not options['ingredients'] and not options['tags']:
+            raise CommandError('Укажите --ingredients и/или --tags')
+        if options['ingredients']:
+            self.report(
+                'Ингредиенты',
+                self.load_ingredients,
+                options['ingredients'],
+                options['batch_size'],
+            )
+        if options['tags']:
+            self.report(
+                'Теги',
+                self.load_tags,
+                options['tags'],
+                options['batch_size'],
+            )
+        bump_catalog_version()
+
+    def report(self, title, loader, path, batch_size):
+        started = time.perf_counter()
+        total = loader(path, batch_size)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{title}: обработано {total} строк за {elapsed:.3f} с '
+            f'({total / elapsed if elapsed else total:.0f} строк/с)'
+        ))
+
+    @transaction.atomic
+    def load_ingredients(self, path, batch_size):
+        total = 0
+        for batch in batches(read_rows(path, INGREDIENT_FIELDS), batch_size):
+            Ingredient.objects.bulk_create(
+                (Ingredient(**row) for row in batch),
+                ignore_conflicts=True,
+            )
+            total += len(batch)
+        return total
+
+    @transaction.atomic
+    def load_tags(self, path, batch_size):
+        total = 0
+        for batch in batches(read_rows(path, TAG_FIELDS), batch_size):
+            existing = Tag.objects.in_bulk(
+                [row['slug'] for row in batch], field_name='slug'
+            )
+            changed = []
+            for row in batch:
+                tag = existing.get(row['slug'])
+                if tag is None:
+                    continue
+                if (tag.name, tag.color) != (row['name'], row['color']):
+                    tag.name, tag.color = row['name'], row['color']
+                    changed.append(tag)
+            Tag.objects.bulk_update(changed, ['name', 'color'])
+            Tag.objects.bulk_create(
+                (Tag(**row) for row in batch if row['slug'] not in existing),
+                ignore_conflicts=True,
+            )
+            total += len(batch)
+        return total
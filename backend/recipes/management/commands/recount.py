@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from users.counters import COUNTERS, recount
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает денормализованные счетчики избранного, '
+        'рецептов и подписчиков по фактическим данным'
+    )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        for model, field, related_model, related_field in COUNTERS:
+            fixed = recount(model, field, related_model, related_field)
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.label}.{field}: исправлено строк {fixed}'
+            ))
@@ -0,0 +1,228 @@
+import os
+import random
+import time
+from itertools import accumulate
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.cache import bump_catalog_version, bump_recipes_version
+from recipes.models import (Favorite, FeedEntry, Ingredient, Purchase, Recipe,
+                            RecipeIngredient, Tag)
+from users.models import Follow
+from .load_catalog import INGREDIENT_FIELDS, batches, read_rows
+
+User = get_user_model()
+
+DEFAULT_INGREDIENTS = os.path.join(
+    settings.BASE_DIR, os.pardir, 'data', 'ingredients.json'
+)
+DEFAULT_TAGS = [
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+]
+PASSWORD = 'perf-password'
+
+
+def zipf_weights(size, exponent):
+    """
+    Накопленные веса для random.choices(cum_weights=...),
+    чтобы не пересчитывать их при каждом выборе
+    """
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, size + 1)
+    ))
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими данными для нагрузочных тестов: '
+        'пользователи, рецепты с числом ингредиентов по закону Ципфа, '
+        'избранное, корзины и подписки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--favorites', type=int, default=20,
+                            help='Среднее число избранных на пользователя')
+        parser.add_argument('--cart', type=int, default=5,
+                            help='Среднее число рецептов в корзине')
+        parser.add_argument('--follows', type=int, default=10,
+                            help='Среднее число подписок на пользователя')
+        parser.add_argument('--ingredients', default=DEFAULT_INGREDIENTS,
+                            help='Справочник ингредиентов')
+        parser.add_argument('--prefix', default='perf',
+                            help='Префикс имен и почт пользователей')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.prefix = prefix = options['prefix']
+        if User.objects.filter(username__startswith=f'{prefix}-').exists():
+            raise CommandError(
+                f'Пользователи с префиксом {prefix} уже есть, '
+                'укажите другой --prefix'
+            )
+        with transaction.atomic():
+            ingredients = self.step('Ингредиенты', self.seed_catalog,
+                                    options['ingredients'])
+            users = self.step('Пользователи', self.seed_users,
+                              options['users'], prefix)
+            recipes = self.step('Рецепты', self.seed_recipes,
+                                options['recipes'], users, ingredients)
+            self.step('Избранное', self.seed_relations, Favorite,
+                      users, recipes, options['favorites'])
+            self.step('Корзины', self.seed_relations, Purchase,
+                      users, recipes, options['cart'])
+            follows = self.step('Подписки', self.seed_follows,
+                                users, options['follows'])
+            self.step('Ленты', self.seed_feed, follows)
+            self.step('Поисковый индекс', Recipe.objects.filter(
+                author__username__startswith=f'{prefix}-'
+            ).update_search_vector)
+            call_command('recount', stdout=self.stdout)
+        bump_catalog_version()
+        bump_recipes_version()
+
+    def step(self, title, function, *args):
+        started = time.perf_counter()
+        result = function(*args)
+        self.stdout.write(
+            f'{title}: {time.perf_counter() - started:.1f} с'
+        )
+        return result
+
+    def bulk_create(self, model, objects):
+        for batch in batches(objects, self.batch_size):
+            model.objects.bulk_create(batch, ignore_conflicts=True)
+
+    def seed_catalog(self, path):
+        if not os.path.exists(path):
+            raise CommandError(f'Файл не найден: {path}')
+        self.bulk_create(
+            Ingredient,
+            (Ingredient(**row) for row in read_rows(path, INGREDIENT_FIELDS)),
+        )
+        if not Tag.objects.exists():
+            Tag.objects.bulk_create(
+                Tag(name=name, color=color, slug=slug)
+                for name, color, slug in DEFAULT_TAGS
+            )
+        return list(Ingredient.objects.values_list('id', flat=True))
+
+    def seed_users(self, count, prefix):
+        password = make_password(PASSWORD)
+        self.bulk_create(User, (
+            User(
+                email=f'{prefix}-{number}@example.com',
+                username=f'{prefix}-{number}',
+                first_name='Perf',
+                last_name=str(number),
+                password=password,
+            )
+            for number in range(count)
+        ))
+        return list(User.objects.filter(
+            username__startswith=f'{prefix}-'
+        ).values_list('id', flat=True))
+
+    def seed_recipes(self, count, users, ingredients):
+        """
+        Авторы и ингредиенты выбираются по закону Ципфа: немного
+        популярных авторов и ингредиентов встречаются очень часто
+        """
+        author_weights = zipf_weights(len(users), 1.0)
+        authors = self.random.choices(
+            users, cum_weights=author_weights, k=count
+        )
+        self.bulk_create(Recipe, (
+            Recipe(
+                author_id=author,
+                name=f'Рецепт {number}',
+                text='Синтетический рецепт для нагрузочного теста',
+                cooking_time=self.random.randint(5, 180),
+                image='recipes/perf.png',
+            )
+            for number, author in enumerate(authors)
+        ))
+        recipes = list(Recipe.objects.filter(
+            author__username__startswith=f'{self.prefix}-'
+        ).values_list('id', flat=True))
+        ingredient_weights = zipf_weights(len(ingredients), 1.0)
+        size_weights = zipf_weights(20, 1.2)
+        self.bulk_create(RecipeIngredient, (
+            RecipeIngredient(
+                recipe_id=recipe,
+                ingredient_id=ingredient,
+                amount=self.random.randint(1, 500),
+            )
+            for recipe in recipes
+            for ingredient in set(self.random.choices(
+                ingredients,
+                cum_weights=ingredient_weights,
+                k=self.random.choices(
+                    range(3, 23), cum_weights=size_weights
+                )[0],
+            ))
+        ))
+        tags = list(Tag.objects.values_list('id', flat=True))
+        self.bulk_create(Recipe.tags.through, (
+            Recipe.tags.through(recipe_id=recipe, tag_id=tag)
+            for recipe in recipes
+            for tag in self.random.sample(
+                tags, self.random.randint(1, len(tags))
+            )
+        ))
+        return recipes
+
+    def seed_relations(self, model, users, recipes, average):
+        weights = zipf_weights(len(recipes), 0.8)
+        self.bulk_create(model, (
+            model(user_id=user, recipe_id=recipe)
+            for user in users
+            for recipe in set(self.random.choices(
+                recipes,
+                cum_weights=weights,
+                k=self.random.randint(0, 2 * average),
+            ))
+        ))
+
+    def seed_follows(self, users, average):
+        weights = zipf_weights(len(users), 1.0)
+        follows = [
+            (user, author)
+            for user in users
+            for author in set(self.random.choices(
+                users,
+                cum_weights=weights,
+                k=self.random.randint(0, 2 * average),
+            ))
+            if author != user
+        ]
+        self.bulk_create(Follow, (
+            Follow(user_id=user, following_id=author)
+            for user, author in follows
+        ))
+        return follows
+
+    def seed_feed(self, follows):
+        by_author = {}
+        for recipe, author in Recipe.objects.filter(
+            author__username__startswith=f'{self.prefix}-'
+        ).order_by('-id').values_list('id', 'author_id').iterator():
+            by_author.setdefault(author, []).append(recipe)
+        self.bulk_create(FeedEntry, (
+            FeedEntry(user_id=user, recipe_id=recipe)
+            for user, author in follows
+            for recipe in by_author.get(
+                author, []
+            )[:settings.FEED_BACKFILL_SIZE]
+        ))
@@ -0,0 +1,55 @@
+# Generated by Django 3.0.5 on 2026-10-18 20:12
+
+from django.conf import settings
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_search_vector(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Recipe.objects.update(
+        search_vector=(
+            SearchVector('name', weight='A', config=settings.SEARCH_CONFIG)
+            + SearchVector('text', weight='B', config=settings.SEARCH_CONFIG)
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0002_auto_20211007_1323'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.AlterField(
+            model_name='purchase',
+            name='recipe',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipes_in_cart', to='recipes.Recipe', verbose_name='Рецепт'),
+        ),
+        migrations.AlterField(
+            model_name='purchase',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shoping_list', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='recipe_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='recipe_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunPython(fill_search_vector, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 3.0.5 on 2026-10-18 20:15
+
+from django.db import migrations
+from django.db.models import Count, Min, Sum
+
+MAX_AMOUNT = 32767
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(
+        kept_id=Min('id'), total=Count('id')
+    ).filter(total__gt=1)
+    for duplicate in duplicates:
+        extra = Ingredient.objects.filter(
+            name=duplicate['name'],
+            measurement_unit=duplicate['measurement_unit'],
+        ).exclude(id=duplicate['kept_id'])
+        RecipeIngredient.objects.filter(ingredient__in=extra).update(
+            ingredient_id=duplicate['kept_id']
+        )
+        merge_recipe_rows(RecipeIngredient, duplicate['kept_id'])
+        extra.delete()
+
+
+def merge_recipe_rows(RecipeIngredient, ingredient_id):
+    """
+    Рецепт мог использовать несколько дубликатов ингредиента. Такие
+    строки сливаются в одну с суммарным количеством, иначе ингредиент
+    выводился бы в рецепте дважды
+    """
+    rows = RecipeIngredient.objects.filter(ingredient_id=ingredient_id)
+    repeated = rows.values('recipe_id').annotate(
+        kept_id=Min('id'), total_amount=Sum('amount'), total=Count('id')
+    ).filter(total__gt=1)
+    for row in repeated:
+        RecipeIngredient.objects.filter(id=row['kept_id']).update(
+            amount=min(row['total_amount'], MAX_AMOUNT)
+        )
+        rows.filter(recipe_id=row['recipe_id']).exclude(
+            id=row['kept_id']
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_recipe_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.0.5 on 2026-10-18 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_pub_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='Хеш картинки'),
+        ),
+    ]
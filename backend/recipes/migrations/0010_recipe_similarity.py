@@ -0,0 +1,33 @@
+# Generated by Django 3.0.5 on 2026-10-18 20:26
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_feedentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeSimilarity',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='similarity', serialize=False, to='recipes.Recipe', verbose_name='Рецепт')),
+                ('neighbours', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), size=None, verbose_name='Похожие рецепты')),
+                ('scores', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), size=None, verbose_name='Сходство')),
+                ('built_at', models.DateTimeField(verbose_name='Дата расчета')),
+            ],
+            options={
+                'verbose_name': 'Похожие рецепты',
+                'verbose_name_plural': 'Похожие рецепты',
+            },
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+    ]
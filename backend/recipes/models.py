@@ -1,7 +1,14 @@
 from colorfield.fields import ColorField
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models import Exists, OuterRef, Prefetch
+
+from users.deletion import CountedDeleteMixin, CountedDeleteQuerySet
 
 User = get_user_model()
 
@@ -54,13 +61,78 @@ class Ingredient(models.Model):
     class Meta:
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    'name',
+                    'measurement_unit',
+                ],
+                name='unique_ingredient',
+            )
+        ]
+
+
+class RecipeQuerySet(CountedDeleteQuerySet):
+    """
+    Запросы рецептов со всеми данными, нужными для сериализации,
+    за фиксированное число обращений к базе
+    """
+
+    deleted_fields = ('id', 'author_id')
+    cascades = {
+        'recipes.Favorite': ['recipe'],
+        'recipes.Purchase': ['recipe'],
+    }
 
+    def with_related(self):
+        return self.prefetch_related(
+            'tags',
+            Prefetch(
+                'recipeingredient_set',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient'
+                ),
+            ),
+        )
+
+    def for_user(self, user):
+        queryset = self.with_related()
+        if user.is_anonymous:
+            return queryset.select_related('author')
+        return queryset.prefetch_related(
+            Prefetch(
+                'author',
+                queryset=User.objects.annotate_is_subscribed(user),
+            )
+        ).annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_in_shopping_cart=Exists(
+                Purchase.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+        )
 
-class Recipe(models.Model):
+    def update_search_vector(self):
+        return self.update(
+            search_vector=(
+                SearchVector(
+                    'name', weight='A', config=settings.SEARCH_CONFIG
+                )
+                + SearchVector(
+                    'text', weight='B', config=settings.SEARCH_CONFIG
+                )
+            )
+        )
+
+
+class Recipe(CountedDeleteMixin, models.Model):
     """
     Модель рецептов
     """
 
+    objects = RecipeQuerySet.as_manager()
+
     author = models.ForeignKey(
         User, on_delete=models.CASCADE,
         verbose_name='Автор рецепта',
@@ -74,6 +146,12 @@ class Recipe(models.Model):
         verbose_name='Картинка рецепта',
         help_text='Выберите изображение рецепта'
     )
+    image_hash = models.CharField(
+        verbose_name='Хеш картинки',
+        max_length=64,
+        blank=True,
+        editable=False,
+    )
     text = models.TextField(
         verbose_name='Описание рецепта',
         help_text='Введите описание рецепта',
@@ -93,21 +171,70 @@ class Recipe(models.Model):
         Tag,
         verbose_name='Теги',
     )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+        auto_now_add=True,
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
+    search_vector = SearchVectorField(
+        verbose_name='Поисковый вектор',
+        null=True,
+        editable=False,
+    )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='В избранном',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        ordering = ['-pub_date', '-id']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_pub_date_idx',
+            ),
+            models.Index(
+                fields=['author', '-id'],
+                name='recipe_author_id_idx',
+            ),
+            GinIndex(
+                fields=['search_vector'],
+                name='recipe_search_vector_idx',
+            ),
+            GinIndex(
+                fields=['name'],
+                name='recipe_name_trgm_idx',
+                opclasses=['gin_trgm_ops'],
+            ),
+        ]
+
+
+class UserRecipeQuerySet(CountedDeleteQuerySet):
+    """
+    Удаление связей пользователя с рецептами
+    """
+
+    deleted_fields = ('user_id', 'recipe_id')
 
 
-class Favorite(models.Model):
+class Favorite(CountedDeleteMixin, models.Model):
     """
     Модель избранного
     """
 
+    objects = UserRecipeQuerySet.as_manager()
+
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         verbose_name='Пользователь',
+        db_index=False,
     )
     recipe = models.ForeignKey(
         Recipe,
@@ -129,16 +256,19 @@ class Favorite(models.Model):
         ]
 
 
-class Purchase(models.Model):
+class Purchase(CountedDeleteMixin, models.Model):
     """
     Модель покупок
     """
 
+    objects = UserRecipeQuerySet.as_manager()
+
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         verbose_name='Пользователь',
-        related_name='shoping_list'
+        related_name='shoping_list',
+        db_index=False,
     )
     recipe = models.ForeignKey(
         Recipe,
@@ -161,6 +291,68 @@ class Purchase(models.Model):
         ]
 
 
+class FeedEntry(models.Model):
+    """
+    Запись ленты подписок: рецепт автора, на которого подписан
+    пользователь, добавляется в его ленту при публикации
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+        related_name='feed',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт',
+        related_name='feed_entries',
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    'user',
+                    'recipe',
+                ],
+                name='unique_feed_entry',
+            )
+        ]
+
+
+class RecipeSimilarity(models.Model):
+    """
+    Похожие рецепты, заранее посчитанные командой build_similarity
+    """
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name='Рецепт',
+        related_name='similarity',
+    )
+    neighbours = ArrayField(
+        models.IntegerField(),
+        verbose_name='Похожие рецепты',
+    )
+    scores = ArrayField(
+        models.FloatField(),
+        verbose_name='Сходство',
+    )
+    built_at = models.DateTimeField(
+        verbose_name='Дата расчета',
+    )
+
+    class Meta:
+        verbose_name = 'Похожие рецепты'
+        verbose_name_plural = 'Похожие рецепты'
+
+
 class RecipeIngredient(models.Model):
     """
     Дополнительная модель для связи ManyToMany
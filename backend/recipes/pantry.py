@@ -0,0 +1,222 @@
+import copy
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+from .cache import get_recipes_changes, get_recipes_version
+from .models import Recipe, RecipeIngredient
+
+_lock = threading.Lock()
+_index = None
+_built_at = 0.0
+_version = None
+_applied = 0
+_missing = None
+
+
+class PantryIndex:
+    """
+    Обратный индекс в памяти процесса: для каждого ингредиента -
+    массив позиций рецептов, в которые он входит.
+    Покрытие рецепта - доля его ингредиентов, которые есть у пользователя.
+    Измененные рецепты помечаются удаленными и добавляются в конец,
+    удаленные позиции убираются полной перестройкой
+    """
+
+    def __init__(self, recipes, ingredients, tags):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.authors = np.empty(0, dtype=np.int64)
+        self.sizes = np.empty(0, dtype=np.int64)
+        self.alive = np.empty(0, dtype=bool)
+        self.rows = {}
+        self.postings = {}
+        self.tags = {}
+        self.add(recipes, ingredients, tags)
+
+    def add(self, recipes, ingredients, tags):
+        """
+        Добавляет рецепты новыми позициями. Массивы не меняются
+        на месте, а заменяются новыми
+        """
+        recipes = np.array(list(recipes), dtype=np.int64).reshape(-1, 2)
+        start = len(self.ids)
+        self.ids = np.concatenate([self.ids, recipes[:, 0]])
+        self.authors = np.concatenate([self.authors, recipes[:, 1]])
+        self.alive = np.concatenate([
+            self.alive, np.ones(len(recipes), dtype=bool),
+        ])
+        self.rows.update(zip(
+            recipes[:, 0].tolist(), range(start, len(self.ids))
+        ))
+        ingredients = np.array(
+            list(ingredients), dtype=np.int64
+        ).reshape(-1, 2)
+        order = np.argsort(recipes[:, 0])
+        added_ids = recipes[order, 0]
+        found = np.minimum(
+            np.searchsorted(added_ids, ingredients[:, 0]),
+            max(len(added_ids) - 1, 0),
+        )
+        known = (
+            added_ids[found] == ingredients[:, 0] if len(added_ids)
+            else np.zeros(len(ingredients), dtype=bool)
+        )
+        rows = start + order[found[known]]
+        ingredients = ingredients[known, 1]
+        self.sizes = np.concatenate([
+            self.sizes,
+            np.bincount(rows - start, minlength=len(recipes)),
+        ])
+        by_ingredient = np.lexsort((rows, ingredients))
+        keys, starts = np.unique(
+            ingredients[by_ingredient], return_index=True
+        )
+        chunks = np.split(rows[by_ingredient].astype(np.int32), starts[1:])
+        for key, chunk in zip(keys.tolist(), chunks):
+            if key in self.postings:
+                chunk = np.concatenate([self.postings[key], chunk])
+            self.postings[key] = chunk
+        self.tags = {
+            slug: np.concatenate([mask, np.zeros(len(recipes), dtype=bool)])
+            for slug, mask in self.tags.items()
+        }
+        for recipe_id, slug in tags:
+            if recipe_id in self.rows:
+                mask = self.tags.setdefault(
+                    slug, np.zeros(len(self.ids), dtype=bool)
+                )
+                mask[self.rows[recipe_id]] = True
+
+    def remove(self, recipe_ids):
+        self.alive = self.alive.copy()
+        for recipe_id in recipe_ids:
+            row = self.rows.pop(recipe_id, None)
+            if row is not None:
+                self.alive[row] = False
+
+    def patched(self, recipe_ids, recipes, ingredients, tags):
+        """
+        Копия индекса, в которой рецепты recipe_ids заменены новыми
+        данными. Поиск по старой копии в других потоках продолжается
+        без блокировок
+        """
+        index = copy.copy(self)
+        index.rows = dict(self.rows)
+        index.postings = dict(self.postings)
+        index.remove(recipe_ids)
+        index.add(recipes, ingredients, tags)
+        return index
+
+    def search(self, ingredient_ids, tags=None, author=None,
+               include=None, exclude=None):
+        """
+        Возвращает пары (id рецепта, покрытие) по убыванию покрытия,
+        затем числа совпавших ингредиентов, затем новизны рецепта
+        """
+        postings = [
+            self.postings[pk] for pk in set(ingredient_ids)
+            if pk in self.postings
+        ]
+        if not postings or not len(self.ids):
+            return []
+        matched = np.bincount(
+            np.concatenate(postings), minlength=len(self.ids)
+        )
+        mask = (matched > 0) & self.alive
+        if tags:
+            mask &= np.logical_or.reduce([
+                self.tags.get(slug, np.zeros_like(mask)) for slug in tags
+            ])
+        if author is not None:
+            mask &= self.authors == author
+        if include is not None:
+            mask &= np.isin(self.ids, list(include))
+        if exclude:
+            mask &= ~np.isin(self.ids, list(exclude))
+        found = np.flatnonzero(mask)
+        coverage = matched[found] / self.sizes[found]
+        found_order = np.lexsort(
+            (-self.ids[found], -matched[found], -coverage)
+        )
+        return list(zip(
+            self.ids[found[found_order]].tolist(),
+            coverage[found_order].tolist(),
+        ))
+
+
+def load(recipe_ids=None):
+    """
+    Строки рецептов, их ингредиентов и тегов для индекса:
+    все или только рецептов recipe_ids
+    """
+    recipes = Recipe.objects.all()
+    ingredients = RecipeIngredient.objects.all()
+    tags = Recipe.tags.through.objects.all()
+    if recipe_ids is not None:
+        recipes = recipes.filter(id__in=recipe_ids)
+        ingredients = ingredients.filter(recipe_id__in=recipe_ids)
+        tags = tags.filter(recipe_id__in=recipe_ids)
+    return (
+        recipes.values_list('id', 'author_id').iterator(),
+        ingredients.values_list('recipe_id', 'ingredient_id').iterator(),
+        tags.values_list('recipe_id', 'tag__slug').iterator(),
+    )
+
+
+def is_missing(applied, last):
+    """
+    Запись журнала после applied считается вытесненной из кеша,
+    если ее нет дольше PANTRY_INDEX_REFRESH секунд. До этого она,
+    скорее всего, еще не записана, и индекс ее ждет
+    """
+    global _missing
+    now = time.monotonic()
+    if applied == last:
+        _missing = None
+    elif _missing is None or _missing[0] != applied:
+        _missing = (applied, now)
+    return (
+        _missing is not None
+        and now - _missing[1] > settings.PANTRY_INDEX_REFRESH
+    )
+
+
+def get_index():
+    """
+    Созданные, измененные и удаленные рецепты применяются к индексу
+    по журналу изменений. Целиком индекс перестраивается по истечении
+    PANTRY_INDEX_TTL, а при пропусках в журнале и при смене версии
+    рецептов после массовой загрузки - не чаще раза
+    в PANTRY_INDEX_REFRESH секунд
+    """
+    global _index, _built_at, _version, _applied, _missing
+    version = get_recipes_version()
+    with _lock:
+        age = time.monotonic() - _built_at
+        last, applied, changed = get_recipes_changes(_applied)
+        outdated = (
+            changed is None
+            or is_missing(applied, last)
+            or _version != version
+        )
+        if (
+            _index is None
+            or age > settings.PANTRY_INDEX_TTL
+            or outdated and age > settings.PANTRY_INDEX_REFRESH
+        ):
+            _index = PantryIndex(*load())
+            _built_at = time.monotonic()
+            _version = version
+            _applied = last
+            _missing = None
+        else:
+            if changed:
+                _index = _index.patched(changed, *load(changed))
+            _applied = applied
+        return _index
+
+
+def search(ingredient_ids, **filters):
+    return get_index().search(ingredient_ids, **filters)
@@ -0,0 +1,34 @@
+from rest_framework import renderers
+
+
+class DownloadRenderer(renderers.BaseRenderer):
+    """
+    Рендерер для выбора формата выгрузки через ?format= или Accept.
+    Сам файл отдается потоком из представления,
+    здесь рендерятся только ответы с ошибками
+    """
+
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, dict) and 'detail' in data:
+            data = data['detail']
+        return str(data).encode(self.charset or 'utf-8')
+
+
+class PlainTextRenderer(DownloadRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+
+class CSVRenderer(DownloadRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class PDFRenderer(DownloadRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
@@ -16,3 +16,8 @@ class IngredientResource(resources.ModelResource):
             'name',
             'measurement_unit',
         ]
+        import_id_fields = [
+            'name',
+            'measurement_unit',
+        ]
+        skip_unchanged = True
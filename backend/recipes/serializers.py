@@ -1,15 +1,25 @@
+import json
+
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from django.http import QueryDict
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
+from api_foodgram.metrics import TimedSerializerMixin
+from users.relations import get_relations
 from users.serializers import UserSerializer
+from .images import get_variant_url, get_variant_urls, store_image
 from .models import (Favorite, Ingredient, Purchase, Recipe, RecipeIngredient,
                      Tag)
 
 User = get_user_model()
 
+LIST_ACTIONS = ['list', 'feed', 'similar', 'pantry']
+
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Tag
@@ -69,7 +79,7 @@ class PurchaseSerializer(serializers.ModelSerializer):
         return data
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     name = serializers.ReadOnlyField()
     measurement_unit = serializers.ReadOnlyField()
@@ -106,28 +116,32 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
 
 
 class CreateRecipeIngredientSerializer(RecipeIngredientSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all()
-    )
+    id = serializers.IntegerField()
     amount = serializers.IntegerField()
 
-    def to_representation(self, instance):
-        ingredient_in_recipe = [
-            ingredient for ingredient in
-            RecipeIngredient.objects.filter(ingredient=instance)
-        ]
-        return RecipeIngredientSerializer(ingredient_in_recipe).data
 
+class RecipeImageField(Base64ImageField):
+    """
+    Принимает изображение как base64-строкой, так и файлом
+    из multipart/form-data
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, UploadedFile):
+            return serializers.ImageField.to_internal_value(self, data)
+        return super().to_internal_value(data)
 
-class RecipeSerializer(serializers.ModelSerializer):
+
+class RecipeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     author = UserSerializer(read_only=True)
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(), many=True,
+    tags = serializers.ListField(
+        child=serializers.IntegerField(), write_only=True,
     )
     ingredients = CreateRecipeIngredientSerializer(many=True)
-    image = Base64ImageField()
+    image = RecipeImageField()
     cooking_time = serializers.IntegerField()
+    image_variants = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
@@ -139,6 +153,7 @@ class RecipeSerializer(serializers.ModelSerializer):
             'tags',
             'ingredients',
             'image',
+            'image_variants',
             'is_favorited',
             'is_in_shopping_cart',
             'name',
@@ -146,21 +161,46 @@ class RecipeSerializer(serializers.ModelSerializer):
             'cooking_time',
         ]
 
+    def to_internal_value(self, data):
+        """
+        В multipart/form-data ингредиенты можно передать JSON-строкой,
+        а теги - повторяющимся полем tags
+        """
+        if isinstance(data, QueryDict):
+            data = self.parse_form_data(data)
+        return super().to_internal_value(data)
+
+    def parse_form_data(self, data):
+        ingredients = data.get('ingredients')
+        if not isinstance(ingredients, str):
+            return data
+        try:
+            ingredients = json.loads(ingredients)
+        except ValueError:
+            raise serializers.ValidationError(
+                {'ingredients': ['Ожидается список ингредиентов в JSON']}
+            )
+        parsed = {
+            key: data.getlist(key) if key == 'tags' else data.get(key)
+            for key in data
+        }
+        parsed['ingredients'] = ingredients
+        return parsed
+
+    def get_image_variants(self, obj):
+        return get_variant_urls(obj, self.context.get('request'))
+
     def get_is_favorited(self, obj):
-        request = self.context.get('request')
-        if request is None or request.user.is_anonymous:
-            return False
-        return Favorite.objects.filter(
-            user=request.user, recipe=obj
-        ).exists()
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
+        relations = get_relations(self.context.get('request'))
+        return relations is not None and obj.id in relations.favorites
 
     def get_is_in_shopping_cart(self, obj):
-        request = self.context.get('request')
-        if request is None or request.user.is_anonymous:
-            return False
-        return Purchase.objects.filter(
-            user=request.user, recipe=obj
-        ).exists()
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
+        relations = get_relations(self.context.get('request'))
+        return relations is not None and obj.id in relations.shopping_cart
 
     def validate_cooking_time(self, value):
         if value < 1:
@@ -175,20 +215,40 @@ class RecipeSerializer(serializers.ModelSerializer):
                 'Вы должны указать хотя бы один тег'
             )
         self.unique_validator(value)
-
-        return value
+        tags = Tag.objects.in_bulk(value)
+        missing = set(value) - tags.keys()
+        if missing:
+            raise serializers.ValidationError(
+                'Теги не найдены: {}'.format(
+                    ', '.join(str(pk) for pk in sorted(missing))
+                )
+            )
+        return [tags[pk] for pk in value]
 
     def validate_ingredients(self, value):
         if len(value) < 1:
             raise serializers.ValidationError(
                 'Вы должны выбрать хотя бы один ингредиент'
             )
+        amounts = {}
         for ing in value:
             if ing['amount'] < 1:
                 raise serializers.ValidationError(
                     'Количество ингредиента не должно быть меньше одного'
                 )
-        return value
+            amounts[ing['id']] = amounts.get(ing['id'], 0) + ing['amount']
+        ingredients = Ingredient.objects.in_bulk(amounts)
+        missing = amounts.keys() - ingredients.keys()
+        if missing:
+            raise serializers.ValidationError(
+                'Ингредиенты не найдены: {}'.format(
+                    ', '.join(str(pk) for pk in sorted(missing))
+                )
+            )
+        return [
+            {'id': ingredients[pk], 'amount': amount}
+            for pk, amount in amounts.items()
+        ]
 
     def unique_validator(self, value):
         set_value = len(set(value))
@@ -198,51 +258,87 @@ class RecipeSerializer(serializers.ModelSerializer):
             )
         return True
 
-    def create_or_update_cycle(self, recipe, ingredients_data):
-        for ingredient in ingredients_data:
-            ingredient_id = ingredient['id']
-            amount = ingredient['amount']
-            obj, created = RecipeIngredient.objects.get_or_create(
-                ingredient=ingredient_id,
+    def create_ingredients(self, recipe, ingredients_data):
+        if not ingredients_data:
+            return
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
                 recipe=recipe,
-                defaults={'amount': amount}
+                ingredient=ingredient['id'],
+                amount=ingredient['amount'],
+            )
+            for ingredient in ingredients_data
+        )
+
+    def store_image(self, validated_data):
+        if validated_data.get('image'):
+            validated_data['image'], validated_data['image_hash'] = (
+                store_image(validated_data['image'])
             )
-            if not created:
-                obj.amount += amount
-                obj.save()
 
+    @transaction.atomic
     def create(self, validated_data):
         request = self.context.get('request')
         ingredients_data = validated_data.pop('ingredients')
         tags_data = validated_data.pop('tags')
+        self.store_image(validated_data)
         recipe = Recipe.objects.create(
             author=request.user, **validated_data
         )
-        self.create_or_update_cycle(
+        self.create_ingredients(
             recipe, ingredients_data
         )
         recipe.tags.set(tags_data)
-        recipe.save()
         return recipe
 
-    def update(self, instance, validated_data):
-        ingredients_data = validated_data.pop('ingredients')
-        tags_data = validated_data.pop('tags')
-        instance.name = validated_data.get('name', instance.name)
-        instance.image = validated_data.get('image', instance.image)
-        instance.text = validated_data.get('text', instance.text)
-        instance.cooking_time = validated_data.get(
-            'cooking_time',
-            instance.cooking_time
-        )
-        instance.ingredients.clear()
-        self.create_or_update_cycle(
-            instance, ingredients_data
+    def update_ingredients(self, recipe, ingredients_data):
+        amounts = {
+            ingredient['id'].id: ingredient['amount']
+            for ingredient in ingredients_data
+        }
+        current = {
+            item.ingredient_id: item
+            for item in recipe.recipeingredient_set.all()
+        }
+        removed = [
+            item.id for pk, item in current.items() if pk not in amounts
+        ]
+        changed = []
+        for pk, item in current.items():
+            if pk in amounts and item.amount != amounts[pk]:
+                item.amount = amounts[pk]
+                changed.append(item)
+        if removed:
+            RecipeIngredient.objects.filter(id__in=removed).delete()
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ['amount'])
+        self.create_ingredients(
+            recipe,
+            [
+                ingredient for ingredient in ingredients_data
+                if ingredient['id'].id not in current
+            ],
         )
-        instance.tags.set(tags_data)
-        instance.save()
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        ingredients_data = validated_data.pop('ingredients', None)
+        tags_data = validated_data.pop('tags', None)
+        self.store_image(validated_data)
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        if ingredients_data is not None:
+            self.update_ingredients(instance, ingredients_data)
+        if tags_data is not None:
+            instance.tags.set(tags_data)
         return instance
 
+    def to_representation(self, instance):
+        request = self.context.get('request')
+        instance = Recipe.objects.for_user(request.user).get(pk=instance.pk)
+        return ReadRecipeSerializer(instance, context=self.context).data
+
 
 class ReadRecipeSerializer(RecipeSerializer):
 
@@ -251,9 +347,27 @@ class ReadRecipeSerializer(RecipeSerializer):
     )
     author = UserSerializer(read_only=True)
     ingredients = serializers.SerializerMethodField()
+    image = serializers.SerializerMethodField()
+
+    def to_representation(self, instance):
+        return super(RecipeSerializer, self).to_representation(instance)
+
+    def get_image(self, obj):
+        view = self.context.get('view')
+        action = getattr(view, 'action', None)
+        variant = 'card' if action in LIST_ACTIONS else 'full'
+        return get_variant_url(obj, variant, self.context.get('request'))
 
     def get_ingredients(self, obj):
-        ingredients = RecipeIngredient.objects.filter(recipe=obj)
+        ingredients = obj.recipeingredient_set.all()
         return RecipeIngredientSerializer(
             ingredients, many=True
         ).data
+
+
+class PantryRecipeSerializer(ReadRecipeSerializer):
+
+    coverage = serializers.FloatField(read_only=True)
+
+    class Meta(ReadRecipeSerializer.Meta):
+        fields = ReadRecipeSerializer.Meta.fields + ['coverage']
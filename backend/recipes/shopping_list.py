@@ -0,0 +1,99 @@
+import csv
+import io
+
+from django.conf import settings
+from django.db.models import Sum
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen.canvas import Canvas
+
+from .models import RecipeIngredient
+
+CSV_HEADER = ['Ингредиент', 'Количество', 'Единица измерения']
+PDF_FONT_NAME = 'ShoppingListFont'
+PDF_FONT_SIZE = 12
+PDF_LEADING = 18
+PDF_MARGIN = 50
+PDF_CHUNK_SIZE = 64 * 1024
+
+
+def get_ingredients(user):
+    """
+    Суммарное количество каждого ингредиента из корзины,
+    читается серверным курсором по мере отдачи ответа
+    """
+    return RecipeIngredient.objects.filter(
+        recipe__recipes_in_cart__user=user
+    ).values_list(
+        'ingredient__name', 'ingredient__measurement_unit'
+    ).annotate(
+        total_amount=Sum('amount')
+    ).order_by(
+        'ingredient__name', 'ingredient__measurement_unit'
+    ).iterator(chunk_size=settings.SHOPPING_LIST_CHUNK_SIZE)
+
+
+def format_line(name, measurement_unit, amount):
+    return f'{name} - {amount}, {measurement_unit}'
+
+
+def stream_txt(ingredients):
+    for name, measurement_unit, amount in ingredients:
+        yield format_line(name, measurement_unit, amount) + '\n'
+
+
+class Echo:
+    """
+    Псевдобуфер для csv.writer, возвращающий записанную строку
+    """
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(ingredients):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+    for name, measurement_unit, amount in ingredients:
+        yield writer.writerow([name, amount, measurement_unit])
+
+
+def stream_pdf(ingredients):
+    """
+    PDF нельзя отдавать построчно: таблица ссылок пишется в конце файла.
+    Строки рисуются сразу из курсора, а готовый документ
+    отдается частями
+    """
+    if PDF_FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(
+            TTFont(PDF_FONT_NAME, settings.SHOPPING_LIST_PDF_FONT)
+        )
+    buffer = io.BytesIO()
+    canvas = Canvas(buffer, pagesize=A4)
+    width, height = A4
+    y = height - PDF_MARGIN
+    canvas.setFont(PDF_FONT_NAME, PDF_FONT_SIZE)
+    for name, measurement_unit, amount in ingredients:
+        if y < PDF_MARGIN:
+            canvas.showPage()
+            canvas.setFont(PDF_FONT_NAME, PDF_FONT_SIZE)
+            y = height - PDF_MARGIN
+        canvas.drawString(
+            PDF_MARGIN, y, format_line(name, measurement_unit, amount)
+        )
+        y -= PDF_LEADING
+    canvas.save()
+    buffer.seek(0)
+    yield from iter(lambda: buffer.read(PDF_CHUNK_SIZE), b'')
+
+
+EXPORTERS = {
+    'txt': stream_txt,
+    'csv': stream_csv,
+    'pdf': stream_pdf,
+}
+
+
+def export(user, export_format):
+    return EXPORTERS[export_format](get_ingredients(user))
@@ -0,0 +1,55 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.deletion import rows_deleted
+from users.models import Follow
+from . import timeline
+from .cache import bump_catalog_version, record_recipes_changed
+from .models import Ingredient, Recipe, Tag
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+@receiver([post_save, post_delete], sender=Tag)
+def catalog_changed(sender, **kwargs):
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: record_recipes_changed([instance.id]))
+
+
+@receiver(rows_deleted, sender=Recipe)
+def recipes_deleted(sender, rows, **kwargs):
+    recipe_ids = [row['id'] for row in rows]
+    transaction.on_commit(lambda: record_recipes_changed(recipe_ids))
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'name', 'text'} & update_fields:
+        return
+    Recipe.objects.filter(pk=instance.pk).update_search_vector()
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_published(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        transaction.on_commit(lambda: timeline.fan_out(instance))
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.backfill(instance.user, instance.following)
+
+
+@receiver(rows_deleted, sender=Follow)
+def follows_deleted(sender, rows, cascade, **kwargs):
+    """
+    При каскадном удалении записи лент удаляются
+    вместе с пользователем или его рецептами
+    """
+    if not cascade:
+        timeline.remove(rows)
@@ -0,0 +1,159 @@
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from scipy import sparse
+
+from .models import Recipe, RecipeIngredient, RecipeSimilarity
+
+
+class SimilarityMatrix:
+    """
+    Разреженная матрица рецепт x признак, где признаки - ингредиенты
+    и теги рецепта. Сходство двух рецептов - коэффициент Жаккара
+    их множеств признаков, считается блоками строк, чтобы плотная
+    матрица блока занимала не больше block_size x число рецептов
+    """
+
+    def __init__(self, ids, features):
+        self.ids = np.asarray(ids)
+        self.features = features.tocsr()
+        self.transposed = self.features.T.tocsc()
+        self.sizes = self.features.getnnz(axis=1).astype(np.float32)
+
+    @classmethod
+    def from_database(cls):
+        ids = np.fromiter(
+            Recipe.objects.order_by('id').values_list('id', flat=True),
+            dtype=np.int64,
+        )
+        ingredients = np.array(
+            RecipeIngredient.objects.values_list('recipe_id', 'ingredient_id'),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        tags = np.array(
+            Recipe.tags.through.objects.values_list('recipe_id', 'tag_id'),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        tag_offset = ingredients[:, 1].max() + 1 if len(ingredients) else 0
+        pairs = np.concatenate([
+            ingredients, tags + np.array([0, tag_offset]),
+        ])
+        pairs = pairs[np.isin(pairs[:, 0], ids)]
+        rows = np.searchsorted(ids, pairs[:, 0])
+        features = sparse.csr_matrix(
+            (np.ones(len(pairs), dtype=np.float32), (rows, pairs[:, 1])),
+            shape=(len(ids), pairs[:, 1].max() + 1 if len(pairs) else 0),
+        )
+        features.data[:] = 1
+        return cls(ids, features)
+
+    def scores(self, rows):
+        """
+        Плотная матрица сходства строк rows со всеми рецептами,
+        сходство рецепта с самим собой обнуляется
+        """
+        scores = (self.features[rows] @ self.transposed).toarray()
+        union = self.sizes[rows, None] + self.sizes[None, :] - scores
+        np.maximum(union, 1, out=union)
+        scores /= union
+        scores[np.arange(len(rows)), rows] = 0
+        return scores
+
+    def blocks(self, rows, block_size):
+        for start in range(0, len(rows), block_size):
+            block = rows[start:start + block_size]
+            yield block, self.scores(block)
+
+    @staticmethod
+    def top(scores, count):
+        """
+        Позиции и значения count лучших соседей каждой строки
+        по убыванию сходства
+        """
+        count = min(count, scores.shape[1])
+        if count == 0:
+            empty = np.empty((len(scores), 0))
+            return empty.astype(np.int64), empty
+        best = np.argpartition(-scores, count - 1, axis=1)[:, :count]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        return (
+            np.take_along_axis(best, order, axis=1),
+            np.take_along_axis(best_scores, order, axis=1),
+        )
+
+
+def changed_recipe_ids():
+    """
+    Рецепты без посчитанных соседей или измененные после расчета
+    """
+    return Recipe.objects.filter(
+        Q(similarity__isnull=True)
+        | Q(updated_at__gt=F('similarity__built_at'))
+    ).values_list('id', flat=True)
+
+
+def affected_rows(matrix, changed, count, block_size):
+    """
+    Кроме измененных рецептов пересчитываются те, в чьих списках
+    есть измененный рецепт, и те, для кого измененный рецепт
+    теперь похожее последнего из сохраненных соседей
+    """
+    changed_rows = np.flatnonzero(np.isin(matrix.ids, list(changed)))
+    threshold = np.zeros(len(matrix.ids), dtype=np.float32)
+    affected = np.zeros(len(matrix.ids), dtype=bool)
+    affected[changed_rows] = True
+    stored = RecipeSimilarity.objects.values_list(
+        'recipe_id', 'neighbours', 'scores'
+    )
+    for recipe_id, neighbours, scores in stored.iterator():
+        row = np.searchsorted(matrix.ids, recipe_id)
+        if row >= len(matrix.ids) or matrix.ids[row] != recipe_id:
+            continue
+        if not changed.isdisjoint(neighbours):
+            affected[row] = True
+        elif len(scores) >= count:
+            threshold[row] = scores[-1]
+    for _, scores in matrix.blocks(changed_rows, block_size):
+        affected |= (scores > threshold).any(axis=0)
+    return np.flatnonzero(affected)
+
+
+def build(full=False, count=None, block_size=None):
+    """
+    Пересчитывает соседей и возвращает число обновленных рецептов
+    """
+    count = count or settings.SIMILAR_RECIPES_COUNT
+    block_size = block_size or settings.SIMILARITY_BLOCK_SIZE
+    built_at = timezone.now()
+    matrix = SimilarityMatrix.from_database()
+    if full:
+        rows = np.arange(len(matrix.ids))
+    else:
+        changed = set(changed_recipe_ids())
+        if not changed:
+            return 0
+        rows = affected_rows(matrix, changed, count, block_size)
+    for block, scores in matrix.blocks(rows, block_size):
+        save_block(matrix, block, scores, count, built_at)
+    return len(rows)
+
+
+@transaction.atomic
+def save_block(matrix, block, scores, count, built_at):
+    positions, values = SimilarityMatrix.top(scores, count)
+    ids = matrix.ids[block].tolist()
+    RecipeSimilarity.objects.filter(recipe_id__in=ids).delete()
+    RecipeSimilarity.objects.bulk_create(
+        RecipeSimilarity(
+            recipe_id=recipe_id,
+            neighbours=matrix.ids[row_positions[row_values > 0]].tolist(),
+            scores=row_values[row_values > 0].tolist(),
+            built_at=built_at,
+        )
+        for recipe_id, row_positions, row_values in zip(
+            ids, positions, values
+        )
+    )
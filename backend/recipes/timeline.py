@@ -0,0 +1,117 @@
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
+
+from users.models import Follow, User
+from .models import FeedEntry, Recipe
+
+
+def fans_out(followers_count):
+    """
+    Рецепты авторов с очень большим числом подписчиков
+    не раскладываются по лентам, а читаются при запросе ленты
+    """
+    return followers_count <= settings.FEED_FANOUT_MAX_FOLLOWERS
+
+
+def fan_out(recipe):
+    """
+    Добавляет рецепт в ленты подписчиков автора пачками
+    по FEED_FANOUT_BATCH_SIZE строк. Каждая пачка обрезается
+    до FEED_MAX_ENTRIES в той же транзакции, что и добавление.
+    Раскладка идет синхронно после коммита в запросе создания
+    рецепта, поэтому ее время ограничено FEED_FANOUT_MAX_FOLLOWERS:
+    не больше одного INSERT и одного DELETE на каждую пачку.
+    Число подписчиков читается из базы: автор рецепта - это
+    request.user, который может быть копией из кеша токенов
+    """
+    followers_count = User.objects.filter(pk=recipe.author_id).values_list(
+        'followers_count', flat=True
+    ).first()
+    if followers_count is None or not fans_out(followers_count):
+        return
+    batch_size = settings.FEED_FANOUT_BATCH_SIZE
+    followers = Follow.objects.filter(
+        following_id=recipe.author_id
+    ).values_list('user_id', flat=True).iterator(chunk_size=batch_size)
+    while True:
+        batch = list(islice(followers, batch_size))
+        if not batch:
+            return
+        with transaction.atomic(savepoint=False):
+            FeedEntry.objects.bulk_create(
+                (FeedEntry(user_id=user_id, recipe=recipe)
+                 for user_id in batch),
+                ignore_conflicts=True,
+            )
+            trim(batch)
+
+
+def backfill(user, author):
+    """
+    При подписке добавляет в ленту последние рецепты автора
+    """
+    if not fans_out(author.followers_count):
+        return
+    recipes = Recipe.objects.filter(author=author).values_list(
+        'id', flat=True
+    )[:settings.FEED_BACKFILL_SIZE]
+    with transaction.atomic(savepoint=False):
+        FeedEntry.objects.bulk_create(
+            (FeedEntry(user=user, recipe_id=recipe_id)
+             for recipe_id in recipes),
+            ignore_conflicts=True,
+        )
+        trim([user.id])
+
+
+def remove(follows):
+    """
+    Убирает из лент записи авторов, от которых отписались
+    """
+    condition = Q()
+    for follow in follows:
+        condition |= Q(
+            user=follow['user_id'], recipe__author=follow['following_id']
+        )
+    FeedEntry.objects.filter(condition).delete()
+
+
+def trim(user_ids):
+    """
+    Оставляет в лентах пользователей не больше FEED_MAX_ENTRIES
+    последних записей одним DELETE: для каждого пользователя
+    подзапрос по индексу (user, recipe) находит старейшую
+    оставляемую запись
+    """
+    oldest_kept = FeedEntry.objects.filter(
+        user_id=OuterRef('user_id')
+    ).order_by('-recipe_id').values(
+        'recipe_id'
+    )[settings.FEED_MAX_ENTRIES - 1:settings.FEED_MAX_ENTRIES]
+    FeedEntry.objects.filter(
+        user_id__in=user_ids, recipe_id__lt=Subquery(oldest_kept)
+    ).delete()
+
+
+def get_feed(user, queryset):
+    """
+    Рецепты из ленты пользователя и рецепты авторов,
+    для которых лента собирается при чтении
+    """
+    condition = Q(
+        pk__in=FeedEntry.objects.filter(user=user).values('recipe_id')
+    )
+    authors = list(
+        Follow.objects.filter(
+            user=user,
+            following__followers_count__gt=(
+                settings.FEED_FANOUT_MAX_FOLLOWERS
+            ),
+        ).values_list('following_id', flat=True)
+    )
+    if authors:
+        condition |= Q(author__in=authors)
+    return queryset.filter(condition)
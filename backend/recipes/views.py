@@ -1,29 +1,84 @@
 import django_filters.rest_framework
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
-from django.http.response import HttpResponse
+from django.db import transaction
+from django.http.response import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import permissions, status
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import (action, api_view, permission_classes,
+                                       renderer_classes)
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .custom_pagination import CustomPageNumberPaginator
+from .custom_pagination import (CustomPageNumberPaginator,
+                                RecipeCursorPaginator, RecipePaginator)
+from users.relations import get_relations, update_relations
 from users.serializers import FollowRecipeSerializer
-from .custom_viewsets import BaseModelViewSet, RecipeModelViewSet
+from . import ingredient_index, pantry, shopping_list, timeline
+from .custom_viewsets import (BaseModelViewSet, CachedCatalogMixin,
+                              RecipeModelViewSet)
 from .filters import IngredientFilter, RecipeFilter
-from .models import (Favorite, Ingredient, Purchase, Recipe, RecipeIngredient,
-                     Tag)
+from .models import (Favorite, Ingredient, Purchase, Recipe,
+                     RecipeSimilarity, Tag)
 from .permissions import AdminOrAuthorOrReadOnly
+from .renderers import CSVRenderer, PDFRenderer, PlainTextRenderer
 from .serializers import (FavoriteSerializer, IngredientSerializer,
-                          PurchaseSerializer, ReadRecipeSerializer,
-                          RecipeSerializer, TagSerializer)
+                          PantryRecipeSerializer, PurchaseSerializer,
+                          ReadRecipeSerializer, RecipeSerializer,
+                          TagSerializer)
 
 User = get_user_model()
 
 
-class TagsViewSet(BaseModelViewSet):
+def get_similar_limit(request):
+    limit = request.query_params.get('limit')
+    if limit is None:
+        return settings.SIMILAR_RECIPES_COUNT
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ValidationError({'limit': 'Значение должно быть целым числом'})
+    if limit < 0:
+        raise ValidationError(
+            {'limit': 'Значение не может быть отрицательным'}
+        )
+    return limit
+
+
+def get_int_list(request, name):
+    try:
+        return [int(value) for value in request.query_params.getlist(name)]
+    except ValueError:
+        raise ValidationError({name: 'Ожидается список целых чисел'})
+
+
+def get_pantry_filters(request):
+    """
+    Те же фильтры, что и у списка рецептов, но проверяемые в памяти
+    """
+    filters = {'tags': set(request.query_params.getlist('tags'))}
+    authors = get_int_list(request, 'author')
+    if authors:
+        filters['author'] = authors[0]
+    for param, name in [
+        ('is_favorited', 'favorites'),
+        ('is_in_shopping_cart', 'shopping_cart'),
+    ]:
+        value = request.query_params.get(param)
+        if value is None:
+            continue
+        recipes = getattr(get_relations(request), name, set())
+        if value == 'true':
+            filters['include'] = recipes & filters.get('include', recipes)
+        else:
+            filters['exclude'] = recipes | filters.get('exclude', set())
+    return filters
+
+
+class TagsViewSet(CachedCatalogMixin, BaseModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [AllowAny, ]
@@ -35,9 +90,12 @@ class RecipesViewSet(RecipeModelViewSet):
         django_filters.rest_framework.DjangoFilterBackend
     ]
     filter_class = RecipeFilter
-    pagination_class = CustomPageNumberPaginator
+    pagination_class = RecipePaginator
+    parser_classes = [JSONParser, MultiPartParser]
     permission_classes = [AdminOrAuthorOrReadOnly, ]
-    queryset = Recipe.objects.all()
+
+    def get_queryset(self):
+        return Recipe.objects.for_user(self.request.user)
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
@@ -48,6 +106,7 @@ class RecipesViewSet(RecipeModelViewSet):
             url_path='favorite', url_name='favorite',
             permission_classes=[permissions.IsAuthenticated],
             detail=True)
+    @transaction.atomic
     def favorite(self, request, pk):
         recipe = get_object_or_404(
             Recipe, id=pk
@@ -63,6 +122,7 @@ class RecipesViewSet(RecipeModelViewSet):
             serializer.save(
                 recipe=recipe, user=request.user
             )
+            update_relations(request, 'favorites', recipe.id, True)
             serializer = FollowRecipeSerializer(recipe)
             return Response(
                 serializer.data, status=status.HTTP_201_CREATED
@@ -73,48 +133,95 @@ class RecipesViewSet(RecipeModelViewSet):
             recipe__id=pk
         )
         favorite.delete()
+        update_relations(request, 'favorites', recipe.id, False)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(methods=['GET'],
+            url_path='feed', url_name='feed',
+            permission_classes=[permissions.IsAuthenticated],
+            detail=False)
+    def feed(self, request):
+        paginator = RecipeCursorPaginator()
+        page = paginator.paginate_queryset(
+            timeline.get_feed(request.user, self.get_queryset()), request, self
+        )
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
-class IngredientsViewSet(BaseModelViewSet):
+    @action(methods=['GET'],
+            url_path='pantry', url_name='pantry',
+            detail=False)
+    def pantry(self, request):
+        ingredients = get_int_list(request, 'ingredients')
+        if not ingredients:
+            raise ValidationError(
+                {'ingredients': 'Укажите хотя бы один ингредиент'}
+            )
+        ranked = pantry.search(ingredients, **get_pantry_filters(request))
+        paginator = CustomPageNumberPaginator()
+        page = dict(paginator.paginate_queryset(ranked, request, self))
+        recipes = self.get_queryset().in_bulk(page)
+        for pk, recipe in recipes.items():
+            recipe.coverage = page[pk]
+        serializer = PantryRecipeSerializer(
+            [recipes[pk] for pk in page if pk in recipes],
+            many=True,
+            context=self.get_serializer_context(),
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(methods=['GET'],
+            url_path='similar', url_name='similar',
+            detail=True)
+    def similar(self, request, pk):
+        neighbours = RecipeSimilarity.objects.filter(
+            recipe_id=pk
+        ).values_list('neighbours', flat=True).first()
+        if neighbours is None:
+            get_object_or_404(Recipe, id=pk)
+            neighbours = []
+        recipes = self.get_queryset().in_bulk(
+            neighbours[:get_similar_limit(request)]
+        )
+        serializer = self.get_serializer(
+            [recipes[pk] for pk in neighbours if pk in recipes], many=True
+        )
+        return Response(serializer.data)
+
+
+class IngredientsViewSet(CachedCatalogMixin, BaseModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = [AllowAny, ]
     pagination_class = None
     filterset_class = IngredientFilter
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if not name:
+            return super().list(request, *args, **kwargs)
+        ingredients = ingredient_index.search(
+            name,
+            measurement_unit=request.query_params.get('measurement_unit'),
+        )
+        serializer = self.get_serializer(ingredients, many=True)
+        return Response(serializer.data)
+
 
 @api_view(['GET', ])
 @permission_classes([IsAuthenticated, ])
+@renderer_classes([PlainTextRenderer, CSVRenderer, PDFRenderer])
 def shopping_cart_download_function(request):
-    buying_list = {}
-    ingredients = RecipeIngredient.objects.filter(
-        recipe__recipes_in_cart__user=request.user
-    ).values_list(
-        'ingredient__name', 'amount', 'ingredient__measurement_unit'
+    renderer = request.accepted_renderer
+    content_type = renderer.media_type
+    if renderer.charset:
+        content_type = f'{content_type}; charset={renderer.charset}'
+    response = StreamingHttpResponse(
+        shopping_list.export(request.user, renderer.format),
+        content_type=content_type,
     )
-    ingredients_annotate = ingredients.values(
-        'ingredient__name', 'ingredient__measurement_unit'
-    ).annotate(total_amount=Sum('amount'))
-
-    for ingredient in ingredients_annotate:
-        amount = ingredient['total_amount']
-        name = ingredient['ingredient__name']
-        measurement_unit = ingredient['ingredient__measurement_unit']
-        buying_list[name] = {
-            'amount': amount,
-            'measurement_unit': measurement_unit,
-        }
-
-    ingredient_list = []
-    for item in buying_list:
-        ingredient_list.append(
-            f'{item} - {buying_list[item]["amount"]}, '
-            f'{buying_list[item]["measurement_unit"]}\n'
-        )
-    response = HttpResponse(ingredient_list, 'Content-Type: text/plain')
     response['Content-Disposition'] = (
-        'attachment;' 'filename="ingredient_list.txt"'
+        f'attachment; filename="ingredient_list.{renderer.format}"'
     )
     return response
 
@@ -142,6 +249,7 @@ class ShoppingCartView(APIView):
         serializer.save(
             recipe=recipe, user=request.user
         )
+        update_relations(request, 'shopping_cart', recipe.id, True)
         serializer = FollowRecipeSerializer(recipe)
         return Response(
             serializer.data, status=status.HTTP_201_CREATED
@@ -155,4 +263,5 @@ class ShoppingCartView(APIView):
             recipe__id=recipe_id,
         )
         shopping_cart.delete()
+        update_relations(request, 'shopping_cart', recipe_id, False)
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,37 @@
+import pytest
+
+from recipes import pantry
+from .factories import World
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--update-snapshots', action='store_true',
+        help='Перезаписать снимки SQL в tests/snapshots',
+    )
+
+
+@pytest.fixture
+def update_snapshots(request):
+    return request.config.getoption('--update-snapshots')
+
+
+@pytest.fixture(autouse=True)
+def test_settings(settings, tmp_path):
+    settings.PASSWORD_HASHERS = [
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ]
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path / 'cache'),
+        },
+    }
+    settings.METRICS_SAMPLE_RATE = 0
+    pantry._index = None
+
+
+@pytest.fixture
+def make_world(db):
+    return World
@@ -0,0 +1,113 @@
+import base64
+import io
+
+from django.utils import timezone
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import (Favorite, Ingredient, Purchase, Recipe,
+                            RecipeIngredient, RecipeSimilarity, Tag)
+from users.models import Follow, User
+
+PASSWORD = 'budget-password'
+
+
+def png_base64():
+    buffer = io.BytesIO()
+    Image.new('RGB', (40, 40), 'green').save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+def create_user(name, **fields):
+    return User.objects.create_user(
+        email=f'{name}@example.com', username=name, password=PASSWORD,
+        first_name='Test', last_name=name, **fields,
+    )
+
+
+class World:
+    """
+    Набор данных, в котором число связанных объектов растет с size:
+    size авторов по два рецепта, size // 5 + 2 ингредиента в каждом
+    рецепте, подписки, избранное и корзина на всех авторов и рецепты,
+    кроме первого автора: он остается для запросов на добавление.
+    Второй рецепт пользователя все авторы добавили в избранное
+    и корзину, чтобы удаление рецепта затрагивало size строк
+    """
+
+    def __init__(self, size):
+        self.size = size
+        prefix = f'w{size}'
+        self.tags = [
+            Tag.objects.create(
+                name=f'{prefix}-tag{number}', color=f'#{size:03}00{number}',
+                slug=f'{prefix}-tag{number}',
+            )
+            for number in range(3)
+        ]
+        self.ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'{prefix} продукт {number}',
+                       measurement_unit='г')
+            for number in range(2 * size)
+        )
+        self.user = create_user(f'{prefix}-user')
+        self.inactive = create_user(f'{prefix}-inactive', is_active=False)
+        self.authors = [
+            create_user(f'{prefix}-author{number}') for number in range(size)
+        ]
+        self.recipes = [
+            self.create_recipe(author, size // 5 + 2)
+            for author in self.authors for _ in range(2)
+        ]
+        self.own_recipes = [
+            self.create_recipe(self.user, size) for _ in range(2)
+        ]
+        for author in self.authors[1:]:
+            Follow.objects.create(user=self.user, following=author)
+        for model in (Favorite, Purchase):
+            model.objects.bulk_create(
+                model(user=self.user, recipe=recipe)
+                for recipe in self.recipes[2:]
+            )
+            model.objects.bulk_create(
+                model(user=author, recipe=self.own_recipes[1])
+                for author in self.authors
+            )
+        RecipeSimilarity.objects.create(
+            recipe=self.recipes[0],
+            neighbours=[recipe.id for recipe in self.recipes[1:]],
+            scores=[0.5] * (len(self.recipes) - 1),
+            built_at=timezone.now(),
+        )
+        self.client = APIClient()
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.anonymous = APIClient()
+
+    def create_recipe(self, author, ingredients):
+        recipe = Recipe.objects.create(
+            author=author, name=f'Рецепт {author.username}',
+            text='Текст рецепта', cooking_time=10, image='recipes/budget.png',
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=10)
+            for ingredient in self.ingredients[:ingredients]
+        )
+        recipe.tags.set(self.tags)
+        return recipe
+
+    def recipe_payload(self):
+        return {
+            'name': 'Новый рецепт',
+            'text': 'Описание',
+            'cooking_time': 15,
+            'image': png_base64(),
+            'tags': [tag.id for tag in self.tags],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': 5}
+                for ingredient in self.ingredients[:self.size]
+            ],
+        }
@@ -0,0 +1,42 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+PRELUDE = '''
+import json
+import os
+
+import django
+from django.conf import settings
+
+django.setup()
+settings.DATABASES['default']['NAME'] = os.environ['TEST_DATABASE_NAME']
+settings.CACHES = json.loads(os.environ['TEST_CACHES'])
+'''
+
+
+def run_in_process(code):
+    """
+    Выполняет код в отдельном процессе Django с той же тестовой базой
+    и тем же кешем, как это сделал бы другой воркер gunicorn.
+    Данные теста должны быть закоммичены (transactional_db)
+    """
+    env = {
+        **os.environ,
+        'TEST_DATABASE_NAME': connection.settings_dict['NAME'],
+        'TEST_CACHES': json.dumps(settings.CACHES),
+    }
+    result = subprocess.run(
+        [sys.executable, '-c', PRELUDE + textwrap.dedent(code)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
@@ -0,0 +1,116 @@
+import difflib
+import re
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes import ingredient_index, pantry
+from users.authentication import tokens
+
+SNAPSHOT_DIR = Path(__file__).parent / 'snapshots'
+
+NORMALIZERS = [
+    (re.compile(r'"s\d+_x\d+"'), '"s?"'),
+    (re.compile(r'"_django_curs_\w+"'), '"_django_curs_?"'),
+    (re.compile(r"'(?:[^']|'')*'"), "'?'"),
+    (re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?(?![\w"])'), '?'),
+    (re.compile(r"\(('?\?'?(?:::\w+)?)(?:, \1)*\)"), '(...)'),
+    (re.compile(r'\(\.\.\.\)(?:, \(\.\.\.\))+'), '(...)'),
+    (re.compile(r'(WHEN \(\S+ = \?\) THEN \? )\1+'), r'\1'),
+    (re.compile(r'ARRAY\[[^\]]*\]'), 'ARRAY[...]'),
+]
+
+
+class Budget(NamedTuple):
+    """
+    Объявленный максимум SQL-запросов для одного вызова API.
+    request(world) возвращает путь и, для изменяющих запросов, тело
+    """
+
+    name: str
+    url_name: str
+    method: str
+    max_queries: int
+    request: Callable
+    anonymous: bool = False
+    status: int = None
+
+
+def normalize_sql(sql):
+    """
+    Убирает из запроса значения параметров и схлопывает списки
+    и повторяющиеся части UNION ALL, поэтому при правильной
+    загрузке связанных данных текст не зависит от размера выборки
+    """
+    for pattern, replacement in NORMALIZERS:
+        sql = pattern.sub(replacement, sql)
+    parts = sql.split(' UNION ALL ')
+    return ' UNION ALL '.join(
+        part for number, part in enumerate(parts)
+        if number == 0 or part != parts[number - 1]
+    )
+
+
+def reset_caches():
+    """
+    Каждый замер начинается с холодных кешей, иначе число
+    запросов зависело бы от порядка тестов
+    """
+    cache.clear()
+    tokens.clear()
+    ingredient_index._index = None
+    pantry._index = None
+
+
+def measure(client, budget, world):
+    path, data = budget.request(world)
+    reset_caches()
+    with CaptureQueriesContext(connection) as queries:
+        response = getattr(client, budget.method)(path, data, format='json')
+        for _ in getattr(response, 'streaming_content', ()):
+            pass
+    if budget.status is None:
+        succeeded = response.status_code < 400
+    else:
+        succeeded = response.status_code == budget.status
+    assert succeeded, (
+        f'{budget.name}: {response.status_code} {response.content[:500]}'
+    )
+    return [normalize_sql(query['sql']) for query in queries]
+
+
+def render_snapshot(budget, queries):
+    return '\n'.join([
+        f'-- {budget.method.upper()} {budget.url_name}: '
+        f'{len(queries)} of {budget.max_queries} queries',
+        *(f'{query};' for query in queries),
+    ]) + '\n'
+
+
+def check_snapshot(budget, queries, update):
+    """
+    Сравнивает нормализованный SQL с сохраненным в snapshots/,
+    чтобы изменения, влияющие на планы запросов, были видны на ревью
+    """
+    path = SNAPSHOT_DIR / f'{budget.name}.sql'
+    actual = render_snapshot(budget, queries)
+    if update:
+        SNAPSHOT_DIR.mkdir(exist_ok=True)
+        path.write_text(actual, encoding='utf-8')
+        return
+    if not path.exists():
+        raise AssertionError(
+            f'Нет снимка {path.name}, запустите pytest --update-snapshots'
+        )
+    expected = path.read_text(encoding='utf-8')
+    if actual != expected:
+        raise AssertionError(
+            f'SQL для {budget.name} изменился, проверьте и обновите снимок '
+            '(pytest --update-snapshots):\n' + ''.join(difflib.unified_diff(
+                expected.splitlines(True), actual.splitlines(True),
+                'snapshot', 'actual',
+            ))
+        )
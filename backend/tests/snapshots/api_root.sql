@@ -0,0 +1 @@
+-- GET api-root: 0 of 0 queries
@@ -0,0 +1,8 @@
+-- GET recipes-favorite: 7 of 7 queries
+SELECT "authtoken_token"."key", "authtoken_token"."user_id", "authtoken_token"."created", "users_user"."id", "users_user"."last_login", "users_user"."is_superuser", "users_user"."is_staff", "users_user"."is_active", "users_user"."date_joined", "users_user"."first_name", "users_user"."last_name", "users_user"."username", "users_user"."email", "users_user"."password", "users_user"."recipes_count", "users_user"."followers_count" FROM "authtoken_token" INNER JOIN "users_user" ON ("authtoken_token"."user_id" = "users_user"."id") WHERE "authtoken_token"."key" = '?' LIMIT ?;
+SAVEPOINT "s?";
+SELECT "recipes_recipe"."id", "recipes_recipe"."author_id", "recipes_recipe"."name", "recipes_recipe"."image", "recipes_recipe"."image_hash", "recipes_recipe"."text", "recipes_recipe"."cooking_time", "recipes_recipe"."pub_date", "recipes_recipe"."updated_at", "recipes_recipe"."search_vector", "recipes_recipe"."favorites_count" FROM "recipes_recipe" WHERE "recipes_recipe"."id" = ? LIMIT ?;
+SELECT (...) AS "a" FROM "recipes_favorite" WHERE ("recipes_favorite"."recipe_id" = ? AND "recipes_favorite"."user_id" = ?) LIMIT ?;
+INSERT INTO "recipes_favorite" ("user_id", "recipe_id") VALUES (...) RETURNING "recipes_favorite"."id";
+UPDATE "recipes_recipe" SET "favorites_count" = GREATEST(("recipes_recipe"."favorites_count" + ?), ?) WHERE "recipes_recipe"."id" = ?;
+RELEASE SAVEPOINT "s?";
@@ -0,0 +1,29 @@
+-- DELETE Users-me: 28 of 28 queries
+SELECT "authtoken_token"."key", "authtoken_token"."user_id", "authtoken_token"."created", "users_user"."id", "users_user"."last_login", "users_user"."is_superuser", "users_user"."is_staff", "users_user"."is_active", "users_user"."date_joined", "users_user"."first_name", "users_user"."last_name", "users_user"."username", "users_user"."email", "users_user"."password", "users_user"."recipes_count", "users_user"."followers_count" FROM "authtoken_token" INNER JOIN "users_user" ON ("authtoken_token"."user_id" = "users_user"."id") WHERE "authtoken_token"."key" = '?' LIMIT ?;
+SELECT "authtoken_token"."key", "authtoken_token"."user_id", "authtoken_token"."created" FROM "authtoken_token" WHERE "authtoken_token"."user_id" = ?;
+DELETE FROM "authtoken_token" WHERE "authtoken_token"."key" IN (...);
+SELECT "recipes_recipe"."id", "recipes_recipe"."author_id" FROM "recipes_recipe" WHERE "recipes_recipe"."author_id" IN (SELECT U0."id" FROM "users_user" U0 WHERE U0."id" = ?) ORDER BY "recipes_recipe"."pub_date" DESC, "recipes_recipe"."id" DESC;
+SELECT "recipes_favorite"."user_id", "recipes_favorite"."recipe_id" FROM "recipes_favorite" INNER JOIN "recipes_recipe" ON ("recipes_favorite"."recipe_id" = "recipes_recipe"."id") WHERE ("recipes_favorite"."user_id" IN (SELECT U0."id" FROM "users_user" U0 WHERE U0."id" = ?) OR "recipes_recipe"."author_id" IN (SELECT U0."id" FROM "users_user" U0 WHERE U0."id" = ?));
+SELECT "recipes_purchase"."user_id", "recipes_purchase"."recipe_id" FROM "recipes_purchase" INNER JOIN "recipes_recipe" ON ("recipes_purchase"."recipe_id" = "recipes_recipe"."id") WHERE ("recipes_purchase"."user_id" IN (SELECT U0."id" FROM "users_user" U0 WHERE U0."id" = ?) OR "recipes_recipe"."author_id" IN (SELECT U0."id" FROM "users_user" U0 WHERE U0."id" = ?));
+SELECT "users_follow"."user_id", "users_follow"."following_id" FROM "users_follow" WHERE ("users_follow"."user_id" IN (SELECT U0."id" FROM "users_user" U0 WHERE U0."id" = ?) OR "users_follow"."following_id" IN (SELECT U0."id" FROM "users_user" U0 WHERE U0."id" = ?));
+SELECT "recipes_recipe"."id" FROM "recipes_recipe" WHERE "recipes_recipe"."author_id" IN (...) ORDER BY "recipes_recipe"."pub_date" DESC, "recipes_recipe"."id" DESC;
+SELECT "authtoken_token"."key", "authtoken_token"."user_id", "authtoken_token"."created" FROM "authtoken_token" WHERE "authtoken_token"."user_id" IN (...);
+DELETE FROM "users_user_groups" WHERE "users_user_groups"."user_id" IN (...);
+DELETE FROM "users_user_user_permissions" WHERE "users_user_user_permissions"."user_id" IN (...);
+DELETE FROM "users_follow" WHERE "users_follow"."user_id" IN (...);
+DELETE FROM "users_follow" WHERE "users_follow"."following_id" IN (...);
+DELETE FROM "recipes_recipe_tags" WHERE "recipes_recipe_tags"."recipe_id" IN (...);
+DELETE FROM "recipes_favorite" WHERE "recipes_favorite"."recipe_id" IN (...);
+DELETE FROM "recipes_purchase" WHERE "recipes_purchase"."recipe_id" IN (...);
+DELETE FROM "recipes_feedentry" WHERE "recipes_feedentry"."recipe_id" IN (...);
+DELETE FROM "recipes_recipesimilarity" WHERE "recipes_recipesimilarity"."recipe_id" IN (...);
+DELETE FROM "recipes_recipeingredient" WHERE "recipes_recipeingredient"."recipe_id" IN (...);
+DELETE FROM "recipes_favorite" WHERE "recipes_favorite"."user_id" IN (...);
+DELETE FROM "recipes_purchase" WHERE "recipes_purchase"."user_id" IN (...);
+DELETE FROM "recipes_feedentry" WHERE "recipes_feedentry"."user_id" IN (...);
+DELETE FROM "django_admin_log" WHERE "django_admin_log"."user_id" IN (...);
+DELETE FROM "recipes_recipe" WHERE "recipes_recipe"."id" IN (...);
+DELETE FROM "users_user" WHERE "users_user"."id" IN (...);
+UPDATE "users_user" SET "recipes_count" = GREATEST(("users_user"."recipes_count" +  ?), ?) WHERE "users_user"."id" IN (...);
+UPDATE "recipes_recipe" SET "favorites_count" = GREATEST(("recipes_recipe"."favorites_count" + CASE WHEN ("recipes_recipe"."id" IN (...)) THEN  ? WHEN ("recipes_recipe"."id" IN (...)) THEN  ? ELSE NULL END), ?) WHERE "recipes_recipe"."id" IN (...);
+UPDATE "users_user" SET "followers_count" = GREATEST(("users_user"."followers_count" +  ?), ?) WHERE "users_user"."id" IN (...);
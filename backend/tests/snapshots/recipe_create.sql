@@ -0,0 +1,16 @@
+-- POST recipes-list: 15 of 15 queries
+SELECT "authtoken_token"."key", "authtoken_token"."user_id", "authtoken_token"."created", "users_user"."id", "users_user"."last_login", "users_user"."is_superuser", "users_user"."is_staff", "users_user"."is_active", "users_user"."date_joined", "users_user"."first_name", "users_user"."last_name", "users_user"."username", "users_user"."email", "users_user"."password", "users_user"."recipes_count", "users_user"."followers_count" FROM "authtoken_token" INNER JOIN "users_user" ON ("authtoken_token"."user_id" = "users_user"."id") WHERE "authtoken_token"."key" = '?' LIMIT ?;
+SELECT "recipes_tag"."id", "recipes_tag"."name", "recipes_tag"."color", "recipes_tag"."slug" FROM "recipes_tag" WHERE "recipes_tag"."id" IN (...);
+SELECT "recipes_ingredient"."id", "recipes_ingredient"."name", "recipes_ingredient"."measurement_unit" FROM "recipes_ingredient" WHERE "recipes_ingredient"."id" IN (...);
+SAVEPOINT "s?";
+INSERT INTO "recipes_recipe" ("author_id", "name", "image", "image_hash", "text", "cooking_time", "pub_date", "updated_at", "search_vector", "favorites_count") VALUES (?, '?', '?', '?', '?', ?, '?'::timestamptz, '?'::timestamptz, NULL, ?) RETURNING "recipes_recipe"."id";
+UPDATE "users_user" SET "recipes_count" = GREATEST(("users_user"."recipes_count" + ?), ?) WHERE "users_user"."id" = ?;
+UPDATE "recipes_recipe" SET "search_vector" = (setweight(to_tsvector('?'::regconfig, COALESCE("recipes_recipe"."name", '?')), '?') || setweight(to_tsvector('?'::regconfig, COALESCE("recipes_recipe"."text", '?')), '?')) WHERE "recipes_recipe"."id" = ?;
+INSERT INTO "recipes_recipeingredient" ("ingredient_id", "recipe_id", "amount") VALUES (...) RETURNING "recipes_recipeingredient"."id";
+SELECT "recipes_tag"."id" FROM "recipes_tag" INNER JOIN "recipes_recipe_tags" ON ("recipes_tag"."id" = "recipes_recipe_tags"."tag_id") WHERE "recipes_recipe_tags"."recipe_id" = ?;
+INSERT INTO "recipes_recipe_tags" ("recipe_id", "tag_id") VALUES (...) ON CONFLICT DO NOTHING;
+RELEASE SAVEPOINT "s?";
+SELECT "recipes_recipe"."id", "recipes_recipe"."author_id", "recipes_recipe"."name", "recipes_recipe"."image", "recipes_recipe"."image_hash", "recipes_recipe"."text", "recipes_recipe"."cooking_time", "recipes_recipe"."pub_date", "recipes_recipe"."updated_at", "recipes_recipe"."search_vector", "recipes_recipe"."favorites_count", EXISTS(SELECT U0."id", U0."user_id", U0."recipe_id" FROM "recipes_favorite" U0 WHERE (U0."recipe_id" = "recipes_recipe"."id" AND U0."user_id" = ?)) AS "is_favorited", EXISTS(SELECT U0."id", U0."user_id", U0."recipe_id" FROM "recipes_purchase" U0 WHERE (U0."recipe_id" = "recipes_recipe"."id" AND U0."user_id" = ?)) AS "is_in_shopping_cart" FROM "recipes_recipe" WHERE "recipes_recipe"."id" = ? LIMIT ?;
+SELECT ("recipes_recipe_tags"."recipe_id") AS "_prefetch_related_val_recipe_id", "recipes_tag"."id", "recipes_tag"."name", "recipes_tag"."color", "recipes_tag"."slug" FROM "recipes_tag" INNER JOIN "recipes_recipe_tags" ON ("recipes_tag"."id" = "recipes_recipe_tags"."tag_id") WHERE "recipes_recipe_tags"."recipe_id" IN (...);
+SELECT "recipes_recipeingredient"."id", "recipes_recipeingredient"."ingredient_id", "recipes_recipeingredient"."recipe_id", "recipes_recipeingredient"."amount", "recipes_ingredient"."id", "recipes_ingredient"."name", "recipes_ingredient"."measurement_unit" FROM "recipes_recipeingredient" INNER JOIN "recipes_ingredient" ON ("recipes_recipeingredient"."ingredient_id" = "recipes_ingredient"."id") WHERE "recipes_recipeingredient"."recipe_id" IN (...);
+SELECT "users_user"."id", "users_user"."last_login", "users_user"."is_superuser", "users_user"."is_staff", "users_user"."is_active", "users_user"."date_joined", "users_user"."first_name", "users_user"."last_name", "users_user"."username", "users_user"."email", "users_user"."password", "users_user"."recipes_count", "users_user"."followers_count", EXISTS(SELECT U0."id", U0."user_id", U0."following_id" FROM "users_follow" U0 WHERE (U0."following_id" = "users_user"."id" AND U0."user_id" = ?)) AS "is_subscribed" FROM "users_user" WHERE "users_user"."id" IN (...);
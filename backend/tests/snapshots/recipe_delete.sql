@@ -0,0 +1,17 @@
+-- DELETE recipes-detail: 16 of 16 queries
+SELECT "authtoken_token"."key", "authtoken_token"."user_id", "authtoken_token"."created", "users_user"."id", "users_user"."last_login", "users_user"."is_superuser", "users_user"."is_staff", "users_user"."is_active", "users_user"."date_joined", "users_user"."first_name", "users_user"."last_name", "users_user"."username", "users_user"."email", "users_user"."password", "users_user"."recipes_count", "users_user"."followers_count" FROM "authtoken_token" INNER JOIN "users_user" ON ("authtoken_token"."user_id" = "users_user"."id") WHERE "authtoken_token"."key" = '?' LIMIT ?;
+SELECT "recipes_recipe"."id", "recipes_recipe"."author_id", "recipes_recipe"."name", "recipes_recipe"."image", "recipes_recipe"."image_hash", "recipes_recipe"."text", "recipes_recipe"."cooking_time", "recipes_recipe"."pub_date", "recipes_recipe"."updated_at", "recipes_recipe"."search_vector", "recipes_recipe"."favorites_count", EXISTS(SELECT U0."id", U0."user_id", U0."recipe_id" FROM "recipes_favorite" U0 WHERE (U0."recipe_id" = "recipes_recipe"."id" AND U0."user_id" = ?)) AS "is_favorited", EXISTS(SELECT U0."id", U0."user_id", U0."recipe_id" FROM "recipes_purchase" U0 WHERE (U0."recipe_id" = "recipes_recipe"."id" AND U0."user_id" = ?)) AS "is_in_shopping_cart" FROM "recipes_recipe" WHERE "recipes_recipe"."id" = ? LIMIT ?;
+SELECT ("recipes_recipe_tags"."recipe_id") AS "_prefetch_related_val_recipe_id", "recipes_tag"."id", "recipes_tag"."name", "recipes_tag"."color", "recipes_tag"."slug" FROM "recipes_tag" INNER JOIN "recipes_recipe_tags" ON ("recipes_tag"."id" = "recipes_recipe_tags"."tag_id") WHERE "recipes_recipe_tags"."recipe_id" IN (...);
+SELECT "recipes_recipeingredient"."id", "recipes_recipeingredient"."ingredient_id", "recipes_recipeingredient"."recipe_id", "recipes_recipeingredient"."amount", "recipes_ingredient"."id", "recipes_ingredient"."name", "recipes_ingredient"."measurement_unit" FROM "recipes_recipeingredient" INNER JOIN "recipes_ingredient" ON ("recipes_recipeingredient"."ingredient_id" = "recipes_ingredient"."id") WHERE "recipes_recipeingredient"."recipe_id" IN (...);
+SELECT "users_user"."id", "users_user"."last_login", "users_user"."is_superuser", "users_user"."is_staff", "users_user"."is_active", "users_user"."date_joined", "users_user"."first_name", "users_user"."last_name", "users_user"."username", "users_user"."email", "users_user"."password", "users_user"."recipes_count", "users_user"."followers_count", EXISTS(SELECT U0."id", U0."user_id", U0."following_id" FROM "users_follow" U0 WHERE (U0."following_id" = "users_user"."id" AND U0."user_id" = ?)) AS "is_subscribed" FROM "users_user" WHERE "users_user"."id" IN (...);
+SELECT "recipes_favorite"."user_id", "recipes_favorite"."recipe_id" FROM "recipes_favorite" WHERE "recipes_favorite"."recipe_id" IN (SELECT U0."id" FROM "recipes_recipe" U0 WHERE U0."id" = ?);
+SELECT "recipes_purchase"."user_id", "recipes_purchase"."recipe_id" FROM "recipes_purchase" WHERE "recipes_purchase"."recipe_id" IN (SELECT U0."id" FROM "recipes_recipe" U0 WHERE U0."id" = ?);
+DELETE FROM "recipes_recipe_tags" WHERE "recipes_recipe_tags"."recipe_id" IN (...);
+DELETE FROM "recipes_favorite" WHERE "recipes_favorite"."recipe_id" IN (...);
+DELETE FROM "recipes_purchase" WHERE "recipes_purchase"."recipe_id" IN (...);
+DELETE FROM "recipes_feedentry" WHERE "recipes_feedentry"."recipe_id" IN (...);
+DELETE FROM "recipes_recipesimilarity" WHERE "recipes_recipesimilarity"."recipe_id" IN (...);
+DELETE FROM "recipes_recipeingredient" WHERE "recipes_recipeingredient"."recipe_id" IN (...);
+DELETE FROM "recipes_recipe" WHERE "recipes_recipe"."id" IN (...);
+UPDATE "users_user" SET "recipes_count" = GREATEST(("users_user"."recipes_count" +  ?), ?) WHERE "users_user"."id" IN (...);
+UPDATE "recipes_recipe" SET "favorites_count" = GREATEST(("recipes_recipe"."favorites_count" +  ?), ?) WHERE "recipes_recipe"."id" IN (...);
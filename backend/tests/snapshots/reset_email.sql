@@ -0,0 +1,2 @@
+-- POST Users-reset-username: 1 of 1 queries
+SELECT "users_user"."id", "users_user"."last_login", "users_user"."is_superuser", "users_user"."is_staff", "users_user"."is_active", "users_user"."date_joined", "users_user"."first_name", "users_user"."last_name", "users_user"."username", "users_user"."email", "users_user"."password", "users_user"."recipes_count", "users_user"."followers_count" FROM "users_user" WHERE ("users_user"."email" = '?' AND "users_user"."is_active" = true) LIMIT ?;
@@ -0,0 +1,3 @@
+-- POST Users-reset-password-confirm: 2 of 2 queries
+SELECT "users_user"."id", "users_user"."last_login", "users_user"."is_superuser", "users_user"."is_staff", "users_user"."is_active", "users_user"."date_joined", "users_user"."first_name", "users_user"."last_name", "users_user"."username", "users_user"."email", "users_user"."password", "users_user"."recipes_count", "users_user"."followers_count" FROM "users_user" WHERE "users_user"."id" = ? LIMIT ?;
+UPDATE "users_user" SET "last_login" = '?'::timestamptz, "is_superuser" = false, "is_staff" = false, "is_active" = true, "date_joined" = '?'::timestamptz, "first_name" = '?', "last_name" = '?', "username" = '?', "email" = '?', "password" = '?', "recipes_count" = ?, "followers_count" = ? WHERE "users_user"."id" = ?;
@@ -0,0 +1,3 @@
+-- GET download_shopping_cart: 2 of 2 queries
+SELECT "authtoken_token"."key", "authtoken_token"."user_id", "authtoken_token"."created", "users_user"."id", "users_user"."last_login", "users_user"."is_superuser", "users_user"."is_staff", "users_user"."is_active", "users_user"."date_joined", "users_user"."first_name", "users_user"."last_name", "users_user"."username", "users_user"."email", "users_user"."password", "users_user"."recipes_count", "users_user"."followers_count" FROM "authtoken_token" INNER JOIN "users_user" ON ("authtoken_token"."user_id" = "users_user"."id") WHERE "authtoken_token"."key" = '?' LIMIT ?;
+DECLARE "_django_curs_?" NO SCROLL CURSOR WITHOUT HOLD FOR SELECT "recipes_ingredient"."name", "recipes_ingredient"."measurement_unit", SUM("recipes_recipeingredient"."amount") AS "total_amount" FROM "recipes_recipeingredient" INNER JOIN "recipes_recipe" ON ("recipes_recipeingredient"."recipe_id" = "recipes_recipe"."id") INNER JOIN "recipes_purchase" ON ("recipes_recipe"."id" = "recipes_purchase"."recipe_id") INNER JOIN "recipes_ingredient" ON ("recipes_recipeingredient"."ingredient_id" = "recipes_ingredient"."id") WHERE "recipes_purchase"."user_id" = ? GROUP BY "recipes_ingredient"."name", "recipes_ingredient"."measurement_unit" ORDER BY "recipes_ingredient"."name" ASC, "recipes_ingredient"."measurement_unit" ASC;
@@ -0,0 +1,4 @@
+-- DELETE shopping_cart: 3 of 3 queries
+SELECT "authtoken_token"."key", "authtoken_token"."user_id", "authtoken_token"."created", "users_user"."id", "users_user"."last_login", "users_user"."is_superuser", "users_user"."is_staff", "users_user"."is_active", "users_user"."date_joined", "users_user"."first_name", "users_user"."last_name", "users_user"."username", "users_user"."email", "users_user"."password", "users_user"."recipes_count", "users_user"."followers_count" FROM "authtoken_token" INNER JOIN "users_user" ON ("authtoken_token"."user_id" = "users_user"."id") WHERE "authtoken_token"."key" = '?' LIMIT ?;
+SELECT "recipes_purchase"."id", "recipes_purchase"."user_id", "recipes_purchase"."recipe_id" FROM "recipes_purchase" WHERE ("recipes_purchase"."recipe_id" = ? AND "recipes_purchase"."user_id" = ?) LIMIT ?;
+DELETE FROM "recipes_purchase" WHERE "recipes_purchase"."id" IN (...);
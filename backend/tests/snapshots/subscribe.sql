@@ -0,0 +1,16 @@
+-- GET Users-subscribe: 15 of 15 queries
+SELECT "authtoken_token"."key", "authtoken_token"."user_id", "authtoken_token"."created", "users_user"."id", "users_user"."last_login", "users_user"."is_superuser", "users_user"."is_staff", "users_user"."is_active", "users_user"."date_joined", "users_user"."first_name", "users_user"."last_name", "users_user"."username", "users_user"."email", "users_user"."password", "users_user"."recipes_count", "users_user"."followers_count" FROM "authtoken_token" INNER JOIN "users_user" ON ("authtoken_token"."user_id" = "users_user"."id") WHERE "authtoken_token"."key" = '?' LIMIT ?;
+SAVEPOINT "s?";
+SELECT "users_user"."id", "users_user"."last_login", "users_user"."is_superuser", "users_user"."is_staff", "users_user"."is_active", "users_user"."date_joined", "users_user"."first_name", "users_user"."last_name", "users_user"."username", "users_user"."email", "users_user"."password", "users_user"."recipes_count", "users_user"."followers_count" FROM "users_user" WHERE "users_user"."id" = ? LIMIT ?;
+SELECT (...) AS "a" FROM "users_follow" WHERE ("users_follow"."following_id" = ? AND "users_follow"."user_id" = ?) LIMIT ?;
+SELECT "users_user"."id", "users_user"."last_login", "users_user"."is_superuser", "users_user"."is_staff", "users_user"."is_active", "users_user"."date_joined", "users_user"."first_name", "users_user"."last_name", "users_user"."username", "users_user"."email", "users_user"."password", "users_user"."recipes_count", "users_user"."followers_count" FROM "users_user" WHERE "users_user"."id" = ? LIMIT ?;
+INSERT INTO "users_follow" ("user_id", "following_id") VALUES (...) RETURNING "users_follow"."id";
+UPDATE "users_user" SET "followers_count" = GREATEST(("users_user"."followers_count" + ?), ?) WHERE "users_user"."id" = ?;
+SELECT "recipes_recipe"."id" FROM "recipes_recipe" WHERE "recipes_recipe"."author_id" = ? ORDER BY "recipes_recipe"."pub_date" DESC, "recipes_recipe"."id" DESC LIMIT ?;
+INSERT INTO "recipes_feedentry" ("user_id", "recipe_id") VALUES (...) ON CONFLICT DO NOTHING;
+DELETE FROM "recipes_feedentry" WHERE ("recipes_feedentry"."recipe_id" < (SELECT U0."recipe_id" FROM "recipes_feedentry" U0 WHERE U0."user_id" = "recipes_feedentry"."user_id" ORDER BY U0."recipe_id" DESC LIMIT ? OFFSET ?) AND "recipes_feedentry"."user_id" IN (...));
+SELECT "recipes_favorite"."recipe_id" FROM "recipes_favorite" WHERE "recipes_favorite"."user_id" = ?;
+SELECT "recipes_purchase"."recipe_id" FROM "recipes_purchase" WHERE "recipes_purchase"."user_id" = ?;
+SELECT "users_follow"."following_id" FROM "users_follow" WHERE "users_follow"."user_id" = ?;
+SELECT "recipes_recipe"."id", "recipes_recipe"."author_id", "recipes_recipe"."name", "recipes_recipe"."image", "recipes_recipe"."image_hash", "recipes_recipe"."text", "recipes_recipe"."cooking_time", "recipes_recipe"."pub_date", "recipes_recipe"."updated_at", "recipes_recipe"."search_vector", "recipes_recipe"."favorites_count" FROM "recipes_recipe" WHERE "recipes_recipe"."author_id" = ? ORDER BY "recipes_recipe"."id" DESC LIMIT ?;
+RELEASE SAVEPOINT "s?";
@@ -0,0 +1,5 @@
+-- GET Users-subscriptions: 4 of 4 queries
+SELECT "authtoken_token"."key", "authtoken_token"."user_id", "authtoken_token"."created", "users_user"."id", "users_user"."last_login", "users_user"."is_superuser", "users_user"."is_staff", "users_user"."is_active", "users_user"."date_joined", "users_user"."first_name", "users_user"."last_name", "users_user"."username", "users_user"."email", "users_user"."password", "users_user"."recipes_count", "users_user"."followers_count" FROM "authtoken_token" INNER JOIN "users_user" ON ("authtoken_token"."user_id" = "users_user"."id") WHERE "authtoken_token"."key" = '?' LIMIT ?;
+SELECT COUNT(*) FROM (SELECT "users_user"."id" AS Col1 FROM "users_user" INNER JOIN "users_follow" ON ("users_user"."id" = "users_follow"."following_id") WHERE "users_follow"."user_id" = ? LIMIT ?) subquery;
+SELECT "users_user"."id", "users_user"."last_login", "users_user"."is_superuser", "users_user"."is_staff", "users_user"."is_active", "users_user"."date_joined", "users_user"."first_name", "users_user"."last_name", "users_user"."username", "users_user"."email", "users_user"."password", "users_user"."recipes_count", "users_user"."followers_count", true AS "is_subscribed" FROM "users_user" INNER JOIN "users_follow" ON ("users_user"."id" = "users_follow"."following_id") WHERE "users_follow"."user_id" = ? ORDER BY "users_user"."id" ASC LIMIT ?;
+(SELECT "recipes_recipe"."id", "recipes_recipe"."author_id", "recipes_recipe"."name", "recipes_recipe"."image", "recipes_recipe"."image_hash", "recipes_recipe"."text", "recipes_recipe"."cooking_time", "recipes_recipe"."pub_date", "recipes_recipe"."updated_at", "recipes_recipe"."search_vector", "recipes_recipe"."favorites_count" FROM "recipes_recipe" WHERE "recipes_recipe"."author_id" = ? ORDER BY "recipes_recipe"."id" DESC LIMIT ?) UNION ALL (SELECT "recipes_recipe"."id", "recipes_recipe"."author_id", "recipes_recipe"."name", "recipes_recipe"."image", "recipes_recipe"."image_hash", "recipes_recipe"."text", "recipes_recipe"."cooking_time", "recipes_recipe"."pub_date", "recipes_recipe"."updated_at", "recipes_recipe"."search_vector", "recipes_recipe"."favorites_count" FROM "recipes_recipe" WHERE "recipes_recipe"."author_id" = ? ORDER BY "recipes_recipe"."id" DESC LIMIT ?) ORDER BY (...) DESC;
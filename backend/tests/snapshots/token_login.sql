@@ -0,0 +1,4 @@
+-- POST login: 3 of 3 queries
+SELECT "users_user"."id", "users_user"."last_login", "users_user"."is_superuser", "users_user"."is_staff", "users_user"."is_active", "users_user"."date_joined", "users_user"."first_name", "users_user"."last_name", "users_user"."username", "users_user"."email", "users_user"."password", "users_user"."recipes_count", "users_user"."followers_count" FROM "users_user" WHERE "users_user"."email" = '?' LIMIT ?;
+SELECT "authtoken_token"."key", "authtoken_token"."user_id", "authtoken_token"."created" FROM "authtoken_token" WHERE "authtoken_token"."user_id" = ? LIMIT ?;
+UPDATE "users_user" SET "last_login" = '?'::timestamptz WHERE "users_user"."id" = ?;
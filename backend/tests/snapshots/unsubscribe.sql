@@ -0,0 +1,9 @@
+-- DELETE Users-subscribe: 8 of 8 queries
+SELECT "authtoken_token"."key", "authtoken_token"."user_id", "authtoken_token"."created", "users_user"."id", "users_user"."last_login", "users_user"."is_superuser", "users_user"."is_staff", "users_user"."is_active", "users_user"."date_joined", "users_user"."first_name", "users_user"."last_name", "users_user"."username", "users_user"."email", "users_user"."password", "users_user"."recipes_count", "users_user"."followers_count" FROM "authtoken_token" INNER JOIN "users_user" ON ("authtoken_token"."user_id" = "users_user"."id") WHERE "authtoken_token"."key" = '?' LIMIT ?;
+SAVEPOINT "s?";
+SELECT "users_user"."id", "users_user"."last_login", "users_user"."is_superuser", "users_user"."is_staff", "users_user"."is_active", "users_user"."date_joined", "users_user"."first_name", "users_user"."last_name", "users_user"."username", "users_user"."email", "users_user"."password", "users_user"."recipes_count", "users_user"."followers_count" FROM "users_user" WHERE "users_user"."id" = ? LIMIT ?;
+SELECT "users_follow"."id", "users_follow"."user_id", "users_follow"."following_id" FROM "users_follow" WHERE ("users_follow"."following_id" = ? AND "users_follow"."user_id" = ?) LIMIT ?;
+DELETE FROM "users_follow" WHERE "users_follow"."id" IN (...);
+UPDATE "users_user" SET "followers_count" = GREATEST(("users_user"."followers_count" +  ?), ?) WHERE "users_user"."id" IN (...);
+DELETE FROM "recipes_feedentry" WHERE "recipes_feedentry"."id" IN (SELECT U0."id" FROM "recipes_feedentry" U0 INNER JOIN "recipes_recipe" U1 ON (U0."recipe_id" = U1."id") WHERE (U1."author_id" = ? AND U0."user_id" = ?));
+RELEASE SAVEPOINT "s?";
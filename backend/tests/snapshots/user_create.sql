@@ -0,0 +1,6 @@
+-- POST Users-list: 5 of 5 queries
+SELECT (...) AS "a" FROM "users_user" WHERE "users_user"."username" = '?' LIMIT ?;
+SELECT (...) AS "a" FROM "users_user" WHERE "users_user"."email" = '?' LIMIT ?;
+SAVEPOINT "s?";
+INSERT INTO "users_user" ("last_login", "is_superuser", "is_staff", "is_active", "date_joined", "first_name", "last_name", "username", "email", "password", "recipes_count", "followers_count") VALUES (NULL, false, false, true, '?'::timestamptz, '?', '?', '?', '?', '?', ?, ?) RETURNING "users_user"."id";
+RELEASE SAVEPOINT "s?";
@@ -0,0 +1,9 @@
+-- PUT Users-detail: 8 of 8 queries
+SELECT "authtoken_token"."key", "authtoken_token"."user_id", "authtoken_token"."created", "users_user"."id", "users_user"."last_login", "users_user"."is_superuser", "users_user"."is_staff", "users_user"."is_active", "users_user"."date_joined", "users_user"."first_name", "users_user"."last_name", "users_user"."username", "users_user"."email", "users_user"."password", "users_user"."recipes_count", "users_user"."followers_count" FROM "authtoken_token" INNER JOIN "users_user" ON ("authtoken_token"."user_id" = "users_user"."id") WHERE "authtoken_token"."key" = '?' LIMIT ?;
+SELECT "users_user"."id", "users_user"."last_login", "users_user"."is_superuser", "users_user"."is_staff", "users_user"."is_active", "users_user"."date_joined", "users_user"."first_name", "users_user"."last_name", "users_user"."username", "users_user"."email", "users_user"."password", "users_user"."recipes_count", "users_user"."followers_count" FROM "users_user" WHERE "users_user"."id" = ? LIMIT ?;
+SELECT (...) AS "a" FROM "users_user" WHERE ("users_user"."email" = '?' AND NOT ("users_user"."id" = ?)) LIMIT ?;
+SELECT (...) AS "a" FROM "users_user" WHERE ("users_user"."username" = '?' AND NOT ("users_user"."id" = ?)) LIMIT ?;
+UPDATE "users_user" SET "last_login" = NULL, "is_superuser" = false, "is_staff" = false, "is_active" = true, "date_joined" = '?'::timestamptz, "first_name" = '?', "last_name" = '?', "username" = '?', "email" = '?', "password" = '?', "recipes_count" = ?, "followers_count" = ? WHERE "users_user"."id" = ?;
+SELECT "recipes_favorite"."recipe_id" FROM "recipes_favorite" WHERE "recipes_favorite"."user_id" = ?;
+SELECT "recipes_purchase"."recipe_id" FROM "recipes_purchase" WHERE "recipes_purchase"."user_id" = ?;
+SELECT "users_follow"."following_id" FROM "users_follow" WHERE "users_follow"."user_id" = ?;
@@ -0,0 +1,7 @@
+-- GET Users-list: 6 of 6 queries
+SELECT "authtoken_token"."key", "authtoken_token"."user_id", "authtoken_token"."created", "users_user"."id", "users_user"."last_login", "users_user"."is_superuser", "users_user"."is_staff", "users_user"."is_active", "users_user"."date_joined", "users_user"."first_name", "users_user"."last_name", "users_user"."username", "users_user"."email", "users_user"."password", "users_user"."recipes_count", "users_user"."followers_count" FROM "authtoken_token" INNER JOIN "users_user" ON ("authtoken_token"."user_id" = "users_user"."id") WHERE "authtoken_token"."key" = '?' LIMIT ?;
+SELECT COUNT(*) AS "__count" FROM "users_user";
+SELECT "users_user"."id", "users_user"."last_login", "users_user"."is_superuser", "users_user"."is_staff", "users_user"."is_active", "users_user"."date_joined", "users_user"."first_name", "users_user"."last_name", "users_user"."username", "users_user"."email", "users_user"."password", "users_user"."recipes_count", "users_user"."followers_count" FROM "users_user" LIMIT ?;
+SELECT "recipes_favorite"."recipe_id" FROM "recipes_favorite" WHERE "recipes_favorite"."user_id" = ?;
+SELECT "recipes_purchase"."recipe_id" FROM "recipes_purchase" WHERE "recipes_purchase"."user_id" = ?;
+SELECT "users_follow"."following_id" FROM "users_follow" WHERE "users_follow"."user_id" = ?;
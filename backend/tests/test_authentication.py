@@ -0,0 +1,111 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from users.authentication import tokens
+from .factories import PASSWORD, create_user
+from .processes import run_in_process
+
+ME = '/api/users/me/'
+
+
+@pytest.fixture
+def user(transactional_db):
+    cache.clear()
+    tokens.clear()
+    return create_user('auth')
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    token = Token.objects.create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+def token_queries(client):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(ME)
+    return response, [
+        query for query in queries if 'authtoken_token' in query['sql']
+    ]
+
+
+def warm_up(client):
+    assert client.get(ME).status_code == 200
+
+
+def test_warm_request_skips_token_query(client):
+    warm_up(client)
+    response, queries = token_queries(client)
+    assert response.status_code == 200
+    assert queries == []
+
+
+def test_logout_revokes_cached_token(client):
+    warm_up(client)
+    assert client.post('/api/auth/token/logout/').status_code == 204
+    assert client.get(ME).status_code == 401
+
+
+def test_password_change_reloads_user(client, user):
+    warm_up(client)
+    response = client.post('/api/users/set_password/', {
+        'current_password': PASSWORD, 'new_password': 'другой-пароль-42',
+    })
+    assert response.status_code == 204
+    response, queries = token_queries(client)
+    assert response.status_code == 200
+    assert len(queries) == 1
+
+
+@pytest.mark.parametrize('change', ['deactivate', 'delete'])
+def test_user_change_revokes_cached_token(client, user, change):
+    warm_up(client)
+    if change == 'deactivate':
+        user.is_active = False
+        user.save()
+    else:
+        user.delete()
+    assert client.get(ME).status_code == 401
+
+
+def test_revoked_in_other_process(client):
+    warm_up(client)
+    run_in_process(f'''
+        from django.test import Client
+        from django.test.utils import setup_test_environment
+
+        setup_test_environment()
+        response = Client().post(
+            '/api/auth/token/logout/',
+            HTTP_AUTHORIZATION={client._credentials['HTTP_AUTHORIZATION']!r},
+        )
+        assert response.status_code == 204, response.status_code
+    ''')
+    assert client.get(ME).status_code == 401
+
+
+@pytest.mark.parametrize('backend', ['locmem.LocMemCache', 'dummy.DummyCache'])
+def test_unshared_cache_is_not_used(client, settings, backend):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': f'django.core.cache.backends.{backend}',
+        },
+    }
+    warm_up(client)
+    response, queries = token_queries(client)
+    assert response.status_code == 200
+    assert len(queries) == 1
+
+
+def test_missing_version_is_a_miss(client, monkeypatch):
+    monkeypatch.setattr(cache, 'add', lambda *args, **kwargs: False)
+    warm_up(client)
+    response, queries = token_queries(client)
+    assert response.status_code == 200
+    assert len(queries) == 1
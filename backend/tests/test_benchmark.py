@@ -0,0 +1,27 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+
+@pytest.mark.parametrize('requests', [0, 1])
+def test_too_few_requests(db, requests):
+    with pytest.raises(CommandError):
+        call_command('benchmark', requests=requests, stdout=StringIO())
+
+
+def test_report(make_world):
+    world = make_world(5)
+    stdout = StringIO()
+    call_command(
+        'benchmark', requests=2, warmup=0, user=world.user.email,
+        stdout=stdout,
+    )
+    scenarios = json.loads(stdout.getvalue())['scenarios']
+    assert scenarios['shopping_list']['statuses'] == {'200': 2}
+    for report in scenarios.values():
+        assert report['requests'] == 2
+        assert sum(report['statuses'].values()) == 2
+        assert report['p50_ms'] <= report['p99_ms']
+        assert report['queries_per_request'] > 0
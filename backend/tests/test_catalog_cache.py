@@ -0,0 +1,46 @@
+import time
+
+from django.core.cache import cache
+
+from recipes.cache import get_catalog_version, is_shared, local_timeout
+from recipes.models import Tag
+from .processes import run_in_process
+
+
+def test_shared_cache_keeps_catalog_timeout(settings):
+    assert is_shared()
+    assert local_timeout(None) is None
+    assert local_timeout(settings.CATALOG_CACHE_TIMEOUT) == (
+        settings.CATALOG_CACHE_TIMEOUT
+    )
+
+
+def test_process_cache_expires_catalog(settings):
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }}
+    settings.LOCAL_CACHE_TIMEOUT = 30
+    assert not is_shared()
+    assert local_timeout(None) == 30
+    assert local_timeout(settings.CATALOG_CACHE_TIMEOUT) == 30
+    get_catalog_version()
+    expires_at = cache._expire_info[cache.make_key('catalog:version')]
+    assert expires_at <= time.time() + 30
+
+
+def test_catalog_change_in_other_process_is_visible(transactional_db,
+                                                    client):
+    Tag.objects.create(name='Завтрак', color='#FF0000', slug='breakfast')
+    response = client.get('/api/tags/')
+    assert [tag['slug'] for tag in response.json()] == ['breakfast']
+    run_in_process('''
+        from recipes.models import Tag
+        Tag.objects.create(name='Ужин', color='#0000FF', slug='dinner')
+    ''')
+    response = client.get('/api/tags/', HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == 200
+    assert [tag['slug'] for tag in response.json()] == [
+        'breakfast', 'dinner',
+    ]
+    response = client.get('/api/recipes/?tags=dinner')
+    assert response.status_code == 200
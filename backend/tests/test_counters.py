@@ -0,0 +1,67 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from recipes.models import Favorite, Recipe
+from users.counters import COUNTERS, recount
+from users.models import Follow, User
+
+SIZE = 5
+
+
+def drift():
+    """
+    Число строк, в которых счетчик разошелся с фактическими данными
+    """
+    return sum(recount(*counter) for counter in COUNTERS)
+
+
+@pytest.fixture
+def world(make_world):
+    """
+    World создает избранное через bulk_create, минуя счетчики,
+    поэтому они выравниваются перед проверкой
+    """
+    world = make_world(SIZE)
+    drift()
+    return world
+
+
+def test_counters_follow_changes(world):
+    recipe = world.own_recipes[1]
+    recipe.refresh_from_db()
+    assert recipe.favorites_count == SIZE
+    Favorite.objects.filter(recipe=recipe, user__in=world.authors[:2]).delete()
+    recipe.refresh_from_db()
+    assert recipe.favorites_count == SIZE - 2
+    Follow.objects.get(user=world.user, following=world.authors[1]).delete()
+    assert User.objects.get(pk=world.authors[1].pk).followers_count == 0
+    assert drift() == 0
+
+
+@pytest.mark.parametrize('deleted', [
+    lambda world: world.user,
+    lambda world: world.authors[1],
+    lambda world: world.own_recipes[1],
+    lambda world: world.recipes[2],
+], ids=['user', 'author', 'favorited_recipe', 'recipe'])
+def test_cascade_keeps_counters_exact(world, deleted):
+    deleted(world).delete()
+    assert drift() == 0
+
+
+def test_queryset_delete_keeps_counters_exact(world):
+    Recipe.objects.filter(author__in=world.authors[:3]).delete()
+    User.objects.filter(pk__in=[world.user.pk, world.authors[4].pk]).delete()
+    assert drift() == 0
+
+
+def test_recount_command_fixes_drift(world):
+    User.objects.filter(pk=world.user.pk).update(recipes_count=7)
+    Recipe.objects.update(favorites_count=0)
+    stdout = StringIO()
+    call_command('recount', stdout=stdout)
+    assert 'users.User.recipes_count: исправлено строк 1' in stdout.getvalue()
+    assert drift() == 0
+    assert User.objects.get(pk=world.user.pk).recipes_count == 2
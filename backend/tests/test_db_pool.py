@@ -0,0 +1,132 @@
+import gc
+import os
+import runpy
+
+import psycopg2
+import pytest
+from django.db import connection
+from django.db.backends.base.base import NO_DB_ALIAS
+from rest_framework.test import APIClient
+
+from api_foodgram.db_pool.base import DatabaseWrapper
+from api_foodgram.db_pool.pool import ConnectionPool, PoolTimeout, get_pool
+from .factories import create_user
+from .processes import BACKEND_DIR
+
+
+@pytest.fixture
+def make_pool(db):
+    params = connection.get_connection_params()
+    pools = []
+
+    def make_pool(max_size=2, timeout=1, max_age=60, check_after=60):
+        pool = ConnectionPool('default', params['database'], max_size,
+                              timeout, max_age, check_after)
+        pools.append(pool)
+        return pool, lambda: psycopg2.connect(**params)
+
+    yield make_pool
+    for pool in pools:
+        for idle, _ in pool.idle:
+            idle.close()
+
+
+def test_connection_is_reused(make_pool):
+    pool, connect = make_pool()
+    first = pool.checkout(connect)
+    pool.checkin(first)
+    assert pool.checkout(connect) is first
+    assert pool.snapshot()['created'] == 1
+    assert pool.snapshot()['checkouts'] == 2
+    assert pool.snapshot()['in_use'] == 1
+
+
+def test_exhausted_pool_waits_and_times_out(make_pool):
+    pool, connect = make_pool(max_size=1, timeout=0.05)
+    busy = pool.checkout(connect)
+    with pytest.raises(PoolTimeout):
+        pool.checkout(connect)
+    stats = pool.snapshot()
+    assert (stats['waits'], stats['timeouts'], stats['created']) == (1, 1, 1)
+    pool.checkin(busy)
+
+
+def test_open_transaction_is_rolled_back(make_pool):
+    pool, connect = make_pool()
+    conn = pool.checkout(connect)
+    with conn.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    pool.checkin(conn)
+    assert conn.get_transaction_status() == (
+        psycopg2.extensions.TRANSACTION_STATUS_IDLE
+    )
+
+
+def test_dead_connection_is_replaced(make_pool):
+    pool, connect = make_pool(check_after=0)
+    dead = pool.checkout(connect)
+    pool.checkin(dead)
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_terminate_backend(%s)',
+                       [dead.get_backend_pid()])
+    fresh = pool.checkout(connect)
+    assert fresh is not dead
+    stats = pool.snapshot()
+    assert (stats['failed_checks'], stats['recycled']) == (1, 1)
+    pool.checkin(fresh)
+
+
+def test_old_connection_is_recycled(make_pool):
+    pool, connect = make_pool(max_age=0)
+    old = pool.checkout(connect)
+    pool.checkin(old)
+    assert old.closed
+    assert pool.snapshot()['recycled'] == 1
+    assert pool.snapshot()['idle'] == 0
+
+
+def test_idle_connections_are_closed(make_pool):
+    pool, connect = make_pool()
+    conn = pool.checkout(connect)
+    pool.checkin(conn)
+    pool.close_idle()
+    assert conn.closed
+    assert pool.snapshot()['idle'] == 0
+
+
+def test_nodb_connection_is_not_pooled(db):
+    params = connection.get_connection_params()
+    assert get_pool(NO_DB_ALIAS, params) is None
+
+
+def test_lost_connection_frees_slot(db, settings):
+    settings.DB_POOL_MAX_SIZE = 1
+    wrapper = DatabaseWrapper({
+        **connection.settings_dict,
+        'OPTIONS': {'application_name': 'lost-connection'},
+    })
+    wrapper.ensure_connection()
+    pool, conn = wrapper.pool, wrapper.connection
+    assert pool.snapshot()['in_use'] == 1
+    del wrapper
+    gc.collect()
+    assert conn.closed
+    assert pool.snapshot()['in_use'] == 0
+    assert pool.slots.acquire(blocking=False)
+    pool.slots.release()
+
+
+@pytest.mark.parametrize('is_staff, status', [(False, 403), (True, 200)])
+def test_db_pool_stats_are_staff_only(db, is_staff, status):
+    client = APIClient()
+    client.force_authenticate(create_user('pool', is_staff=is_staff))
+    response = client.get('/api/_db_pool')
+    assert response.status_code == status
+    if is_staff:
+        assert 'pools' in response.json()
+
+
+def test_gunicorn_sizes_pool_by_threads(monkeypatch):
+    monkeypatch.setattr(os, 'environ', {'GUNICORN_THREADS': '3'})
+    runpy.run_path(str(BACKEND_DIR / 'gunicorn.conf.py'))
+    assert os.environ['DB_POOL_MAX_SIZE'] == '3'
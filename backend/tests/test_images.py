@@ -0,0 +1,71 @@
+import io
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from recipes.images import (IMAGE_FORMATS, IMAGE_VARIANTS, get_variant_name,
+                            store_image)
+
+
+def upload(size=(2000, 1000), orientation=None, name='photo.jpg'):
+    buffer = io.BytesIO()
+    image = Image.new('RGB', size, 'orange')
+    exif = Image.Exif()
+    if orientation is not None:
+        exif[0x0112] = orientation
+    image.save(buffer, 'JPEG', exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/jpeg')
+
+
+def stored_size(name):
+    with default_storage.open(name) as file, Image.open(file) as image:
+        return image.format, image.size
+
+
+def test_variants_are_resized_in_every_format():
+    name, image_hash = store_image(upload())
+    assert name == f'recipes/{image_hash}.jpg'
+    assert default_storage.exists(name)
+    for variant, (width, _) in IMAGE_VARIANTS.items():
+        for image_format, (pil_format, _) in IMAGE_FORMATS.items():
+            assert stored_size(
+                get_variant_name(image_hash, variant, image_format)
+            ) == (pil_format, (width, width // 2))
+
+
+def test_same_image_is_stored_once():
+    first = store_image(upload())
+    files_before = default_storage.listdir(f'recipes/{first[1]}')
+    assert store_image(upload(name='copy.JPG')) == first
+    assert default_storage.listdir(f'recipes/{first[1]}') == files_before
+    assert default_storage.listdir('recipes')[1] == [
+        f'{first[1]}.jpg'
+    ]
+
+
+def test_exif_orientation_is_applied():
+    _, image_hash = store_image(upload(orientation=6))
+    assert stored_size(
+        get_variant_name(image_hash, 'thumbnail', 'jpeg')
+    ) == ('JPEG', (160, 320))
+
+
+def test_small_image_is_not_upscaled():
+    _, image_hash = store_image(upload(size=(100, 50)))
+    assert stored_size(
+        get_variant_name(image_hash, 'full', 'webp')
+    ) == ('WEBP', (100, 50))
+
+
+def test_recipe_exposes_variant_urls(make_world):
+    world = make_world(5)
+    response = world.client.post(
+        '/api/recipes/', world.recipe_payload(), format='json'
+    )
+    assert response.status_code == 201
+    data = response.json()
+    assert set(data['image_variants']) == set(IMAGE_VARIANTS)
+    for urls in data['image_variants'].values():
+        assert set(urls) == set(IMAGE_FORMATS)
+    assert data['image'] == data['image_variants']['full']['jpeg']
@@ -0,0 +1,58 @@
+from recipes import ingredient_index
+from recipes.ingredient_index import IngredientIndex
+from recipes.models import Ingredient
+
+INGREDIENTS = [
+    (1, 'Сахарная пудра', 'г'),
+    (2, 'Сахар', 'г'),
+    (3, 'Ванильный сахар', 'г'),
+    (4, 'Тростниковый сахар', 'кг'),
+    (5, 'Ёжевика', 'г'),
+    (6, 'Соль', 'г'),
+]
+
+
+def names(rows):
+    return [row['name'] for row in rows]
+
+
+def test_prefix_matches_come_before_substring_matches():
+    index = IngredientIndex(INGREDIENTS)
+    assert names(index.search('сах', 10)) == [
+        'Сахар', 'Сахарная пудра', 'Ванильный сахар', 'Тростниковый сахар',
+    ]
+
+
+def test_search_is_case_and_yo_insensitive():
+    index = IngredientIndex(INGREDIENTS)
+    assert names(index.search('  ЕЖЕ ', 10)) == ['Ёжевика']
+
+
+def test_short_query_matches_substrings():
+    index = IngredientIndex(INGREDIENTS)
+    assert names(index.search('ль', 10)) == ['Ванильный сахар', 'Соль']
+
+
+def test_limit_and_measurement_unit():
+    index = IngredientIndex(INGREDIENTS)
+    assert names(index.search('сах', 2)) == ['Сахар', 'Сахарная пудра']
+    assert names(index.search('сах', 10, 'кг')) == ['Тростниковый сахар']
+
+
+def test_index_is_rebuilt_after_catalog_change(transactional_db):
+    ingredient_index._index = None
+    Ingredient.objects.create(name='Мука', measurement_unit='г')
+    assert names(ingredient_index.search('мук')) == ['Мука']
+    Ingredient.objects.create(name='Мука рисовая', measurement_unit='г')
+    assert names(ingredient_index.search('мук')) == ['Мука', 'Мука рисовая']
+
+
+def test_endpoint_returns_ranked_rows(db, client):
+    Ingredient.objects.bulk_create(
+        Ingredient(pk=pk, name=name, measurement_unit=unit)
+        for pk, name, unit in INGREDIENTS
+    )
+    ingredient_index._index = None
+    response = client.get('/api/ingredients/', {'name': 'сахар'})
+    assert response.status_code == 200
+    assert [row['id'] for row in response.json()] == [2, 1, 3, 4]
@@ -0,0 +1,63 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from recipes.cache import get_catalog_version
+from recipes.models import Ingredient, Tag
+
+INGREDIENTS = [
+    {'name': 'Мука', 'measurement_unit': 'г'},
+    {'name': 'Молоко', 'measurement_unit': 'мл'},
+]
+
+
+def load(**options):
+    return call_command('load_catalog', stdout=StringIO(), **options)
+
+
+def test_json_ingredients_are_loaded_once(db, tmp_path):
+    path = tmp_path / 'ingredients.json'
+    path.write_text(json.dumps(INGREDIENTS), encoding='utf-8')
+    load(ingredients=str(path))
+    load(ingredients=str(path))
+    assert sorted(Ingredient.objects.values_list(
+        'name', 'measurement_unit'
+    )) == [('Молоко', 'мл'), ('Мука', 'г')]
+
+
+@pytest.mark.parametrize('header', ['', 'name,measurement_unit\n'])
+def test_csv_with_and_without_header(db, tmp_path, header):
+    path = tmp_path / 'ingredients.csv'
+    path.write_text(header + 'Мука,г\nМолоко,мл\n', encoding='utf-8')
+    load(ingredients=str(path))
+    assert Ingredient.objects.count() == 2
+
+
+def test_tags_are_updated_by_slug(db, tmp_path):
+    Tag.objects.create(name='Завтрак', color='#000000', slug='breakfast')
+    path = tmp_path / 'tags.csv'
+    path.write_text(
+        'Утро,#FFAA00,breakfast\nУжин,#0000FF,dinner\n', encoding='utf-8'
+    )
+    load(tags=str(path))
+    load(tags=str(path))
+    assert sorted(Tag.objects.values_list('slug', 'name', 'color')) == [
+        ('breakfast', 'Утро', '#FFAA00'),
+        ('dinner', 'Ужин', '#0000FF'),
+    ]
+
+
+def test_catalog_version_is_bumped(db, tmp_path):
+    path = tmp_path / 'ingredients.json'
+    path.write_text(json.dumps(INGREDIENTS), encoding='utf-8')
+    version = get_catalog_version()
+    load(ingredients=str(path), batch_size=1)
+    assert get_catalog_version() != version
+
+
+@pytest.mark.parametrize('files', [{}, {'ingredients': 'catalog.txt'}])
+def test_invalid_arguments(db, files):
+    with pytest.raises(CommandError):
+        load(**files)
@@ -0,0 +1,95 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from prometheus_client import REGISTRY
+from prometheus_client.parser import text_string_to_metric_families
+from rest_framework.test import APIClient
+
+from api_foodgram.metrics import render_metrics
+from .factories import create_user
+from .processes import run_in_process
+
+
+def sample(name, view, method='GET', registry=REGISTRY):
+    return registry.get_sample_value(
+        name, {'view': view, 'method': method}
+    ) or 0
+
+
+def test_sampled_request(make_world, settings):
+    settings.METRICS_SAMPLE_RATE = 1
+    world = make_world(5)
+    count = sample('foodgram_db_queries_count', 'recipes-list')
+    queries = sample('foodgram_db_queries_sum', 'recipes-list')
+    with CaptureQueriesContext(connection) as context:
+        response = world.client.get('/api/recipes/')
+    assert response.status_code == 200
+    assert f'db;desc="{len(context)} queries"' in response['Server-Timing']
+    assert sample('foodgram_db_queries_count', 'recipes-list') == count + 1
+    assert sample('foodgram_db_queries_sum', 'recipes-list') == (
+        queries + len(context)
+    )
+
+
+def test_request_is_not_sampled(make_world):
+    world = make_world(5)
+    count = sample('foodgram_db_queries_count', 'recipes-list')
+    response = world.client.get('/api/recipes/')
+    assert 'Server-Timing' not in response
+    assert sample('foodgram_db_queries_count', 'recipes-list') == count
+
+
+def test_streaming_queries_are_counted(make_world, settings):
+    settings.METRICS_SAMPLE_RATE = 1
+    world = make_world(5)
+    view = 'download_shopping_cart'
+    count = sample('foodgram_db_queries_count', view)
+    queries = sample('foodgram_db_queries_sum', view)
+    with CaptureQueriesContext(connection) as context:
+        response = world.client.get(
+            '/api/recipes/download_shopping_cart/?format=txt'
+        )
+        assert sample('foodgram_db_queries_count', view) == count
+        content = b''.join(response.streaming_content)
+    assert content
+    assert sample('foodgram_db_queries_count', view) == count + 1
+    assert sample('foodgram_db_queries_sum', view) == (
+        queries + len(context)
+    )
+
+
+def test_metrics_view(db):
+    client = APIClient()
+    client.force_authenticate(create_user('metrics-admin', is_staff=True))
+    response = client.get('/api/_metrics')
+    assert response.status_code == 200
+    assert response['Content-Type'] == (
+        'text/plain; version=0.0.4; charset=utf-8'
+    )
+    assert b'# TYPE foodgram_request_duration_seconds histogram' in (
+        response.content
+    )
+    client.force_authenticate(create_user('metrics-user'))
+    assert client.get('/api/_metrics').status_code == 403
+
+
+def test_workers_share_metrics(transactional_db, tmp_path, monkeypatch):
+    path = tmp_path / 'prometheus'
+    path.mkdir()
+    monkeypatch.setenv('prometheus_multiproc_dir', str(path))
+    for _ in range(2):
+        run_in_process('''
+            from django.test import Client
+            from django.test.utils import setup_test_environment
+
+            setup_test_environment()
+            settings.METRICS_SAMPLE_RATE = 1
+            assert Client().get('/api/tags/').status_code == 200
+        ''')
+    samples = {
+        (sample.name, sample.labels.get('view')): sample.value
+        for family in text_string_to_metric_families(
+            render_metrics().decode()
+        )
+        for sample in family.samples
+    }
+    assert samples['foodgram_request_duration_seconds_count', 'tags-list'] == 2
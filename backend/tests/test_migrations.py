@@ -0,0 +1,40 @@
+from importlib import import_module
+
+from django.apps import apps
+from django.db import connection
+
+from recipes.models import Ingredient, RecipeIngredient
+
+merge = import_module('recipes.migrations.0004_merge_duplicate_ingredients')
+
+
+def test_duplicate_ingredients_are_merged(make_world):
+    """
+    Уникальность ингредиентов снимается внутри транзакции теста,
+    чтобы воспроизвести данные до миграции 0005
+    """
+    world = make_world(5)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'ALTER TABLE recipes_ingredient DROP CONSTRAINT unique_ingredient'
+        )
+    kept = world.ingredients[0]
+    duplicate = Ingredient.objects.create(
+        name=kept.name, measurement_unit=kept.measurement_unit
+    )
+    recipe, other = world.recipes[:2]
+    RecipeIngredient.objects.create(
+        recipe=recipe, ingredient=duplicate, amount=5
+    )
+    RecipeIngredient.objects.create(
+        recipe=other, ingredient=duplicate, amount=7
+    )
+    RecipeIngredient.objects.filter(recipe=other, ingredient=kept).delete()
+    merge.merge_duplicate_ingredients(apps, None)
+    assert not Ingredient.objects.filter(pk=duplicate.pk).exists()
+    assert list(RecipeIngredient.objects.filter(
+        recipe=recipe, ingredient=kept
+    ).values_list('amount', flat=True)) == [15]
+    assert list(RecipeIngredient.objects.filter(
+        recipe=other, ingredient=kept
+    ).values_list('amount', flat=True)) == [7]
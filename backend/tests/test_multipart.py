@@ -0,0 +1,80 @@
+import io
+import json
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from recipes.models import Recipe
+
+
+def image_file(size=(60, 40)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'blue').save(buffer, 'PNG')
+    return SimpleUploadedFile('photo.png', buffer.getvalue(), 'image/png')
+
+
+def form(world, **fields):
+    return {
+        'name': 'Рецепт из формы',
+        'text': 'Описание',
+        'cooking_time': 20,
+        'image': image_file(),
+        'tags': [tag.id for tag in world.tags[:2]],
+        'ingredients': json.dumps([
+            {'id': ingredient.id, 'amount': 3}
+            for ingredient in world.ingredients[:2]
+        ]),
+        **fields,
+    }
+
+
+def test_create_recipe_from_form(make_world):
+    world = make_world(5)
+    response = world.client.post(
+        '/api/recipes/', form(world), format='multipart'
+    )
+    assert response.status_code == 201, response.json()
+    recipe = Recipe.objects.get(pk=response.json()['id'])
+    assert sorted(recipe.tags.values_list('id', flat=True)) == [
+        tag.id for tag in world.tags[:2]
+    ]
+    assert sorted(recipe.recipeingredient_set.values_list(
+        'ingredient_id', 'amount'
+    )) == [(ingredient.id, 3) for ingredient in world.ingredients[:2]]
+    assert recipe.image_hash
+    assert response.json()['image_variants']
+
+
+def test_large_upload_is_spooled_to_disk(make_world, settings, tmp_path):
+    settings.FILE_UPLOAD_MAX_MEMORY_SIZE = 1024
+    settings.FILE_UPLOAD_TEMP_DIR = str(tmp_path)
+    world = make_world(5)
+    response = world.client.post(
+        '/api/recipes/', form(world, image=image_file((800, 600))),
+        format='multipart',
+    )
+    assert response.status_code == 201, response.json()
+    assert Recipe.objects.get(pk=response.json()['id']).image_hash
+
+
+def test_invalid_ingredients_json(make_world):
+    world = make_world(5)
+    response = world.client.post(
+        '/api/recipes/', form(world, ingredients='[{'), format='multipart'
+    )
+    assert response.status_code == 400
+    assert 'ingredients' in response.json()
+
+
+def test_partial_update_from_form(make_world):
+    world = make_world(5)
+    recipe = world.own_recipes[0]
+    response = world.client.patch(
+        f'/api/recipes/{recipe.id}/',
+        {'name': 'Новое имя', 'image': image_file()},
+        format='multipart',
+    )
+    assert response.status_code == 200, response.json()
+    recipe.refresh_from_db()
+    assert recipe.name == 'Новое имя'
+    assert recipe.image_hash
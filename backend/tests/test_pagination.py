@@ -0,0 +1,82 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from recipes.models import Recipe
+
+
+def test_cursor_is_rejected_with_search(make_world):
+    world = make_world(5)
+    response = world.client.get('/api/recipes/?cursor=&search=рецепт')
+    assert response.status_code == 400
+    assert 'cursor' in response.json()
+
+
+def test_cursor_pages_through_equal_pub_dates(make_world):
+    world = make_world(5)
+    Recipe.objects.update(pub_date=timezone.now())
+    expected = list(Recipe.objects.order_by('-id').values_list(
+        'id', flat=True
+    ))
+    pages, queries = [], []
+    url = '/api/recipes/?cursor=&limit=4'
+    while url:
+        with CaptureQueriesContext(connection) as context:
+            response = world.client.get(url)
+        assert response.status_code == 200
+        pages.append([recipe['id'] for recipe in response.json()['results']])
+        if len(pages) > 1:
+            queries += [query['sql'] for query in context.captured_queries]
+        url = response.json()['next']
+    assert sum(pages, []) == expected
+    assert len(pages) > 2
+    assert queries
+    assert not [sql for sql in queries if 'OFFSET' in sql]
+    previous = world.client.get(response.json()['previous']).json()
+    assert [recipe['id'] for recipe in previous['results']] == pages[-2]
+
+
+def test_invalid_cursor(make_world):
+    world = make_world(5)
+    response = world.client.get('/api/recipes/?cursor=cD14')
+    assert response.status_code == 404
+
+
+def test_search_uses_page_pagination(make_world):
+    world = make_world(5)
+    response = world.client.get('/api/recipes/?search=рецепт&limit=3')
+    assert response.status_code == 200
+    assert response.json()['count'] == len(world.recipes) + 2
+
+
+@pytest.mark.parametrize('params, exact', [
+    ('', False),
+    ('&is_favorited=true', True),
+])
+def test_estimate_only_for_large_unfiltered_lists(make_world, settings,
+                                                  params, exact):
+    settings.PAGINATION_ESTIMATE_THRESHOLD = 3
+    world = make_world(5)
+    with CaptureQueriesContext(connection) as queries:
+        response = world.client.get(f'/api/recipes/?limit=2{params}')
+    explains = [
+        query for query in queries if query['sql'].startswith('EXPLAIN')
+    ]
+    assert response.json()['count_is_exact'] is exact
+    assert len(explains) == (0 if exact else 1)
+    if exact:
+        assert response.json()['count'] == len(world.recipes) - 2
+
+
+def test_small_list_is_counted_with_one_query(make_world):
+    world = make_world(5)
+    with CaptureQueriesContext(connection) as queries:
+        response = world.client.get('/api/recipes/?limit=2')
+    counts = [
+        query for query in queries
+        if query['sql'].startswith(('SELECT COUNT', 'EXPLAIN'))
+    ]
+    assert response.json()['count'] == len(world.recipes) + 2
+    assert response.json()['count_is_exact'] is True
+    assert len(counts) == 1
@@ -0,0 +1,176 @@
+import pytest
+from django.core.cache import cache
+
+from recipes import pantry
+from recipes.cache import (RECIPES_CHANGE_KEY, RECIPES_CHANGES_KEY,
+                           get_recipes_changes, record_recipes_changed)
+from recipes.pantry import PantryIndex
+
+RECIPES = [(1, 10), (2, 10), (3, 20), (4, 20)]
+INGREDIENTS = [
+    (1, 100), (1, 101),
+    (2, 100), (2, 101), (2, 102), (2, 103),
+    (3, 100), (3, 101), (3, 102), (3, 103),
+    (4, 104),
+]
+TAGS = [(1, 'breakfast'), (3, 'breakfast'), (4, 'dinner')]
+
+
+@pytest.fixture
+def index():
+    return PantryIndex(RECIPES, INGREDIENTS, TAGS)
+
+
+def test_ranked_by_coverage_then_newest(index):
+    assert index.search([100, 101, 102]) == [(1, 1.0), (3, 0.75), (2, 0.75)]
+
+
+def test_more_matches_win_on_equal_coverage():
+    index = PantryIndex(
+        [(1, 10), (2, 10)],
+        [(1, 100), (1, 101), (1, 105), (1, 106), (2, 100), (2, 105)],
+        [],
+    )
+    assert index.search([100, 101]) == [(1, 0.5), (2, 0.5)]
+
+
+@pytest.mark.parametrize('filters, expected', [
+    ({'tags': {'breakfast'}}, [1, 3]),
+    ({'tags': {'breakfast', 'dinner'}}, [1, 3]),
+    ({'tags': {'unknown'}}, []),
+    ({'author': 20}, [3]),
+    ({'include': {2, 4}}, [2]),
+    ({'exclude': {1}}, [3, 2]),
+])
+def test_filters(index, filters, expected):
+    assert [pk for pk, _ in index.search([100, 101], **filters)] == expected
+
+
+def test_unknown_ingredients(index):
+    assert index.search([999]) == []
+    assert PantryIndex([], [], []).search([100]) == []
+
+
+def test_patched_copy(index):
+    patched = index.patched([2, 4], [(2, 10)], [(2, 104)], [(2, 'dinner')])
+    assert patched.search([104]) == [(2, 1.0)]
+    assert patched.search([100, 101], tags={'dinner'}) == []
+    assert patched.search([104], tags={'dinner'}) == [(2, 1.0)]
+    assert [pk for pk, _ in patched.search([100, 101])] == [1, 3]
+    assert index.search([104]) == [(4, 1.0)]
+    assert [pk for pk, _ in index.search([100, 101])] == [1, 3, 2]
+
+
+def test_changes_log(settings):
+    record_recipes_changed([1, 2])
+    record_recipes_changed([2, 3])
+    assert get_recipes_changes(0) == (2, 2, {1, 2, 3})
+    assert get_recipes_changes(1) == (2, 2, {2, 3})
+    assert get_recipes_changes(2) == (2, 2, set())
+    assert get_recipes_changes(5) == (2, 5, None)
+    settings.RECIPES_CHANGES_LIMIT = 1
+    assert get_recipes_changes(0) == (2, 0, None)
+
+
+@pytest.mark.parametrize('missing, expected', [
+    (1, (2, 0, set())),
+    (2, (2, 1, {1})),
+])
+def test_changes_stop_before_missing_entry(missing, expected):
+    record_recipes_changed([1])
+    record_recipes_changed([2])
+    cache.delete(RECIPES_CHANGE_KEY.format(number=missing))
+    assert get_recipes_changes(0) == expected
+
+
+def start_change():
+    """
+    Счетчик журнала уже увеличен, а запись еще не сохранена
+    """
+    cache.add(RECIPES_CHANGES_KEY, 0, None)
+    return cache.incr(RECIPES_CHANGES_KEY)
+
+
+def test_index_waits_for_unwritten_change(db):
+    pantry.get_index()
+    built_at, applied = pantry._built_at, pantry._applied
+    number = start_change()
+    pantry.get_index()
+    assert (pantry._built_at, pantry._applied) == (built_at, applied)
+    cache.set(RECIPES_CHANGE_KEY.format(number=number), [])
+    pantry.get_index()
+    assert (pantry._built_at, pantry._applied) == (built_at, number)
+
+
+def test_lost_change_rebuilds_index(db, settings):
+    settings.PANTRY_INDEX_REFRESH = 0
+    pantry.get_index()
+    built_at = pantry._built_at
+    number = start_change()
+    pantry.get_index()
+    assert pantry._built_at == built_at
+    pantry.get_index()
+    assert pantry._built_at > built_at
+    assert pantry._applied == number
+
+
+def test_rebuild_is_throttled(db, settings):
+    settings.RECIPES_CHANGES_LIMIT = 1
+    pantry.get_index()
+    built_at = pantry._built_at
+    record_recipes_changed([1])
+    record_recipes_changed([2])
+    pantry.get_index()
+    assert pantry._built_at == built_at
+    settings.PANTRY_INDEX_REFRESH = 0
+    pantry.get_index()
+    assert pantry._built_at > built_at
+
+
+def search(world, ingredients, params=''):
+    response = world.client.get(
+        '/api/recipes/pantry/?limit=50&' + '&'.join(
+            f'ingredients={ingredient.id}' for ingredient in ingredients
+        ) + params
+    )
+    assert response.status_code == 200
+    return [
+        (recipe['id'], recipe['coverage'])
+        for recipe in response.json()['results']
+    ]
+
+
+def test_api_ranking_and_relation_filters(make_world):
+    world = make_world(5)
+    ingredients = world.ingredients[:3]
+    recipes = sorted((recipe.id for recipe in world.recipes), reverse=True)
+    own = sorted((recipe.id for recipe in world.own_recipes), reverse=True)
+    assert search(world, ingredients) == (
+        [(pk, 1.0) for pk in recipes] + [(pk, 0.6) for pk in own]
+    )
+    favorites = {recipe.id for recipe in world.recipes[2:]}
+    assert [pk for pk, _ in search(
+        world, ingredients, '&is_favorited=true'
+    )] == [pk for pk in recipes if pk in favorites]
+    assert [pk for pk, _ in search(
+        world, ingredients, '&is_in_shopping_cart=false'
+    )] == [pk for pk in recipes + own if pk not in favorites]
+
+
+def test_recipe_changes_patch_index(transactional_db, make_world):
+    world = make_world(5)
+    recipe = world.own_recipes[0]
+    last = world.ingredients[-1]
+    assert search(world, [last]) == []
+    built_at = pantry._built_at
+    response = world.client.patch(
+        f'/api/recipes/{recipe.id}/',
+        {'ingredients': [{'id': last.id, 'amount': 1}]},
+        format='json',
+    )
+    assert response.status_code == 200
+    assert search(world, [last]) == [(recipe.id, 1.0)]
+    response = world.client.delete(f'/api/recipes/{recipe.id}/')
+    assert response.status_code == 204
+    assert search(world, [last]) == []
+    assert pantry._built_at == built_at
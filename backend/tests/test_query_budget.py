@@ -0,0 +1,293 @@
+import difflib
+import json
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test import RequestFactory
+from django.urls import get_resolver
+from django.urls.resolvers import URLResolver
+from djoser.utils import encode_uid
+
+from recipes.filters import RecipeFilter
+from recipes.models import Recipe
+from users.models import User
+from .factories import PASSWORD
+from .query_budget import Budget, check_snapshot, measure
+
+SIZES = [5, 50]
+
+
+def user_payload(world, name):
+    return {
+        'email': f'{name}-{world.size}@example.com',
+        'username': f'{name}-{world.size}',
+        'first_name': 'Новый',
+        'last_name': 'Пользователь',
+        'password': PASSWORD,
+    }
+
+
+def uid_and_token(user):
+    return {
+        'uid': encode_uid(user.pk),
+        'token': default_token_generator.make_token(user),
+    }
+
+
+BUDGETS = [
+    Budget('api_root', 'api-root', 'get', 0, lambda w: ('/api/', None),
+           anonymous=True),
+    Budget('tags_list', 'tags-list', 'get', 2,
+           lambda w: ('/api/tags/', None)),
+    Budget('ingredients_list', 'ingredients-list', 'get', 2,
+           lambda w: ('/api/ingredients/', None)),
+    Budget('ingredients_search', 'ingredients-list', 'get', 2,
+           lambda w: (f'/api/ingredients/?name=w{w.size} прод', None)),
+    Budget('recipes_list', 'recipes-list', 'get', 6,
+           lambda w: (f'/api/recipes/?limit={w.size}', None)),
+    Budget('recipes_list_anonymous', 'recipes-list', 'get', 4,
+           lambda w: (f'/api/recipes/?limit={w.size}', None),
+           anonymous=True),
+    Budget('recipes_list_filtered', 'recipes-list', 'get', 7, lambda w: (
+        f'/api/recipes/?limit={w.size}&is_favorited=true'
+        f'&tags={w.tags[0].slug}'
+        f'&tags={w.tags[1].slug}', None,
+    )),
+    Budget('recipes_search', 'recipes-list', 'get', 6,
+           lambda w: (f'/api/recipes/?limit={w.size}&search=рецепт', None)),
+    Budget('recipes_cursor', 'recipes-list', 'get', 5,
+           lambda w: (f'/api/recipes/?cursor=&limit={w.size}', None)),
+    Budget('recipe_create', 'recipes-list', 'post', 15,
+           lambda w: ('/api/recipes/', w.recipe_payload())),
+    Budget('recipe_detail', 'recipes-detail', 'get', 5,
+           lambda w: (f'/api/recipes/{w.own_recipes[0].id}/', None)),
+    Budget('recipe_update', 'recipes-detail', 'put', 17, lambda w: (
+        f'/api/recipes/{w.own_recipes[0].id}/', w.recipe_payload(),
+    )),
+    Budget('recipe_partial_update', 'recipes-detail', 'patch', 17, lambda w: (
+        f'/api/recipes/{w.own_recipes[0].id}/',
+        {'name': 'Другое название', 'ingredients': [
+            {'id': ingredient.id, 'amount': 7}
+            for ingredient in w.ingredients[w.size // 2:w.size * 3 // 2]
+        ]},
+    )),
+    Budget('recipe_delete', 'recipes-detail', 'delete', 16,
+           lambda w: (f'/api/recipes/{w.own_recipes[1].id}/', None)),
+    Budget('recipes_feed', 'recipes-feed', 'get', 6,
+           lambda w: (f'/api/recipes/feed/?limit={w.size}', None)),
+    Budget('recipes_pantry', 'recipes-pantry', 'get', 8, lambda w: (
+        f'/api/recipes/pantry/?limit={w.size}&' + '&'.join(
+            f'ingredients={ingredient.id}' for ingredient in w.ingredients
+        ), None,
+    )),
+    Budget('recipes_similar', 'recipes-similar', 'get', 6, lambda w: (
+        f'/api/recipes/{w.recipes[0].id}/similar/?limit={w.size}', None,
+    )),
+    Budget('favorite_add', 'recipes-favorite', 'get', 7,
+           lambda w: (f'/api/recipes/{w.recipes[0].id}/favorite/', None)),
+    Budget('favorite_remove', 'recipes-favorite', 'delete', 7,
+           lambda w: (f'/api/recipes/{w.recipes[2].id}/favorite/', None)),
+    Budget('shopping_cart_add', 'shopping_cart', 'get', 4, lambda w: (
+        f'/api/recipes/{w.recipes[0].id}/shopping_cart/', None,
+    )),
+    Budget('shopping_cart_remove', 'shopping_cart', 'delete', 3, lambda w: (
+        f'/api/recipes/{w.recipes[2].id}/shopping_cart/', None,
+    )),
+    Budget('shopping_cart_download', 'download_shopping_cart', 'get', 2,
+           lambda w: ('/api/recipes/download_shopping_cart/', None)),
+    Budget('users_list', 'Users-list', 'get', 6,
+           lambda w: (f'/api/users/?limit={w.size}', None)),
+    Budget('user_create', 'Users-list', 'post', 5,
+           lambda w: ('/api/users/', user_payload(w, 'created')),
+           anonymous=True),
+    Budget('user_detail', 'Users-detail', 'get', 5,
+           lambda w: (f'/api/users/{w.authors[0].id}/', None)),
+    Budget('user_update', 'Users-detail', 'put', 8, lambda w: (
+        f'/api/users/{w.user.id}/', user_payload(w, 'updated'),
+    )),
+    Budget('user_partial_update', 'Users-detail', 'patch', 6, lambda w: (
+        f'/api/users/{w.user.id}/', {'first_name': 'Другое'},
+    )),
+    Budget('user_delete', 'Users-detail', 'delete', 29, lambda w: (
+        f'/api/users/{w.user.id}/', {'current_password': PASSWORD},
+    )),
+    Budget('me', 'Users-me', 'get', 1, lambda w: ('/api/users/me/', None)),
+    Budget('me_update', 'Users-me', 'put', 3,
+           lambda w: ('/api/users/me/', user_payload(w, 'me'))),
+    Budget('me_partial_update', 'Users-me', 'patch', 2,
+           lambda w: ('/api/users/me/', {'last_name': 'Другая'})),
+    Budget('me_delete', 'Users-me', 'delete', 28, lambda w: (
+        '/api/users/me/', {'current_password': PASSWORD},
+    )),
+    Budget('subscriptions', 'Users-subscriptions', 'get', 4, lambda w: (
+        f'/api/users/subscriptions/?limit={w.size}&recipes_limit=3', None,
+    )),
+    Budget('subscribe', 'Users-subscribe', 'get', 15, lambda w: (
+        f'/api/users/{w.authors[0].id}/subscribe/?recipes_limit=3', None,
+    )),
+    Budget('unsubscribe', 'Users-subscribe', 'delete', 8,
+           lambda w: (f'/api/users/{w.authors[1].id}/subscribe/', None)),
+    Budget('set_password', 'Users-set-password', 'post', 2, lambda w: (
+        '/api/users/set_password/',
+        {'current_password': PASSWORD, 'new_password': 'другой-пароль-42'},
+    )),
+    Budget('set_email', 'Users-set-username', 'post', 3, lambda w: (
+        '/api/users/set_email/',
+        {'current_password': PASSWORD,
+         'new_email': f'new-{w.size}@example.com'},
+    )),
+    Budget('activation', 'Users-activation', 'post', 2,
+           lambda w: ('/api/users/activation/', uid_and_token(w.inactive)),
+           anonymous=True),
+    Budget('resend_activation', 'Users-resend-activation', 'post', 1,
+           lambda w: ('/api/users/resend_activation/',
+                      {'email': w.inactive.email}),
+           anonymous=True, status=400),
+    Budget('reset_password', 'Users-reset-password', 'post', 1,
+           lambda w: ('/api/users/reset_password/', {'email': w.user.email}),
+           anonymous=True),
+    Budget('reset_password_confirm', 'Users-reset-password-confirm', 'post',
+           2, lambda w: ('/api/users/reset_password_confirm/', {
+               **uid_and_token(w.user), 'new_password': 'другой-пароль-42',
+           }), anonymous=True),
+    Budget('reset_email', 'Users-reset-username', 'post', 1,
+           lambda w: ('/api/users/reset_email/', {'email': w.user.email}),
+           anonymous=True),
+    Budget('reset_email_confirm', 'Users-reset-username-confirm', 'post', 3,
+           lambda w: ('/api/users/reset_email_confirm/', {
+               **uid_and_token(w.user),
+               'new_email': f'reset-{w.size}@example.com',
+           }), anonymous=True),
+    Budget('token_login', 'login', 'post', 3, lambda w: (
+        '/api/auth/token/login/',
+        {'email': w.user.email, 'password': PASSWORD},
+    ), anonymous=True),
+    Budget('token_logout', 'logout', 'post', 3,
+           lambda w: ('/api/auth/token/logout/', None)),
+]
+
+
+def endpoint_methods():
+    """
+    Пары (имя маршрута, метод) из recipes/urls.py и users/urls.py
+    """
+    found = set()
+    stack = [get_resolver(module).url_patterns
+             for module in ('recipes.urls', 'users.urls')]
+    while stack:
+        for pattern in stack.pop():
+            if isinstance(pattern, URLResolver):
+                stack.append(pattern.url_patterns)
+                continue
+            callback = pattern.callback
+            actions = getattr(callback, 'actions', None)
+            if actions is None:
+                view = callback.cls
+                actions = {
+                    method: method for method in view.http_method_names
+                    if hasattr(view, method)
+                    and method not in ('head', 'options')
+                }
+            found.update((pattern.name, method) for method in actions)
+    return found
+
+
+def test_every_endpoint_has_budget():
+    declared = {(budget.url_name, budget.method) for budget in BUDGETS}
+    assert endpoint_methods() - declared == set()
+
+
+@pytest.mark.parametrize(
+    'budget', BUDGETS, ids=[budget.name for budget in BUDGETS]
+)
+def test_query_budget(budget, make_world, update_snapshots):
+    """
+    Запросы к базе не должны зависеть от размера выборки:
+    при 5 и 50 объектах нормализованный SQL совпадает
+    """
+    measured = {}
+    for size in SIZES:
+        world = make_world(size)
+        client = world.anonymous if budget.anonymous else world.client
+        measured[size] = measure(client, budget, world)
+    small, large = (measured[size] for size in SIZES)
+    assert small == large, (
+        'Число или текст запросов зависит от размера выборки:\n'
+        + '\n'.join(difflib.unified_diff(
+            small, large, f'size={SIZES[0]}', f'size={SIZES[1]}', lineterm='',
+        ))
+    )
+    assert len(large) <= budget.max_queries, (
+        f'{budget.name}: {len(large)} запросов при бюджете '
+        f'{budget.max_queries}'
+    )
+    check_snapshot(budget, large, update_snapshots)
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from plan_nodes(child)
+
+
+def explain(queryset):
+    """
+    Узлы плана запроса по свежей статистике. Последовательное чтение
+    и bitmap-сканирование запрещены: на маленьких тестовых таблицах
+    они дешевле прямого чтения индекса и скрыли бы, может ли
+    планировщик вообще использовать нужный индекс
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+        cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute('SET LOCAL enable_bitmapscan = off')
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return list(plan_nodes(plan[0]['Plan']))
+
+
+def index_scans(nodes):
+    return {
+        node['Index Name'] for node in nodes
+        if node['Node Type'] in ('Index Scan', 'Index Only Scan')
+    }
+
+
+@pytest.mark.parametrize('value, join_types', [
+    ('true', {'Inner', 'Semi'}),
+    ('false', {'Anti'}),
+])
+@pytest.mark.parametrize('param, index', [
+    ('is_favorited', 'unique_favorite'),
+    ('is_in_shopping_cart', 'unique_shopping_cart'),
+])
+def test_user_relation_filter_plan(param, index, value, join_types,
+                                   make_world):
+    """
+    Фильтры по избранному и корзине - EXISTS, который планировщик
+    разворачивает в соединение (для отрицания - в антисоединение)
+    по уникальному индексу (user, recipe), а не в подзапрос
+    на каждую строку рецептов
+    """
+    world = make_world(SIZES[0])
+    request = RequestFactory().get('/api/recipes/')
+    request.user = world.user
+    nodes = explain(RecipeFilter(
+        {param: value}, Recipe.objects.all(), request=request
+    ).qs)
+    assert not [node for node in nodes if 'Subplan Name' in node]
+    assert {node.get('Join Type') for node in nodes} & join_types
+    assert index in index_scans(nodes)
+
+
+def test_is_subscribed_plan(make_world):
+    """
+    Признак подписки читается из уникального индекса (user, author)
+    """
+    world = make_world(SIZES[0])
+    nodes = explain(User.objects.annotate_is_subscribed(world.user))
+    assert 'unique_follow' in index_scans(nodes)
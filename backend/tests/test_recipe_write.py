@@ -0,0 +1,41 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Recipe
+
+
+@pytest.mark.parametrize('tags, error', [
+    ([], 'хотя бы один тег'),
+    ('duplicate', 'повторений'),
+    ('missing', 'Теги не найдены'),
+])
+def test_invalid_tags_are_rejected(make_world, tags, error):
+    world = make_world(5)
+    payload = world.recipe_payload()
+    if tags == 'duplicate':
+        tags = [world.tags[0].id, world.tags[0].id]
+    elif tags == 'missing':
+        tags = [world.tags[0].id, 0]
+    payload['tags'] = tags
+    response = world.client.post('/api/recipes/', payload, format='json')
+    assert response.status_code == 400
+    assert error in str(response.json()['tags'])
+
+
+def test_tags_are_validated_in_one_query(make_world):
+    world = make_world(5)
+    payload = world.recipe_payload()
+    with CaptureQueriesContext(connection) as queries:
+        response = world.client.post('/api/recipes/', payload, format='json')
+    assert response.status_code == 201
+    tag_lookups = [
+        query['sql'] for query in queries
+        if query['sql'].startswith('SELECT')
+        and 'FROM "recipes_tag" WHERE' in query['sql']
+    ]
+    assert len(tag_lookups) == 1
+    recipe = Recipe.objects.get(pk=response.json()['id'])
+    assert set(recipe.tags.values_list('id', flat=True)) == set(
+        payload['tags']
+    )
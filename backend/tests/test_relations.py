@@ -0,0 +1,108 @@
+import random
+import threading
+
+from django.db import connection
+
+from recipes.models import Favorite, Purchase
+from users.models import Follow
+from users.relations import UserRelations
+from .processes import run_in_process
+
+
+def stored(user_id):
+    return UserRelations(user_id).load()
+
+
+def cached(user_id):
+    relations = UserRelations(user_id)
+    return (
+        relations.favorites, relations.shopping_cart, relations.following,
+    )
+
+
+def run_threads(targets):
+    """
+    Запускает функции в потоках, каждый со своим соединением с базой,
+    и возвращает возникшие в них исключения
+    """
+    errors = []
+
+    def run(target, args):
+        try:
+            target(*args)
+        except Exception as error:
+            errors.append(error)
+        finally:
+            connection.close()
+
+    threads = [
+        threading.Thread(target=run, args=target) for target in targets
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def toggle(user_id, model, field, values, seed):
+    generator = random.Random(seed)
+    for _ in range(30):
+        lookup = {'user_id': user_id, f'{field}_id': generator.choice(values)}
+        if not model.objects.filter(**lookup).delete()[0]:
+            model.objects.get_or_create(**lookup)
+        cached(user_id)
+
+
+def read(user_id):
+    for _ in range(60):
+        cached(user_id)
+
+
+def test_concurrent_changes_keep_cache_consistent(make_world,
+                                                  transactional_db):
+    """
+    Потоки одновременно добавляют и удаляют избранное, корзину
+    и подписки и читают множества из кеша. После всех изменений
+    кеш совпадает с базой: устаревшее чтение не переживает
+    смену поколения
+    """
+    world = make_world(5)
+    user_id = world.user.id
+    recipes = [recipe.id for recipe in world.recipes]
+    authors = [author.id for author in world.authors]
+    errors = run_threads([
+        (toggle, (user_id, Favorite, 'recipe', recipes, 1)),
+        (toggle, (user_id, Favorite, 'recipe', recipes, 2)),
+        (toggle, (user_id, Purchase, 'recipe', recipes, 3)),
+        (toggle, (user_id, Follow, 'following', authors, 4)),
+        *[(read, (user_id,)) for _ in range(4)],
+    ])
+    assert errors == []
+    assert cached(user_id) == stored(user_id)
+
+
+def test_change_in_other_process_is_visible(make_world, transactional_db):
+    world = make_world(5)
+    author = world.authors[0]
+    response = world.client.get(f'/api/users/{author.id}/')
+    assert response.json()['is_subscribed'] is False
+    run_in_process(f'''
+        from users.models import Follow
+        Follow.objects.create(user_id={world.user.id},
+                              following_id={author.id})
+    ''')
+    response = world.client.get(f'/api/users/{author.id}/')
+    assert response.json()['is_subscribed'] is True
+
+
+def test_process_cache_is_not_used(make_world, settings,
+                                   django_assert_num_queries):
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }}
+    world = make_world(5)
+    cached(world.user.id)
+    with django_assert_num_queries(3):
+        relations = cached(world.user.id)
+    assert relations == stored(world.user.id)
@@ -0,0 +1,78 @@
+import csv
+import io
+
+import pytest
+from reportlab.pdfbase import pdfmetrics
+
+from recipes.models import Purchase
+from recipes.shopping_list import PDF_FONT_NAME
+
+SIZE = 5
+
+
+def expected_lines(world):
+    """
+    Все рецепты корзины содержат первые SIZE // 5 + 2 ингредиента
+    по 10 единиц, поэтому количества суммируются по рецептам
+    """
+    total = 10 * (len(world.recipes) - 2)
+    return sorted(
+        (ingredient.name, ingredient.measurement_unit, total)
+        for ingredient in world.ingredients[:SIZE // 5 + 2]
+    )
+
+
+def download(world, export_format):
+    response = world.client.get(
+        f'/api/recipes/download_shopping_cart/?format={export_format}'
+    )
+    assert response.status_code == 200
+    return response, b''.join(response.streaming_content)
+
+
+def test_txt(make_world):
+    world = make_world(SIZE)
+    response, content = download(world, 'txt')
+    assert response['Content-Type'] == 'text/plain; charset=utf-8'
+    assert 'ingredient_list.txt' in response['Content-Disposition']
+    assert content.decode().splitlines() == [
+        f'{name} - {amount}, {unit}'
+        for name, unit, amount in expected_lines(world)
+    ]
+
+
+def test_csv(make_world):
+    world = make_world(SIZE)
+    response, content = download(world, 'csv')
+    assert response['Content-Type'] == 'text/csv; charset=utf-8'
+    rows = list(csv.reader(io.StringIO(content.decode())))
+    assert rows[0] == ['Ингредиент', 'Количество', 'Единица измерения']
+    assert rows[1:] == [
+        [name, str(amount), unit]
+        for name, unit, amount in expected_lines(world)
+    ]
+
+
+def test_pdf(make_world):
+    world = make_world(SIZE)
+    response, content = download(world, 'pdf')
+    assert response['Content-Type'] == 'application/pdf'
+    assert content.startswith(b'%PDF-')
+    assert content.rstrip().endswith(b'%%EOF')
+    assert PDF_FONT_NAME in pdfmetrics.getRegisteredFontNames()
+
+
+def test_empty_cart(make_world):
+    world = make_world(SIZE)
+    Purchase.objects.filter(user=world.user).delete()
+    _, content = download(world, 'txt')
+    assert content == b''
+
+
+@pytest.mark.parametrize('export_format', ['txt', 'csv', 'pdf'])
+def test_anonymous_is_rejected(make_world, export_format):
+    world = make_world(SIZE)
+    response = world.anonymous.get(
+        f'/api/recipes/download_shopping_cart/?format={export_format}'
+    )
+    assert response.status_code == 401
@@ -0,0 +1,119 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from recipes.models import (Ingredient, Recipe, RecipeIngredient,
+                            RecipeSimilarity)
+from recipes.similarity import build
+from .factories import create_user
+
+COUNT = 2
+RECIPES = ['abcd', 'abc', 'ab', 'efg', 'ef', 'h']
+
+
+@pytest.fixture
+def recipes(db):
+    """
+    Рецепты, признаки которых - буквы строки: у первых трех
+    и у двух следующих есть общие ингредиенты, последний ни на кого
+    не похож. Сходства внутри групп различны, поэтому лучшие
+    COUNT соседей определены однозначно
+    """
+    author = create_user('similarity-author')
+    ingredients = {
+        letter: Ingredient.objects.create(name=letter, measurement_unit='г')
+        for letter in 'abcdefghx'
+    }
+    created = []
+    for letters in RECIPES:
+        recipe = Recipe.objects.create(
+            author=author, name=letters, text='Текст', cooking_time=5,
+            image='recipes/similarity.png',
+        )
+        set_ingredients(recipe, ingredients, letters)
+        created.append(recipe)
+    return created, ingredients
+
+
+def set_ingredients(recipe, ingredients, letters):
+    recipe.recipeingredient_set.all().delete()
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(recipe=recipe, ingredient=ingredients[letter],
+                         amount=1)
+        for letter in letters
+    )
+    recipe.save()
+
+
+def stored():
+    return {
+        recipe_id: [
+            (neighbour, round(score, 5))
+            for neighbour, score in zip(neighbours, scores)
+        ]
+        for recipe_id, neighbours, scores in
+        RecipeSimilarity.objects.values_list(
+            'recipe_id', 'neighbours', 'scores'
+        )
+    }
+
+
+def test_full_build_ranks_by_jaccard(recipes):
+    created, _ = recipes
+    assert build(full=True, count=COUNT) == len(RECIPES)
+    first, second, third, fourth, fifth, last = (
+        recipe.id for recipe in created
+    )
+    assert stored() == {
+        first: [(second, 0.75), (third, 0.5)],
+        second: [(first, 0.75), (third, round(2 / 3, 5))],
+        third: [(second, round(2 / 3, 5)), (first, 0.5)],
+        fourth: [(fifth, round(2 / 3, 5))],
+        fifth: [(fourth, round(2 / 3, 5))],
+        last: [],
+    }
+
+
+def test_nothing_changed(recipes):
+    build(full=True, count=COUNT)
+    assert build(count=COUNT) == 0
+
+
+@pytest.mark.parametrize('position, letters, refreshed', [
+    (5, 'efgh', 3),
+    (1, 'x', 3),
+    (0, 'abce', 5),
+])
+def test_incremental_matches_full_build(recipes, position, letters,
+                                        refreshed):
+    created, ingredients = recipes
+    build(full=True, count=COUNT)
+    set_ingredients(created[position], ingredients, letters)
+    assert build(count=COUNT, block_size=2) == refreshed
+    incremental = stored()
+    build(full=True, count=COUNT)
+    assert incremental == stored()
+
+
+def test_new_recipe_becomes_neighbour(recipes):
+    created, ingredients = recipes
+    build(full=True, count=COUNT)
+    recipe = Recipe.objects.create(
+        author=created[0].author, name='abcd', text='Текст',
+        cooking_time=5, image='recipes/similarity.png',
+    )
+    set_ingredients(recipe, ingredients, 'abcd')
+    build(count=COUNT)
+    assert stored()[created[0].id][0] == (recipe.id, 1.0)
+    assert stored()[recipe.id][0] == (created[0].id, 1.0)
+
+
+def test_command(recipes):
+    stdout = StringIO()
+    call_command('build_similarity', '--full', stdout=stdout)
+    assert f'Рассчитано рецептов: {len(RECIPES)}' in stdout.getvalue()
+    stdout = StringIO()
+    call_command('build_similarity', '--benchmark', '50', stdout=stdout)
+    assert 'Рассчитано рецептов: 50' in stdout.getvalue()
+    assert RecipeSimilarity.objects.count() == len(RECIPES)
@@ -0,0 +1,80 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes import timeline
+from recipes.models import FeedEntry, Recipe
+from users.models import Follow
+
+SIZE = 5
+MAX_ENTRIES = 3
+
+
+def feed_ids(user):
+    return list(FeedEntry.objects.filter(user=user).order_by(
+        '-recipe_id'
+    ).values_list('recipe_id', flat=True))
+
+
+def newest_ids(authors, limit=MAX_ENTRIES):
+    return list(Recipe.objects.filter(author__in=authors).order_by(
+        '-id'
+    ).values_list('id', flat=True)[:limit])
+
+
+def test_fan_out_keeps_newest_entries(make_world, settings):
+    settings.FEED_MAX_ENTRIES = MAX_ENTRIES
+    world = make_world(SIZE)
+    assert len(feed_ids(world.user)) == MAX_ENTRIES
+    recipe = world.create_recipe(world.authors[1], 2)
+    timeline.fan_out(recipe)
+    assert feed_ids(world.user) == newest_ids(world.authors[1:])
+    assert feed_ids(world.user)[0] == recipe.id
+
+
+def test_every_batch_is_trimmed(make_world, settings):
+    settings.FEED_MAX_ENTRIES = MAX_ENTRIES
+    settings.FEED_FANOUT_BATCH_SIZE = 1
+    world = make_world(SIZE)
+    author = world.authors[1]
+    for follower in world.authors[2:]:
+        Follow.objects.create(user=follower, following=author)
+        for recipe in world.recipes[:2]:
+            FeedEntry.objects.create(user=follower, recipe=recipe)
+    recipe = world.create_recipe(author, 2)
+    timeline.fan_out(recipe)
+    for follower in world.authors[2:]:
+        assert feed_ids(follower) == newest_ids([author])
+
+
+def test_feed_read_does_not_write(make_world):
+    world = make_world(SIZE)
+    with CaptureQueriesContext(connection) as context:
+        response = world.client.get(f'/api/recipes/feed/?limit={SIZE}')
+    assert response.status_code == 200
+    assert not [
+        query for query in context.captured_queries
+        if query['sql'].startswith('DELETE')
+    ]
+    assert [recipe['id'] for recipe in response.json()['results']] == (
+        newest_ids(world.authors[1:], SIZE)
+    )
+
+
+def test_unsubscribe_removes_author_entries(make_world):
+    world = make_world(SIZE)
+    response = world.client.delete(
+        f'/api/users/{world.authors[1].id}/subscribe/'
+    )
+    assert response.status_code == 204
+    assert feed_ids(world.user) == newest_ids(world.authors[2:], None)
+
+
+def test_popular_author_is_read_at_request_time(make_world, settings):
+    world = make_world(SIZE)
+    settings.FEED_FANOUT_MAX_FOLLOWERS = 0
+    recipe = world.create_recipe(world.authors[1], 2)
+    assert recipe.author.followers_count == 0
+    timeline.fan_out(recipe)
+    assert recipe.id not in feed_ids(world.user)
+    feed = timeline.get_feed(world.user, Recipe.objects.all())
+    assert recipe in feed
@@ -20,6 +20,8 @@ class UserAdmin(admin.ModelAdmin):
         'username',
         'first_name',
         'last_name',
+        'recipes_count',
+        'followers_count',
     ]
     list_filter = [
         'email',
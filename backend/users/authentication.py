@@ -0,0 +1,121 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from recipes.cache import bump_version, get_version, is_shared
+
+VERSION_KEY = 'auth:{key}:version'
+
+
+def get_token_version(key):
+    return get_version(
+        VERSION_KEY.format(key=key), settings.AUTH_TOKEN_CACHE_TTL
+    )
+
+
+def bump_token_version(key):
+    bump_version(VERSION_KEY.format(key=key), settings.AUTH_TOKEN_CACHE_TTL)
+
+
+class TokenCache:
+    """
+    Ограниченный LRU-кеш токенов в памяти процесса. Запись действительна
+    AUTH_TOKEN_CACHE_TTL секунд и пока не сменилась версия токена
+    в общем кеше. Выход, смена пароля, блокировка и удаление пользователя
+    меняют версию после коммита, и остальные воркеры видят это
+    на следующем запросе с токеном
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        """
+        Возвращает копию токена с пользователем или None
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+        data, version, expires_at = entry
+        if expires_at < time.monotonic():
+            return None
+        current = get_token_version(key)
+        if current is None or current != version:
+            return None
+        return pickle.loads(data)
+
+    def set(self, key, token, version):
+        entry = (
+            pickle.dumps(token),
+            version,
+            time.monotonic() + settings.AUTH_TOKEN_CACHE_TTL,
+        )
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > settings.AUTH_TOKEN_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+tokens = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication без запроса к базе на повторных запросах
+    с тем же токеном. Каждый запрос получает свою копию токена
+    и пользователя, поэтому потоки не делят изменяемые объекты.
+    Запрос экономится только с общим кешем (memcached из README).
+    С кешем по умолчанию в памяти процесса отзыв токена не дошел бы
+    до других воркеров, поэтому токен, как в TokenAuthentication,
+    каждый раз проверяется по базе. Без версии в кеше токен тоже
+    не кешируется: иначе отзыв нечем было бы отметить
+    """
+
+    def authenticate_credentials(self, key):
+        if not is_shared():
+            return super().authenticate_credentials(key)
+        token = tokens.get(key)
+        if token is not None:
+            return token.user, token
+        version = get_token_version(key)
+        user, token = super().authenticate_credentials(key)
+        if version is not None:
+            tokens.set(key, token, version)
+        return user, token
+
+
+def token_revoked(key):
+    """
+    Версия читается до запроса к базе, а меняется после коммита.
+    Поэтому закешированная запись всегда получена из базы позже,
+    чем прочитана ее версия, и не переживет следующее изменение
+    """
+    transaction.on_commit(lambda: bump_token_version(key))
+
+
+def auth_changed(user_id):
+    """
+    Изменение пользователя отзывает все его токены
+    """
+    def revoke():
+        keys = Token.objects.filter(user_id=user_id).values_list(
+            'key', flat=True
+        )
+        for key in keys:
+            bump_token_version(key)
+
+    transaction.on_commit(revoke)
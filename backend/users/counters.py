@@ -0,0 +1,71 @@
+from django.db.models import (Case, Count, F, IntegerField, OuterRef, Q,
+                              Subquery, Value, When)
+from django.db.models.functions import Coalesce, Greatest
+
+from recipes.models import Favorite, Recipe
+from .models import Follow, User
+
+COUNTERS = [
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Follow, 'following'),
+]
+
+
+def change_counter(model, pk, field, delta):
+    """
+    Изменяет счетчик одним UPDATE без чтения строки,
+    поэтому параллельные запросы не теряют изменений
+    """
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+def change_counters(model, field, deltas):
+    """
+    Изменяет счетчики нескольких строк одним UPDATE,
+    deltas - изменение для каждого pk. Строки группируются
+    по величине изменения, чтобы текст запроса не рос с их числом
+    """
+    by_value = {}
+    for pk, value in deltas.items():
+        by_value.setdefault(value, []).append(pk)
+    if len(by_value) == 1:
+        delta, = by_value
+    else:
+        delta = Case(
+            *(When(pk__in=pks, then=Value(value))
+              for value, pks in by_value.items()),
+            output_field=IntegerField(),
+        )
+    model.objects.filter(pk__in=deltas).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+def actual_count(related_model, related_field):
+    return Coalesce(
+        Subquery(
+            related_model.objects.filter(
+                **{related_field: OuterRef('pk')}
+            ).order_by().values(related_field).annotate(
+                total=Count('pk')
+            ).values('total')
+        ),
+        0,
+    )
+
+
+def recount(model, field, related_model, related_field):
+    """
+    Пересчитывает счетчик по фактическим данным
+    и возвращает число исправленных строк
+    """
+    return model.objects.annotate(
+        actual=actual_count(related_model, related_field)
+    ).filter(
+        ~Q(**{field: F('actual')})
+    ).update(
+        **{field: actual_count(related_model, related_field)}
+    )
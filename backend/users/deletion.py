@@ -0,0 +1,80 @@
+from django.apps import apps
+from django.db import models, transaction
+from django.db.models import Q
+from django.dispatch import Signal
+
+rows_deleted = Signal(providing_args=['rows', 'cascade'])
+
+
+class CountedDeleteQuerySet(models.QuerySet):
+    """
+    Удаление без post_delete на каждую строку: зависимые записи
+    удаляются каскадом одним DELETE, а получатели rows_deleted
+    обновляют счетчики, кеши и ленты сразу для всех строк.
+    deleted_fields - поля строк, нужные получателям, cascades -
+    зависимые модели и пути от них к удаляемым записям
+    """
+
+    deleted_fields = ('pk',)
+    cascades = {}
+
+    def delete(self):
+        with transaction.atomic(using=self.db, savepoint=False):
+            return self.delete_rows(
+                list(self.values(*self.deleted_fields)), super().delete
+            )
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def delete_rows(self, rows, delete):
+        """
+        Вызывает delete, когда поля удаляемых строк уже известны,
+        и отправляет rows_deleted для них и для каскада
+        """
+        with transaction.atomic(using=self.db, savepoint=False):
+            deleted = [(self.model, rows, False), *self.collect_cascades()]
+            result = delete()
+            if not result[0]:
+                return result
+            for model, model_rows, cascade in deleted:
+                if model_rows:
+                    rows_deleted.send(
+                        sender=model, rows=model_rows, cascade=cascade
+                    )
+        return result
+
+    delete_rows.alters_data = True
+    delete_rows.queryset_only = True
+
+    def collect_cascades(self):
+        """
+        Строки зависимых моделей, которые удалятся каскадом,
+        по одному запросу на модель
+        """
+        pks = self.values('pk')
+        for label, lookups in self.cascades.items():
+            model = apps.get_model(label)
+            queryset = model._default_manager.all()
+            condition = Q()
+            for lookup in lookups:
+                condition |= Q(**{f'{lookup}__in': pks})
+            yield model, list(
+                queryset.filter(condition).values(*queryset.deleted_fields)
+            ), True
+
+
+class CountedDeleteMixin:
+    """
+    Удаление объекта с отправкой rows_deleted через
+    CountedDeleteQuerySet модели
+    """
+
+    def delete(self, using=None, keep_parents=False):
+        queryset = type(self)._default_manager.using(using).filter(pk=self.pk)
+        delete = super().delete
+        return queryset.delete_rows(
+            [{field: getattr(self, field)
+              for field in queryset.deleted_fields}],
+            lambda: delete(using, keep_parents),
+        )
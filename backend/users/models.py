@@ -1,9 +1,66 @@
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import Exists, OuterRef
 
+from .deletion import CountedDeleteMixin, CountedDeleteQuerySet
 
-class UserManager(BaseUserManager):
+
+class UserQuerySet(CountedDeleteQuerySet):
+    """
+    Запросы пользователей с аннотациями для текущего пользователя
+    """
+
+    deleted_fields = ('id',)
+    cascades = {
+        'recipes.Recipe': ['author'],
+        'recipes.Favorite': ['user', 'recipe__author'],
+        'recipes.Purchase': ['user', 'recipe__author'],
+        'users.Follow': ['user', 'following'],
+    }
+
+    def annotate_is_subscribed(self, user):
+        if user.is_anonymous:
+            return self
+        return self.annotate(
+            is_subscribed=Exists(
+                Follow.objects.filter(user=user, following=OuterRef('pk'))
+            )
+        )
+
+
+def attach_recent_recipes(users, recipes_limit=None):
+    """
+    Подгружает не более recipes_limit последних рецептов каждого
+    автора одним запросом: UNION ALL из запросов с LIMIT по каждому
+    автору страницы, каждый читает только индекс (author, -id)
+    """
+    from recipes.models import Recipe
+
+    recipes = Recipe.objects.order_by('-id')
+    if recipes_limit is None:
+        recipes = recipes.filter(author__in=users)
+    elif recipes_limit == 0 or not users:
+        recipes = []
+    else:
+        recipes = recipes.filter(author=users[0])[:recipes_limit].union(
+            *(
+                Recipe.objects.filter(
+                    author=user
+                ).order_by('-id')[:recipes_limit]
+                for user in users[1:]
+            ),
+            all=True,
+        ).order_by('-id')
+    by_author = {}
+    for recipe in recipes:
+        by_author.setdefault(recipe.author_id, []).append(recipe)
+    for user in users:
+        user.recent_recipes = by_author.get(user.id, [])
+    return users
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     """
     Переопределяем User Manager для запроса
     дополнительных полей при создании суперпользователя
@@ -42,7 +99,7 @@ class UserManager(BaseUserManager):
         return user
 
 
-class User(AbstractUser):
+class User(CountedDeleteMixin, AbstractUser):
     """
     Переопределяем базовую модель пользователя
     добовлением дополнительных полей
@@ -78,18 +135,39 @@ class User(AbstractUser):
         verbose_name='Пароль',
         help_text='Введите ваш пароль',
     )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Рецептов',
+        default=0,
+        editable=False,
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Подписчиков',
+        default=0,
+        editable=False,
+    )
 
 
-class Follow(models.Model):
+class FollowQuerySet(CountedDeleteQuerySet):
+    """
+    Удаление подписок
+    """
+
+    deleted_fields = ('user_id', 'following_id')
+
+
+class Follow(CountedDeleteMixin, models.Model):
     """
     Модель подписки
     """
 
+    objects = FollowQuerySet.as_manager()
+
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         verbose_name='Подписчик',
         related_name='follower',
+        db_index=False,
     )
     following = models.ForeignKey(
         User,
@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from recipes.cache import is_shared
+from recipes.models import Favorite, Purchase
+from .models import Follow
+
+GENERATION_KEY = 'relations:{user_id}:generation'
+RELATIONS_KEY = 'relations:{user_id}:{generation}'
+
+
+class UserRelations:
+    """
+    Множества id избранных рецептов, рецептов в корзине и авторов,
+    на которых подписан пользователь. Загружаются один раз за запрос
+    из общего кеша, а при промахе - тремя запросами к базе.
+    Кеш процесса не видит смену поколения в других воркерах,
+    поэтому с ним множества загружаются из базы на каждый запрос
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        if not is_shared():
+            self.favorites, self.shopping_cart, self.following = self.load()
+            return
+        generation = cache.get(GENERATION_KEY.format(user_id=user_id), 0)
+        key = RELATIONS_KEY.format(user_id=user_id, generation=generation)
+        data = cache.get(key)
+        if data is None:
+            data = self.load()
+            cache.set(key, data, settings.RELATIONS_CACHE_TIMEOUT)
+        self.favorites, self.shopping_cart, self.following = data
+
+    def load(self):
+        return (
+            set(Favorite.objects.filter(
+                user=self.user_id
+            ).values_list('recipe', flat=True)),
+            set(Purchase.objects.filter(
+                user=self.user_id
+            ).values_list('recipe', flat=True)),
+            set(Follow.objects.filter(
+                user=self.user_id
+            ).values_list('following', flat=True)),
+        )
+
+
+def get_relations(request):
+    if request is None or request.user.is_anonymous:
+        return None
+    relations = getattr(request, '_user_relations', None)
+    if relations is None:
+        relations = UserRelations(request.user.id)
+        request._user_relations = relations
+    return relations
+
+
+def update_relations(request, name, pk, added):
+    """
+    Обновляет на месте уже загруженные в запросе множества
+    """
+    relations = getattr(request, '_user_relations', None)
+    if relations is None:
+        return
+    if added:
+        getattr(relations, name).add(pk)
+    else:
+        getattr(relations, name).discard(pk)
+
+
+def bump_generation(user_id):
+    key = GENERATION_KEY.format(user_id=user_id)
+    cache.add(key, 0, None)
+    cache.incr(key)
+
+
+def relations_changed(*user_ids):
+    """
+    Общая копия множеств не переписывается, а сбрасывается сменой
+    поколения после коммита: перезапись по схеме чтение-изменение-запись
+    теряла бы параллельные изменения. Читатель, успевший загрузить
+    старые данные, сохранит их под старым поколением
+    """
+    def bump_generations():
+        for user_id in user_ids:
+            bump_generation(user_id)
+
+    transaction.on_commit(bump_generations)
@@ -1,14 +1,17 @@
+from api_foodgram.metrics import TimedSerializerMixin
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
+from recipes.images import get_variant_url, get_variant_urls
 from recipes.models import Recipe
 from rest_framework import serializers
 
 from .models import Follow
+from .relations import get_relations
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     is_subscribed = serializers.SerializerMethodField()
 
@@ -24,16 +27,17 @@ class UserSerializer(serializers.ModelSerializer):
         ]
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        relations = get_relations(self.context.get('request'))
+        return relations is not None and obj.id in relations.following
 
-        request = self.context.get('request')
-        if request is None or request.user.is_anonymous:
-            return False
-        return Follow.objects.filter(
-            user=request.user, following=obj
-        ).exists()
 
+class FollowRecipeSerializer(TimedSerializerMixin,
+                             serializers.ModelSerializer):
 
-class FollowRecipeSerializer(serializers.ModelSerializer):
+    image = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
@@ -41,14 +45,22 @@ class FollowRecipeSerializer(serializers.ModelSerializer):
             'id',
             'name',
             'image',
+            'image_variants',
             'cooking_time',
         ]
 
+    def get_image(self, obj):
+        return get_variant_url(
+            obj, 'thumbnail', self.context.get('request')
+        )
+
+    def get_image_variants(self, obj):
+        return get_variant_urls(obj, self.context.get('request'))
+
 
 class ShowFollowSerializer(UserSerializer):
 
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -64,15 +76,17 @@ class ShowFollowSerializer(UserSerializer):
         ]
 
     def get_recipes(self, obj):
-        recipes = Recipe.objects.filter(author=obj)
+        if hasattr(obj, 'recent_recipes'):
+            recipes = obj.recent_recipes
+        else:
+            recipes = Recipe.objects.filter(author=obj).order_by('-id')
+            recipes_limit = self.context.get('recipes_limit')
+            if recipes_limit is not None:
+                recipes = recipes[:recipes_limit]
         return FollowRecipeSerializer(
             recipes, many=True
         ).data
 
-    def get_recipes_count(self, obj):
-        queryset = Recipe.objects.filter(author=obj)
-        return queryset.count()
-
 
 class FollowSerializer(serializers.ModelSerializer):
 
@@ -0,0 +1,71 @@
+from collections import Counter
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Favorite, Purchase, Recipe
+from .authentication import auth_changed, token_revoked
+from .counters import COUNTERS, change_counter, change_counters
+from .deletion import rows_deleted
+from .models import Follow, User
+from .relations import relations_changed
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=Purchase)
+@receiver(post_save, sender=Follow)
+def relation_changed(sender, instance, **kwargs):
+    relations_changed(instance.user_id)
+
+
+@receiver(rows_deleted, sender=Favorite)
+@receiver(rows_deleted, sender=Purchase)
+@receiver(rows_deleted, sender=Follow)
+def relations_deleted(sender, rows, **kwargs):
+    relations_changed(*{row['user_id'] for row in rows})
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    auth_changed(instance.id)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    token_revoked(instance.key)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Follow)
+def counted_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        update_counter(sender, instance, 1)
+
+
+@receiver(rows_deleted, sender=Favorite)
+@receiver(rows_deleted, sender=Recipe)
+@receiver(rows_deleted, sender=Follow)
+def counted_deleted(sender, rows, **kwargs):
+    """
+    Удаленные строки, в том числе каскадом, уменьшают
+    счетчики одним UPDATE на каждый счетчик
+    """
+    for model, field, related_model, related_field in COUNTERS:
+        if related_model is sender:
+            deleted = Counter(row[f'{related_field}_id'] for row in rows)
+            change_counters(
+                model, field, {pk: -count for pk, count in deleted.items()}
+            )
+
+
+def update_counter(sender, instance, delta):
+    """
+    Счетчики меняются в той же транзакции,
+    что и создание или удаление связанной записи
+    """
+    for model, field, related_model, related_field in COUNTERS:
+        if related_model is sender:
+            pk = getattr(instance, f'{related_field}_id')
+            change_counter(model, pk, field, delta)
@@ -1,17 +1,38 @@
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import BooleanField, Value
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
+from recipes.custom_pagination import SubscriptionsPaginator
 from rest_framework import permissions, status
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
-from .models import Follow
+from .models import Follow, attach_recent_recipes
+from .relations import update_relations
 from .serializers import FollowSerializer, ShowFollowSerializer, UserSerializer
 
 User = get_user_model()
 
 
+def get_recipes_limit(request):
+    recipes_limit = request.query_params.get('recipes_limit')
+    if recipes_limit is None:
+        return None
+    try:
+        recipes_limit = int(recipes_limit)
+    except ValueError:
+        raise ValidationError(
+            {'recipes_limit': 'Значение должно быть целым числом'}
+        )
+    if recipes_limit < 0:
+        raise ValidationError(
+            {'recipes_limit': 'Значение не может быть отрицательным'}
+        )
+    return recipes_limit
+
+
 class UserViewSet(UserViewSet):
 
     serializer_class = UserSerializer
@@ -21,6 +42,7 @@ class UserViewSet(UserViewSet):
         url_path='subscribe', url_name='subscribe',
         permission_classes=[permissions.IsAuthenticated],
     )
+    @transaction.atomic
     def subscribe(self, request, id):
         following = get_object_or_404(User, id=id)
         serializer = FollowSerializer(
@@ -32,7 +54,14 @@ class UserViewSet(UserViewSet):
         if request.method == 'GET':
             serializer.is_valid(raise_exception=True)
             serializer.save(user=request.user)
-            serializer = ShowFollowSerializer(following)
+            update_relations(request, 'following', following.id, True)
+            serializer = ShowFollowSerializer(
+                following,
+                context={
+                    'request': request,
+                    'recipes_limit': get_recipes_limit(request),
+                },
+            )
             return Response(
                 serializer.data, status=status.HTTP_201_CREATED
             )
@@ -41,6 +70,7 @@ class UserViewSet(UserViewSet):
             user=request.user,
             following__id=id
         ).delete()
+        update_relations(request, 'following', following.id, False)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -49,15 +79,21 @@ class UserViewSet(UserViewSet):
         permission_classes=[permissions.IsAuthenticated],
     )
     def show_follows(self, request):
-        queryset = User.objects.filter(following__user=request.user)
-        paginator = PageNumberPagination()
-        paginator.page_size = 6
-        page = paginator.paginate_queryset(queryset, request)
+        queryset = User.objects.filter(
+            following__user=request.user
+        ).annotate(
+            is_subscribed=Value(True, output_field=BooleanField())
+        ).order_by('id')
+        paginator = SubscriptionsPaginator()
+        page = attach_recent_recipes(
+            paginator.paginate_queryset(queryset, request),
+            get_recipes_limit(request),
+        )
         serializer = ShowFollowSerializer(
             page,
             many=True,
             context={
-                'user': request.user
+                'request': request
             },
         )
         return paginator.get_paginated_response(serializer.data)